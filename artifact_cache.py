@@ -0,0 +1,103 @@
+"""已生成图表文件 (HTML / PNG) 的内容寻址缓存。
+
+缓存键 = 图表名 + 生成设置 (版本号、解析后的默认选项和调节常量，见 charts.render_settings)
++ 该图表实际用到的各列数据的哈希。数据和设置都没有变化时，再次点击图表按钮直接复用上次
+生成的文件，不再重新统计和渲染；升级或修改默认值后旧文件不会再被复用。
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from roster_cache import DEFAULT_CACHE_DIR, evict_to_size, list_cache_entries
+from startup_profile import lazy_module
+
+pd = lazy_module('pandas')
+
+ARTIFACT_SUFFIXES = ('.html', '.png', '.json')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 200
+
+
+def artifact_key(chart_key, df, columns, options=None):
+    h = hashlib.sha256()
+    h.update(chart_key.encode('utf-8'))
+    h.update(json.dumps(options or {}, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8'))
+    for col in columns:
+        h.update(b'\0' + col.encode('utf-8'))
+        if col not in df.columns:
+            h.update(b'<missing>')
+            continue
+        # 按值哈希，与列的具体 dtype (object / category / string) 无关
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        h.update(pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class ArtifactCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'artifacts')
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, digest, output_file):
+        return os.path.join(self.cache_dir, digest + os.path.splitext(output_file)[1])
+
+    def fetch(self, digest, output_file):
+        # 命中时把缓存文件复制到 output_file 并返回 True
+        path = self._entry_path(digest, output_file)
+        try:
+            if os.path.abspath(path) != os.path.abspath(output_file):
+                shutil.copyfile(path, output_file)
+            os.utime(path, None) # 更新 mtime，作为 LRU 淘汰的依据
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def store(self, digest, output_file):
+        path = self._entry_path(digest, output_file)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            shutil.copyfile(output_file, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"警告: 写入图表缓存失败: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        evict_to_size(self.cache_dir, ARTIFACT_SUFFIXES, self.max_bytes, self.max_entries)
+        return True
+
+    def stats(self):
+        entries = list_cache_entries(self.cache_dir, ARTIFACT_SUFFIXES)
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+            }
+
+    def clear(self):
+        count, freed = 0, 0
+        for path, size, _ in list_cache_entries(self.cache_dir, ARTIFACT_SUFFIXES):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            count += 1
+            freed += size
+        return count, freed
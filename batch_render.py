@@ -0,0 +1,199 @@
+"""无界面批处理：为一个或多个学生信息表生成全部图表。
+
+不创建任何窗口、不打开浏览器，适合在没有显示器的服务器上定时运行。
+用法示例：
+
+    python batch_render.py 班级1.xlsx 班级2.xlsx -o charts_out
+    python batch_render.py rosters/*.xlsx -o charts_out --charts gender,city -j 8
+    python batch_render.py rosters/*.xlsx -o charts_out --offline --gzip
+    python batch_render.py 学生信息.xlsx -o charts_out --filter 性别=女 --filter 生源省份=山东,江苏
+    python batch_render.py 导出/学生信息.csv 导出/学生信息.parquet -o charts_out   # 按扩展名选择读取方式
+
+--offline 时所有表的图表共用 输出目录/echarts_assets/ 中的 ECharts 脚本 (见 chart_output.py)。
+--filter 只为满足全部条件的学生生成图表 (同一列的多个取值为 "或"，见 filter_index.py)。
+
+每个表的图表写入 输出目录/<表文件名>/ (不同文件夹中的同名表依次加上 (2)、(3) ...，
+与 class_rosters.class_names_for 相同，不会互相覆盖)，运行结束后把清单 (manifest.json，
+记录每个输出文件、状态和耗时) 写入输出目录并打印到标准输出。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import chart_output
+import charts
+from artifact_cache import ArtifactCache
+from charts import ChartError
+from class_rosters import class_names_for
+from filter_index import FilterIndex, parse_filters
+from roster_cache import RosterCache
+from student_loader import load_student_data
+
+# 每个工作进程内已加载的表 (路径 -> DataFrame) 和筛选结果 (路径 -> FilteredData)，
+# 同一进程处理同一表的多个图表时只加载和筛选一次
+_loaded = {}
+_filtered = {}
+
+
+def _load(roster_path, use_cache):
+    df = _loaded.get(roster_path)
+    if df is None:
+        df, _ = load_student_data(roster_path, cache=RosterCache() if use_cache else None)
+        _loaded[roster_path] = df
+    return df
+
+
+def _load_view(roster_path, use_cache, filters):
+    # 返回 (DataFrame, StudentSummary)；没有筛选条件时汇总为 None，由各图表自行统计
+    df = _load(roster_path, use_cache)
+    if not filters:
+        return df, None
+    view = _filtered.get(roster_path)
+    if view is None:
+        view = FilterIndex(df).subset(filters)
+        _filtered[roster_path] = view
+    return view.df, view.summary
+
+
+def load_task(roster_path, use_cache, filters=None):
+    # 第一阶段：并行加载各表 (同时预热缓存，第二阶段各进程直接读缓存)
+    start = time.perf_counter()
+    record = {'roster': roster_path, 'stage': 'load'}
+    try:
+        df = _load(roster_path, use_cache)
+        record.update(status='ok', rows=len(df))
+        if filters:
+            record['filtered_rows'] = len(_load_view(roster_path, use_cache, filters)[0])
+    except Exception as e:
+        record.update(status='error', message=str(e))
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def render_task(roster_path, chart_key, output_file, font_path, use_cache, output_options=None, filters=None):
+    # 第二阶段：生成单个图表
+    start = time.perf_counter()
+    if output_options is not None: # 工作进程不继承主进程中的设置
+        chart_output.configure(**output_options)
+    record = {'roster': roster_path, 'chart': chart_key, 'output': output_file}
+    try:
+        df, summary = _load_view(roster_path, use_cache, filters)
+        options = {'font_path': font_path} if chart_key == 'wordcloud' else {}
+        cache = ArtifactCache() if use_cache else None
+        result = charts.render_chart(chart_key, df, output_file=output_file, cache=cache, summary=summary, **options)
+        record['output'] = result.output_file
+        record['cached'] = result.from_cache
+        record['status'] = 'ok' if result.output_file else 'error'
+        notices = [message for _, _, message in result.notices]
+        if notices:
+            record['message'] = "\n".join(notices)
+        if result.output_file:
+            record['bytes'] = os.path.getsize(result.output_file)
+    except ChartError as e:
+        # 数据不足 (例如没有格言) 属于跳过；缺列等属于错误
+        record.update(output=None, status='skipped' if e.level == 'info' else 'error', message=e.message)
+    except Exception as e:
+        record.update(output=None, status='error', message=f"{type(e).__name__}: {e}")
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return record
+
+
+def roster_output_dirs(output_dir, roster_paths):
+    # 表路径 -> 输出目录；目录名取文件名，重名时按 class_names_for 加上序号
+    return {path: os.path.join(output_dir, name) for path, name in zip(roster_paths, class_names_for(roster_paths))}
+
+
+def run_batch(roster_paths, output_dir, chart_keys=None, workers=None,
+              font_path=charts.DEFAULT_FONT_PATH, use_cache=True, output_options=None, filters=None):
+    # 返回清单 (dict)，同时写入 output_dir/manifest.json
+    # output_options: chart_output.configure() 的参数，如 {'mode': 'offline', 'gzip': True}
+    # filters: {列: [取值, ...]}，只为筛选出的学生生成图表 (见 filter_index.py)
+    chart_keys = list(chart_keys or charts.CHARTS)
+    unknown = [key for key in chart_keys if key not in charts.CHARTS]
+    if unknown:
+        raise ValueError(f"未知的图表: {', '.join(unknown)}；可选: {', '.join(charts.CHARTS)}")
+
+    roster_paths = list(dict.fromkeys(os.path.abspath(p) for p in roster_paths)) # 同一文件只处理一次
+    out_dirs = roster_output_dirs(output_dir, roster_paths)
+    output_options = dict(output_options or {})
+    if output_options.get('mode') == 'offline':
+        # 所有表共用一份资源；先在主进程中准备好，各工作进程不会同时下载
+        output_options['assets_dir'] = os.path.abspath(
+            output_options.get('assets_dir') or os.path.join(output_dir, chart_output.ASSETS_DIRNAME))
+        chart_output.ensure_assets(output_options['assets_dir'], list(chart_output.DEFAULT_ASSETS),
+                                   compress=output_options.get('gzip', False))
+    batch_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        loads = list(pool.map(load_task, roster_paths, [use_cache] * len(roster_paths),
+                              [filters] * len(roster_paths)))
+        for record in loads:
+            record['output_dir'] = out_dirs[record['roster']]
+        loaded = [r['roster'] for r in loads if r['status'] == 'ok']
+
+        futures = []
+        for roster_path in loaded:
+            out_dir = out_dirs[roster_path]
+            os.makedirs(out_dir, exist_ok=True)
+            for key in chart_keys:
+                output_file = os.path.join(out_dir, charts.CHARTS[key][1])
+                futures.append(pool.submit(render_task, roster_path, key, output_file, font_path, use_cache,
+                                           output_options, filters))
+        outputs = [f.result() for f in as_completed(futures)]
+
+    outputs.sort(key=lambda r: (r['roster'], chart_keys.index(r['chart'])))
+    manifest = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'output_dir': os.path.abspath(output_dir),
+        'total_seconds': round(time.perf_counter() - batch_start, 4),
+        'filters': filters or {},
+        'loads': loads,
+        'outputs': outputs,
+    }
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量生成学生信息图表")
+    parser.add_argument('rosters', nargs='+', help="学生信息表 (.xlsx / .csv / .parquet)")
+    parser.add_argument('-o', '--output-dir', required=True, help="输出目录")
+    parser.add_argument('--charts', default=",".join(charts.CHARTS),
+                        help=f"要生成的图表，逗号分隔 (默认全部: {','.join(charts.CHARTS)})")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="进程数 (默认等于 CPU 核数)")
+    parser.add_argument('--font-path', default=charts.DEFAULT_FONT_PATH, help="词云使用的中文字体文件")
+    parser.add_argument('--no-cache', action='store_true', help="不读写已清洗数据和已生成图表的缓存")
+    parser.add_argument('--offline', action='store_true',
+                        help="离线紧凑输出：ECharts 脚本保存在本地共用目录，选项 JSON 不缩进")
+    parser.add_argument('--assets-dir', default=None,
+                        help=f"--offline 时的资源目录 (默认 输出目录/{chart_output.ASSETS_DIRNAME})")
+    parser.add_argument('--gzip', action='store_true', help="另外写出预压缩的 .gz 文件，供 HTTP 服务直接发送")
+    parser.add_argument('--filter', action='append', default=[], metavar='列=取值1,取值2',
+                        help="只统计满足条件的学生，可重复指定 (可筛选: 性别、生源省份、生源城市、寝室号、楼栋、班级)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    chart_keys = [key.strip() for key in args.charts.split(',') if key.strip()]
+    output_options = {'mode': 'offline' if args.offline else 'cdn', 'assets_dir': args.assets_dir, 'gzip': args.gzip}
+    try:
+        filters = parse_filters(args.filter)
+        manifest = run_batch(args.rosters, args.output_dir, chart_keys, args.workers,
+                             args.font_path, use_cache=not args.no_cache, output_options=output_options,
+                             filters=filters)
+    except (ValueError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    json.dump(manifest, sys.stdout, ensure_ascii=False, indent=2)
+    print()
+    failed = [r for r in manifest['loads'] + manifest['outputs'] if r['status'] == 'error']
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
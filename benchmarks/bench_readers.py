@@ -0,0 +1,142 @@
+"""比较各读取后端加载同一份学生信息表的耗时 (见 roster_readers.py)。
+
+同一份模拟数据 (与 run_benchmarks.py 共用缓存的 .xlsx) 另存为 CSV (UTF-8 / GB18030)、Parquet
+和 Feather，然后对每种文件、每个已安装的解析器分别测量：
+
+    read    读成原始表
+    clean   clean_student_data + compact_student_data
+    total   两者之和
+
+并检查清洗后的表与从 Excel 加载的完全相同 (列、类型和取值)，不同时在 same 列标出。
+
+用法示例：
+
+    python benchmarks/bench_readers.py --sizes 5000,50000
+    python benchmarks/bench_readers.py --sizes 200000 --repeat 1 -o readers.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from roster_readers import engines_for, read_roster
+from run_benchmarks import DATA_DIR, _timed, roster_file
+from student_loader import clean_student_data, compact_student_data
+
+DEFAULT_SIZES = [5000, 50000]
+# (文件格式标签, 扩展名, 读取后端, 写出函数)
+FORMATS = [
+    ('xlsx', '.xlsx', 'excel', None),
+    ('csv', '.csv', 'csv', lambda df, path: df.to_csv(path, index=False, encoding='utf-8-sig')),
+    ('csv-gb18030', '.gb18030.csv', 'csv', lambda df, path: df.to_csv(path, index=False, encoding='gb18030')),
+    ('parquet', '.parquet', 'parquet', lambda df, path: _arrow_safe(df).to_parquet(path, index=False)),
+    ('feather', '.feather', 'arrow', lambda df, path: _arrow_safe(df).to_feather(path)),
+]
+
+
+def _arrow_safe(df):
+    # 名次列中混有数字和 "缺考" 等文本，Arrow 要求一列一种类型：非空值统一转为文本
+    # (上游系统导出 Parquet 时也是如此)，清洗时再转回数字
+    df = df.copy()
+    for col in df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].map(lambda v: v if pd.isna(v) else str(v))
+    return df
+
+
+def roster_files(rows, seed=0):
+    # {格式标签: (文件路径, 读取后端)}；按需从 .xlsx 转换并缓存在 DATA_DIR
+    xlsx = roster_file(rows, seed)
+    stem = os.path.splitext(xlsx)[0]
+    paths, raw = {}, None
+    for label, suffix, backend, write in FORMATS:
+        path = xlsx if write is None else stem + suffix
+        if not os.path.exists(path):
+            raw = pd.read_excel(xlsx) if raw is None else raw
+            tmp_path = f"{stem}.{os.getpid()}{suffix}"
+            write(raw, tmp_path)
+            os.replace(tmp_path, path)
+        paths[label] = (path, backend)
+    return paths
+
+
+def _same(a, b):
+    try:
+        pd.testing.assert_frame_equal(a, b)
+    except AssertionError:
+        return False
+    return True
+
+
+def bench_size(rows, repeat=3, seed=0):
+    records = []
+    reference = None
+    for label, (path, backend) in roster_files(rows, seed).items():
+        for engine in engines_for(backend):
+            raw, read_seconds = _timed(lambda: read_roster(path, backend, engine), repeat)
+            df, clean_seconds = _timed(
+                lambda: compact_student_data(clean_student_data(raw.copy(), warn=lambda msg: None)), repeat)
+            if reference is None:
+                reference = df
+            record = dict(size=rows, format=label, engine=engine, bytes=os.path.getsize(path),
+                          read=round(read_seconds, 6), clean=round(clean_seconds, 6),
+                          total=round(read_seconds + clean_seconds, 6), same=_same(reference, df))
+            records.append(record)
+            print(f"  {rows:>7} {label:<12} {engine:<9} {read_seconds * 1000:10.1f} ms", file=sys.stderr)
+    return records
+
+
+def format_table(records):
+    lines = [f"{'规模':>7}  {'格式':<12} {'解析器':<9} {'大小(KB)':>9} {'读取(ms)':>9} {'清洗(ms)':>9} "
+             f"{'合计(ms)':>9} {'加速':>6}  一致"]
+    for size in dict.fromkeys(r['size'] for r in records):
+        group = [r for r in records if r['size'] == size]
+        slowest = max(r['total'] for r in group)
+        for r in group:
+            lines.append(f"{r['size']:>7}  {r['format']:<12} {r['engine']:<9} {r['bytes'] / 1024:9.0f} "
+                         f"{r['read'] * 1000:9.1f} {r['clean'] * 1000:9.1f} {r['total'] * 1000:9.1f} "
+                         f"{slowest / r['total'] if r['total'] else np.inf:5.1f}x  {'是' if r['same'] else '否'}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="比较各读取后端 (Excel / CSV / Parquet / Feather) 的加载耗时")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help=f"数据规模 (行数)，逗号分隔 (默认 {','.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--repeat', type=int, default=3, help="每项重复次数，取最短耗时")
+    parser.add_argument('--seed', type=int, default=0, help="模拟数据的随机种子")
+    parser.add_argument('-o', '--output', help="把完整结果写入 JSON 文件")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    records = []
+    for rows in sizes:
+        records.extend(bench_size(rows, args.repeat, args.seed))
+    print(format_table(records))
+    print(f"\n模拟数据保存在 {DATA_DIR}")
+    if args.output:
+        result = {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'machine': platform.node(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'records': records,
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    different = [r for r in records if not r['same']]
+    return 1 if different else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+"""分阶段的性能基准：为每种规模的模拟数据记录每个图表各阶段的耗时。
+
+阶段：
+    load       读取 Excel (roster_readers.read_roster，不含清洗；各读取后端的对比见 bench_readers.py)
+    clean      clean_student_data + compact_student_data：名次转数字、地名规范化、压缩列类型
+    index      构建筛选索引 (filter_index.FilterIndex)
+    filter     按人数最多的性别和楼栋筛选，并得到筛选结果的汇总
+    aggregate  图表所需的统计 (计数、成绩表、寝室分组、分词等)
+    build      构建图表对象并生成完整的 ECharts 选项 (词云为排布)
+    render     写出 HTML / PNG 文件
+
+load / clean / index / filter 对所有图表只执行一次，记在图表 "*" 下。模拟数据由 synthetic_roster.py
+生成，并按 (行数, seed) 缓存在 ~/.cache/student_info_analysis/benchmark_rosters/，
+大表只需生成一次。
+
+用法示例：
+
+    python benchmarks/run_benchmarks.py --sizes 50,500,5000 --save-baseline
+    python benchmarks/run_benchmarks.py --sizes 50,500,5000          # 与基线对比，变慢时返回 1
+    python benchmarks/run_benchmarks.py --charts grades,dorm --sizes 50000,500000 -o result.json
+
+基线与机器相关，请在同一台机器上保存和对比。
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import charts
+from filter_index import BUILDING_COL, FilterIndex
+from motto_tokens import MottoTokenizer
+from roster_cache import DEFAULT_CACHE_DIR
+from roster_readers import read_roster
+from student_loader import clean_student_data, compact_student_data
+from synthetic_roster import generate_roster, write_roster
+from wordcloud_renderer import WordCloudRenderer
+
+DEFAULT_SIZES = [50, 500, 5000, 50000, 500000]
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DATA_DIR = os.path.join(DEFAULT_CACHE_DIR, 'benchmark_rosters')
+# 超过该行数时每个阶段只计时一次 (大表重复多次耗时过长)
+REPEAT_MAX_ROWS = 50000
+# 比基线慢 tolerance 倍以上且绝对差值超过 min_delta 秒才算退化，避免小数据上的计时抖动
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_MIN_DELTA = 0.05
+
+
+# --- 各图表的 aggregate / build / render 阶段 ---
+
+def _aggregate_grades(df):
+    df_grades = charts.grade_table(df)
+    mode = 'detail' if len(df_grades) <= charts.GRADE_DETAIL_MAX_STUDENTS else 'summary'
+    return df_grades, mode
+
+
+def _build_grades(data):
+    df_grades, mode = data
+    if mode == 'summary':
+        return charts.build_grade_summary_line(df_grades)
+    return charts.build_grade_line(df_grades)
+
+
+def _aggregate_movers(df):
+    movement = charts.grade_movement(df)
+    return movement.risers(charts.MOVERS_TOP_N), movement.fallers(charts.MOVERS_TOP_N)
+
+
+def _build_wordcloud(frequencies, font_path):
+    # 新建渲染器 (计入加载字体)，生成完整分辨率的图片
+    return WordCloudRenderer(font_path).render_image(frequencies)
+
+
+# 图表 -> (aggregate(df), build(统计结果))；与 charts.render_* 在没有 StudentSummary 时的路径相同
+CHART_STAGES = {
+    'gender': (lambda df: charts._value_counts(df, '性别', None), charts.build_gender_pie),
+    'province': (lambda df: charts.province_counts_for_map(charts._value_counts(df, '生源省份', None)),
+                 charts.build_province_map),
+    'city': (lambda df: charts.top_k_counts(charts._value_counts(df, '生源城市', None), charts.CITY_TOP_K),
+             charts.build_city_bar),
+    'grades': (_aggregate_grades, _build_grades),
+    'dorm': (charts.dorm_graph_data, lambda data: charts.build_dorm_graph(*data)),
+    # 每次使用新的分词器，计入完整的分词耗时 (不命中格言缓存)
+    'wordcloud': (lambda df: charts.motto_frequencies(df, MottoTokenizer()), None),
+    'movers': (_aggregate_movers, lambda data: charts.build_movers_bar(*data)),
+    'rank_corr': (lambda df: charts.grade_movement(df).correlation(), charts.build_rank_correlation_heatmap),
+}
+
+
+def _build_options(build, data):
+    chart = build(data)
+    chart.dump_options() # 生成完整的 ECharts 选项 JSON
+    return chart
+
+
+def _timed(func, repeat):
+    # 返回 (最后一次的结果, 最短耗时)
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def roster_file(rows, seed=0):
+    path = os.path.join(DATA_DIR, f"synthetic_{rows}_seed{seed}.xlsx")
+    if not os.path.exists(path):
+        print(f"生成 {rows} 行模拟数据 -> {path}", file=sys.stderr)
+        tmp_path = f"{path}.{os.getpid()}.xlsx"
+        write_roster(generate_roster(rows, seed=seed), tmp_path)
+        os.replace(tmp_path, path)
+    return path
+
+
+def bench_size(rows, chart_keys, font_path, out_dir, repeat=3, seed=0):
+    # 返回该规模下的记录列表 [{'size', 'chart', 'stage', 'seconds'}, ...]
+    repeat = repeat if rows <= REPEAT_MAX_ROWS else 1
+    path = roster_file(rows, seed)
+    records = []
+
+    def record(chart, stage, seconds, **extra):
+        records.append(dict(size=rows, chart=chart, stage=stage, seconds=round(seconds, 6), **extra))
+        print(f"  {rows:>7} {chart:<10} {stage:<10} {seconds * 1000:10.1f} ms", file=sys.stderr)
+
+    raw, seconds = _timed(lambda: read_roster(path), repeat)
+    record('*', 'load', seconds)
+    df, seconds = _timed(lambda: compact_student_data(clean_student_data(raw.copy(), warn=lambda msg: None)), repeat)
+    record('*', 'clean', seconds)
+    index, seconds = _timed(lambda: FilterIndex(df), repeat)
+    record('*', 'index', seconds)
+    filters = {col: [index.options(col)[0][0]] for col in ('性别', BUILDING_COL) if col in index.columns}
+    view, seconds = _timed(lambda: index.subset(filters), repeat)
+    record('*', 'filter', seconds, selected=len(view.df))
+
+    for key in chart_keys:
+        aggregate, build = CHART_STAGES[key]
+        output_file = os.path.join(out_dir, f"{rows}_{charts.CHARTS[key][1]}")
+        try:
+            data, seconds = _timed(lambda: aggregate(df), repeat)
+            record(key, 'aggregate', seconds)
+            if key == 'wordcloud':
+                if not os.path.exists(font_path):
+                    record(key, 'build', 0.0, skipped=f"字体不存在: {font_path}")
+                    continue
+                cloud, seconds = _timed(lambda: _build_wordcloud(data, font_path), repeat)
+                record(key, 'build', seconds)
+                renderer = WordCloudRenderer(font_path)
+                _, seconds = _timed(lambda: renderer.preview(data), repeat)
+                record(key, 'preview', seconds, size="x".join(map(str, renderer.preview_size())))
+                _, seconds = _timed(lambda: cloud.save(output_file), repeat)
+            else:
+                chart, seconds = _timed(lambda: _build_options(build, data), repeat)
+                record(key, 'build', seconds)
+                _, seconds = _timed(lambda: chart.render(output_file), repeat)
+            record(key, 'render', seconds)
+        except charts.ChartError as e:
+            record(key, 'aggregate', 0.0, skipped=e.message)
+    return records
+
+
+def run_benchmarks(sizes, chart_keys, font_path, repeat=3, seed=0):
+    with tempfile.TemporaryDirectory(prefix="student_bench_") as out_dir:
+        records = []
+        for rows in sizes:
+            records.extend(bench_size(rows, chart_keys, font_path, out_dir, repeat, seed))
+    return {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': platform.node(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'records': records,
+    }
+
+
+def _record_key(r):
+    return f"{r['size']}:{r['chart']}:{r['stage']}"
+
+
+def compare_to_baseline(result, baseline, tolerance=DEFAULT_TOLERANCE, min_delta=DEFAULT_MIN_DELTA):
+    # 为每条记录补充 baseline / ratio / regressed；返回退化的记录列表
+    base = {_record_key(r): r['seconds'] for r in baseline.get('records', []) if 'skipped' not in r}
+    regressions = []
+    for r in result['records']:
+        old = base.get(_record_key(r))
+        if old is None or 'skipped' in r:
+            continue
+        r['baseline'] = old
+        r['ratio'] = round(r['seconds'] / old, 3) if old > 0 else None
+        r['regressed'] = r['seconds'] > old * (1 + tolerance) and r['seconds'] - old > min_delta
+        if r['regressed']:
+            regressions.append(r)
+    return regressions
+
+
+def format_table(records):
+    lines = [f"{'规模':>7}  {'图表':<10} {'阶段':<10} {'耗时(ms)':>10} {'基线(ms)':>10} {'变化':>8}"]
+    for r in records:
+        if 'skipped' in r:
+            lines.append(f"{r['size']:>7}  {r['chart']:<10} {r['stage']:<10} {'跳过':>10}  {r['skipped']}")
+            continue
+        base = f"{r['baseline'] * 1000:10.1f}" if 'baseline' in r else f"{'-':>10}"
+        change = f"{(r['ratio'] - 1):+8.0%}" if r.get('ratio') is not None else f"{'':>8}"
+        flag = "  << 退化" if r.get('regressed') else ""
+        lines.append(f"{r['size']:>7}  {r['chart']:<10} {r['stage']:<10} {r['seconds'] * 1000:10.1f} {base} {change}{flag}")
+    return "\n".join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="按阶段测量各图表的耗时，并与基线对比")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help=f"数据规模 (行数)，逗号分隔 (默认 {','.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--charts', default=",".join(charts.CHARTS), help="要测试的图表，逗号分隔 (默认全部)")
+    parser.add_argument('--repeat', type=int, default=3, help=f"每个阶段重复次数，取最短耗时 (超过 {REPEAT_MAX_ROWS} 行时为 1)")
+    parser.add_argument('--seed', type=int, default=0, help="模拟数据的随机种子")
+    parser.add_argument('--font-path', default=charts.DEFAULT_FONT_PATH, help="词云使用的字体文件")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线文件 (默认 benchmarks/baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为新的基线")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="允许的相对变慢比例 (默认 0.25)")
+    parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA, help="忽略小于该秒数的差值 (默认 0.05)")
+    parser.add_argument('-o', '--output', help="把完整结果写入 JSON 文件")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    chart_keys = [key.strip() for key in args.charts.split(',') if key.strip()]
+    unknown = [key for key in chart_keys if key not in CHART_STAGES]
+    if unknown:
+        print(f"错误: 未知的图表: {', '.join(unknown)}；可选: {', '.join(CHART_STAGES)}", file=sys.stderr)
+        return 2
+
+    result = run_benchmarks(sizes, chart_keys, args.font_path, args.repeat, args.seed)
+    regressions = []
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_to_baseline(result, json.load(f), args.tolerance, args.min_delta)
+    print(format_table(result['records']))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n已保存基线: {args.baseline}")
+    elif regressions:
+        print(f"\n有 {len(regressions)} 项比基线慢 {args.tolerance:.0%} 以上:")
+        for r in regressions:
+            print(f"  {_record_key(r)}: {r['baseline'] * 1000:.1f} ms -> {r['seconds'] * 1000:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,185 @@
+"""生成与真实学生信息表结构相同的模拟数据，供基准测试使用。
+
+列与 student_loader 的清洗规则一致 (学号、姓名、性别、生源省份、生源城市、寝室号、
+人生格言和各学期名次)，并可调节：行数、省份/城市分布的偏斜程度、寝室人数、格言
+长度、名次缺失率。地名按不同写法混合 (简称 / 全称 / "省+市")，名次中混入少量
+"缺考" 之类的非数字值，让清洗和地名匹配的开销与真实数据相近。
+
+用法示例：
+
+    python benchmarks/synthetic_roster.py 50000 -o rosters/synthetic_50000.xlsx
+    python benchmarks/synthetic_roster.py 500000 -o big.csv --province-skew 1.5 --rank-missing 0.2
+"""
+import argparse
+import os
+import sys
+
+# 允许在 benchmarks/ 目录或项目根目录下直接运行
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import regions
+from student_loader import RANK_COLS
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈"
+GIVEN_CHARS = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红兰飞鹏宇浩然子涵欣怡梓轩一诺思远嘉"
+MOTTO_WORDS = [
+    "天道酬勤", "自强不息", "知识", "就是", "力量", "学而不思则罔", "坚持", "梦想", "努力", "奋斗",
+    "未来", "青春", "时间", "珍惜", "成功", "失败", "勇气", "希望", "生活", "热爱", "学习", "进步",
+    "脚踏实地", "仰望星空", "永不放弃", "相信自己", "厚德载物", "海纳百川", "不忘初心", "砥砺前行",
+]
+MOTTO_PUNCTUATION = ["，", "。", "！", "；", " "]
+INVALID_RANKS = ["缺考", "休学", "-", "N/A"]
+
+
+def zipf_weights(n, skew):
+    # skew = 0 时均匀分布；越大越集中在前几个取值上
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def _student_names(rng, rows):
+    surnames = np.array(list(SURNAMES))
+    given = np.array(list(GIVEN_CHARS))
+    names = pd.Series(surnames[rng.integers(len(surnames), size=rows)])
+    names += pd.Series(given[rng.integers(len(given), size=rows)])
+    two_chars = rng.random(rows) < 0.6
+    names[two_chars] += pd.Series(given[rng.integers(len(given), size=rows)])[two_chars]
+    # 加上序号保证姓名唯一 (关系图以姓名作为节点 ID)
+    return names + pd.Series(np.arange(rows)).astype(str)
+
+
+def _regions(rng, rows, province_skew, city_skew, full_name_rate):
+    provinces = regions.PROVINCE_NAMES
+    province_full = {short: full for _, short, full in regions.PROVINCES}
+    cities_by_province = {p: [c for c in regions.CITY_NAMES if regions.CITY_PROVINCE[c] == p] for p in provinces}
+
+    # 打乱省份顺序后按 Zipf 分布抽样，避免总是北京最多
+    order = rng.permutation(len(provinces))
+    province_idx = order[rng.choice(len(provinces), size=rows, p=zipf_weights(len(provinces), province_skew))]
+    province = np.array(provinces)[province_idx]
+    city = np.empty(rows, dtype=object)
+    for p in np.unique(province):
+        mask = province == p
+        candidates = cities_by_province[p]
+        picks = rng.choice(len(candidates), size=int(mask.sum()), p=zipf_weights(len(candidates), city_skew))
+        city[mask] = np.array(candidates)[picks]
+
+    # 混合几种常见写法：简称 "山东"、全称 "山东省"、城市中带省名 "山东省青岛市"
+    province_out = province.astype(object)
+    style = rng.random(rows)
+    full = style < full_name_rate
+    province_out[full] = [province_full[p] for p in province[full]]
+    city_out = city.copy()
+    prefixed = style > 1 - full_name_rate / 2
+    city_out[prefixed] = [province_full[p] + c for p, c in zip(province[prefixed], city[prefixed])]
+    return province_out, city_out
+
+
+def _dorms(rng, rows, dorm_size):
+    # 按顺序把学生分入寝室，每间人数在 [min, max] 之间均匀抽取
+    lo, hi = dorm_size
+    sizes = rng.integers(lo, hi + 1, size=rows // max(lo, 1) + 1)
+    dorm_ids = np.repeat(np.arange(len(sizes)), sizes)[:rows]
+    building = dorm_ids // 300 + 1
+    room = dorm_ids % 300
+    return [f"{b}-{100 * (r // 30 + 1) + r % 30 + 1}" for b, r in zip(building, room)]
+
+
+def _mottos(rng, rows, motto_length, empty_rate):
+    # 每条格言由随机词语和标点拼接，直到达到抽取的字数；先整体抽取词语矩阵，再逐行截取
+    lo, hi = motto_length
+    words = np.array(MOTTO_WORDS + MOTTO_PUNCTUATION, dtype=object)
+    word_lengths = np.array([len(w) for w in words])
+    n_words = len(MOTTO_WORDS)
+    max_tokens = 2 * (hi // int(word_lengths[:n_words].min()) + 1)
+    picks = rng.integers(n_words, size=(rows, max_tokens))
+    picks[:, 1::2] = n_words + rng.integers(len(MOTTO_PUNCTUATION), size=(rows, max_tokens // 2))
+    used = np.cumsum(word_lengths[picks], axis=1) < rng.integers(lo, hi + 1, size=rows)[:, None]
+    counts = used.sum(axis=1) + 1  # 加上使长度达到要求的那一个词
+    tokens = words[picks]
+    mottos = np.array(["".join(row[:n]) for row, n in zip(tokens, counts)], dtype=object)
+    mottos[rng.random(rows) < empty_rate] = None
+    return mottos
+
+
+def _ranks(rng, rows, rank_missing, invalid_rate):
+    # 每个学生有一个固定的 "水平"，各学期在此基础上波动，名次 = 该学期成绩的排名
+    ability = rng.normal(size=rows)
+    columns = {}
+    for col in RANK_COLS:
+        score = ability + rng.normal(scale=0.5, size=rows)
+        ranks = np.empty(rows, dtype=object)
+        ranks[np.argsort(-score, kind='stable')] = np.arange(1, rows + 1)
+        ranks[rng.random(rows) < rank_missing] = None
+        invalid = rng.random(rows) < invalid_rate
+        ranks[invalid] = np.array(INVALID_RANKS)[rng.integers(len(INVALID_RANKS), size=int(invalid.sum()))]
+        columns[col] = ranks
+    return columns
+
+
+def generate_roster(rows, seed=0, province_skew=1.0, city_skew=1.0, full_name_rate=0.3,
+                    dorm_size=(4, 6), motto_length=(4, 20), motto_empty_rate=0.1,
+                    rank_missing=0.05, invalid_rank_rate=0.01):
+    # 返回未清洗的 DataFrame (与直接读取 Excel 得到的表相同)；相同参数和 seed 结果相同
+    rng = np.random.default_rng(seed)
+    province, city = _regions(rng, rows, province_skew, city_skew, full_name_rate)
+    df = pd.DataFrame({
+        '学号': np.arange(2020000001, 2020000001 + rows),
+        '姓名': _student_names(rng, rows),
+        '性别': np.where(rng.random(rows) < 0.55, '男', '女'),
+        '生源省份': province,
+        '生源城市': city,
+        '寝室号': _dorms(rng, rows, dorm_size),
+        '人生格言': _mottos(rng, rows, motto_length, motto_empty_rate),
+    })
+    for col, values in _ranks(rng, rows, rank_missing, invalid_rank_rate).items():
+        df[col] = values
+    return df
+
+
+def write_roster(df, path):
+    # 按扩展名写入 .xlsx 或 .csv
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.lower().endswith('.csv'):
+        df.to_csv(path, index=False, encoding='utf-8-sig')
+    else:
+        df.to_excel(path, index=False)
+    return path
+
+
+def _range(text):
+    lo, _, hi = text.partition('-')
+    return int(lo), int(hi or lo)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="生成模拟学生信息表")
+    parser.add_argument('rows', type=int, help="学生人数 (行数)")
+    parser.add_argument('-o', '--output', required=True, help="输出文件 (.xlsx 或 .csv)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--province-skew', type=float, default=1.0, help="省份分布的 Zipf 指数，0 为均匀 (默认 1.0)")
+    parser.add_argument('--city-skew', type=float, default=1.0, help="省内城市分布的 Zipf 指数 (默认 1.0)")
+    parser.add_argument('--full-name-rate', type=float, default=0.3, help="地名写成全称的比例 (默认 0.3)")
+    parser.add_argument('--dorm-size', type=_range, default=(4, 6), help="每间寝室人数范围，如 4-6")
+    parser.add_argument('--motto-length', type=_range, default=(4, 20), help="格言长度 (字数) 范围，如 4-20")
+    parser.add_argument('--motto-empty', type=float, default=0.1, help="格言为空的比例 (默认 0.1)")
+    parser.add_argument('--rank-missing', type=float, default=0.05, help="名次缺失率 (默认 0.05)")
+    parser.add_argument('--invalid-rank', type=float, default=0.01, help="名次为 '缺考' 等非数字值的比例 (默认 0.01)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    df = generate_roster(
+        args.rows, seed=args.seed, province_skew=args.province_skew, city_skew=args.city_skew,
+        full_name_rate=args.full_name_rate, dorm_size=args.dorm_size, motto_length=args.motto_length,
+        motto_empty_rate=args.motto_empty, rank_missing=args.rank_missing, invalid_rank_rate=args.invalid_rank,
+    )
+    print(f"已生成 {len(df)} 行: {write_roster(df, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
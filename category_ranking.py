@@ -0,0 +1,298 @@
+"""高基数类别 (城市、寝室等) 的排名：Top-K + "其他"，以及流式加载时的近似计数。
+
+合并全校的表后，生源城市有几千个不同取值，全部放在柱状图的 X 轴上既统计慢、也无法阅读。
+
+  * top_k_counts()：只保留人数最多的 k 个取值，其余合并为 "其他"。用 np.partition 选出
+    第 k 大的人数 (平均 O(n))，只对入选的 k 个排序，不对全部取值排序；并列时保持原顺序，
+    同一份数据的结果总是相同。
+  * CategorySketch：流式加载时逐块更新的固定大小摘要，不保留任何一列的全部取值：
+      - SpaceSaving (heavy hitters)：最多记录 capacity 个取值的人数，人数最多的取值一定在其中；
+        每个人数是上界，与真实人数之差不超过记录的 error，也不超过 已读人数 / capacity；
+      - HyperLogLog (不同取值的个数)：2^precision 个寄存器 (默认 4096 字节)，相对误差约
+        1.04 / sqrt(2^precision) (约 1.6%)，不同取值较少时按线性计数，几乎精确。
+    两者都可以合并 (merge)，因此可以按文件分别统计后汇总。CategorySketch 提供与 StudentSummary
+    相同的 counts() / total() / distinct()，可以直接作为 summary 传给 charts.render_city。
+
+只统计、不保留数据时 (student_loader.scan_student_data) 可以把 StudentSummary(sketch_cols=SKETCH_COLS)
+作为 on_chunk：省份和城市的人数由 CategorySketch 逐块统计，其余列仍是精确的。整张表已在内存中时
+(包括流式加载) 近似计数几乎不省内存，界面使用精确计数。只需要排名时也可以直接使用 CategorySketch，
+例如在命令行中统计多个大表的城市排名：
+
+    python category_ranking.py 全校/*.csv --col 生源城市 -k 20
+    python category_ranking.py 全校/*.parquet --col 生源省份 --capacity 64 --chart province_rank.html
+"""
+import argparse
+import math
+import sys
+
+from startup_profile import lazy_module
+from student_loader import STREAM_CHUNK_ROWS, scan_student_data
+
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+OTHER_LABEL = "其他"           # Top-K 之外的取值合并后的名称
+SKETCH_COLS = ['生源省份', '生源城市']
+HEAVY_HITTER_CAPACITY = 256    # SpaceSaving 记录的取值数
+HLL_PRECISION = 12             # HyperLogLog 寄存器数为 2^precision
+
+
+# --- Top-K ---
+
+def top_k_indices(values, k):
+    # 最大的 k 个值的位置 (按值降序，并列时按原顺序)；k 为 None 或不小于长度时返回全部
+    values = np.asarray(values)
+    if k is None or k >= len(values):
+        return np.argsort(-values, kind='stable')
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    kth = np.partition(values, len(values) - k)[len(values) - k] # 第 k 大的值
+    above = np.flatnonzero(values > kth)
+    ties = np.flatnonzero(values == kth)[:k - len(above)]
+    chosen = np.sort(np.concatenate([above, ties]))
+    return chosen[np.argsort(-values[chosen], kind='stable')]
+
+
+def top_k_counts(counts, k, other_label=OTHER_LABEL, total=None):
+    # counts: 取值 -> 人数 (Series)；返回人数最多的 k 个取值 (降序)，其余人数之和记为 other_label (放在最后)
+    # total 为全部人数 (counts 只是部分取值时，例如 CategorySketch)；other_label 为 None 时不加 "其他"
+    if k is None and total is None:
+        return counts
+    candidates = counts
+    if other_label is not None and other_label in counts.index:
+        # 原数据中已有名为 "其他" 的取值：不占 k 个名次，人数并入最后的 "其他"
+        candidates = counts[counts.index != other_label]
+    top = candidates.iloc[top_k_indices(candidates.to_numpy(), k)]
+    rest = (int(counts.sum()) if total is None else int(total)) - int(top.sum())
+    if other_label is None or rest <= 0:
+        return top
+    top = top.copy()
+    top.index = top.index.astype(object)
+    return pd.concat([top, pd.Series({other_label: rest}, dtype=top.dtype)])
+
+
+def top_k_columns(table, k, other_label=OTHER_LABEL):
+    # 按列合计取前 k 列 (行 = 班级，列 = 取值)，其余列合并为 other_label 一列 (放在最后)
+    if k is None or table.shape[1] <= k:
+        return table
+    candidates = table
+    if other_label is not None and other_label in table.columns:
+        candidates = table.drop(columns=other_label)
+    top = candidates.iloc[:, top_k_indices(candidates.sum().to_numpy(), k)]
+    if other_label is not None:
+        top = top.copy()
+        top.columns = top.columns.astype(object)
+        top[other_label] = table.sum(axis=1) - top.sum(axis=1)
+    return top
+
+
+# --- 近似计数 ---
+
+class SpaceSaving:
+    # 按块合并的 SpaceSaving：每块先精确计数，再并入摘要；超过 capacity 个取值时只保留人数最多的
+    def __init__(self, capacity=HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}  # 取值 -> 人数上界
+        self.errors = {}  # 取值 -> 可能多计的人数
+        self.floor = 0    # 未记录的取值的人数都不超过该值
+        self.total = 0
+
+    def update_counts(self, counts):
+        # counts: 取值 -> 人数 (一个数据块的精确计数)
+        floor = self.floor
+        for value, n in counts.items():
+            if value in self.counts:
+                self.counts[value] += n
+            else:
+                # 新取值之前可能已出现过 (被淘汰)，最多 floor 次
+                self.counts[value] = floor + n
+                self.errors[value] = floor
+            self.total += n
+        if len(self.counts) > self.capacity:
+            self._prune()
+
+    def _prune(self):
+        values = list(self.counts)
+        estimates = np.fromiter(self.counts.values(), dtype=np.int64, count=len(values))
+        keep = np.zeros(len(values), dtype=bool)
+        keep[top_k_indices(estimates, self.capacity)] = True
+        self.floor = max(self.floor, int(estimates[~keep].max()))
+        for i in np.flatnonzero(~keep).tolist():
+            del self.counts[values[i]]
+            del self.errors[values[i]]
+
+    def remove_counts(self, counts):
+        # 扣除之前计入的人数 (文件修改后增量更新)：记录下来的取值直接扣除，上界和误差仍然成立；
+        # 未记录的取值真实人数只会减少，floor 仍是上界
+        for value, n in counts.items():
+            if value in self.counts:
+                self.counts[value] -= n
+                if self.counts[value] <= 0:
+                    del self.counts[value]
+                    del self.errors[value]
+                else:
+                    self.errors[value] = min(self.errors[value], self.counts[value])
+            self.total -= n
+
+    def merge(self, other):
+        # 把另一个摘要 (例如另一个文件的) 并入；两边都未记录的取值的上界为两者 floor 之和
+        only_here = [value for value in self.counts if value not in other.counts]
+        for value in only_here:
+            self.counts[value] += other.floor
+            self.errors[value] += other.floor
+        for value, n in other.counts.items():
+            if value in self.counts:
+                self.counts[value] += n
+                self.errors[value] += other.errors[value]
+            else:
+                self.counts[value] = self.floor + n
+                self.errors[value] = self.floor + other.errors[value]
+        self.floor += other.floor
+        self.total += other.total
+        if len(self.counts) > self.capacity:
+            self._prune()
+
+    def top(self, k=None):
+        # DataFrame (index = 取值)：人数 (上界)、误差、最少人数，按人数降序
+        table = pd.DataFrame({'人数': pd.Series(self.counts, dtype='int64'),
+                              '误差': pd.Series(self.errors, dtype='int64')})
+        table = table.iloc[top_k_indices(table['人数'].to_numpy(), k)]
+        table['最少人数'] = table['人数'] - table['误差']
+        return table
+
+
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values):
+        # values: Series (空值忽略)；按取值哈希，category 与文本列的同一取值哈希相同
+        values = values.dropna()
+        if len(values):
+            self.update_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    def update_hashes(self, hashes):
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        # rest 的二进制位数 (逐级折半，避免转为浮点数后的舍入)
+        bits = np.zeros(len(rest), dtype=np.int64)
+        for shift in (32, 16, 8, 4, 2, 1):
+            high = rest >= np.uint64(1 << shift)
+            bits[high] += shift
+            rest[high] >>= np.uint64(shift)
+        bits += rest > 0
+        rank = (64 - p) - bits + 1 # 第一个 1 出现的位置
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.ldexp(1.0, -self.registers.astype(np.int64)).sum())
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros) # 线性计数
+        return raw
+
+
+class CategorySketch:
+    # 流式加载的 on_chunk：为 cols 中的每一列维护 SpaceSaving 和 HyperLogLog，内存与行数无关
+    # (StudentSummary(sketch_cols=...) 用它代替这些列的精确计数)
+    def __init__(self, cols=SKETCH_COLS, capacity=HEAVY_HITTER_CAPACITY, precision=HLL_PRECISION):
+        self.rows = 0
+        self._heavy = {col: SpaceSaving(capacity) for col in cols}
+        self._distinct = {col: HyperLogLog(precision) for col in cols}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col, heavy in self._heavy.items():
+            if col in chunk.columns:
+                heavy.update_counts(_chunk_counts(chunk[col]))
+                self._distinct[col].update(chunk[col])
+
+    def remove(self, chunk):
+        # update() 的逆操作；HyperLogLog 无法扣除，distinct() 之后可能偏大 (仍包含已删除的取值)
+        self.rows -= len(chunk)
+        for col, heavy in self._heavy.items():
+            if col in chunk.columns:
+                heavy.remove_counts(_chunk_counts(chunk[col]))
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, heavy in self._heavy.items():
+            if col in other._heavy:
+                heavy.merge(other._heavy[col])
+                self._distinct[col].merge(other._distinct[col])
+
+    def counts(self, col):
+        # 与 StudentSummary.counts() 形式相同，但只包含记录下来的取值，人数为上界
+        heavy = self._heavy.get(col)
+        if heavy is None or not heavy.counts:
+            return pd.Series(dtype='int64')
+        return heavy.top()['人数']
+
+    def top(self, col, k=None):
+        return self._heavy[col].top(k)
+
+    def total(self, col):
+        # 该列非空的人数 (精确)
+        return self._heavy[col].total
+
+    def distinct(self, col):
+        return round(self._distinct[col].estimate())
+
+    def is_approximate(self, col):
+        return True
+
+
+def _chunk_counts(values):
+    vc = values.value_counts()
+    vc = vc[vc > 0] # category 列会包含人数为 0 的类别
+    return dict(zip(vc.index.tolist(), vc.values.tolist()))
+
+
+def sketch_rosters(paths, cols=SKETCH_COLS, capacity=HEAVY_HITTER_CAPACITY, precision=HLL_PRECISION,
+                   chunk_size=STREAM_CHUNK_ROWS):
+    # 逐块读取各表并更新摘要，读过的块随即丢弃 (峰值内存约为一个数据块)
+    sketch = CategorySketch(cols, capacity, precision)
+    for path in paths:
+        scan_student_data(path, sketch.update, chunk_size, warn=lambda msg: None)
+    return sketch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="流式统计一个或多个学生信息表中某列的人数排名 (近似，内存固定)")
+    parser.add_argument('files', nargs='+', help="学生信息表 (.xlsx / .csv / .parquet / .feather)")
+    parser.add_argument('--col', default='生源城市', choices=SKETCH_COLS, help="统计的列 (默认 生源城市)")
+    parser.add_argument('-k', '--top', type=int, default=20, help="输出的名次数 (默认 20)")
+    parser.add_argument('--capacity', type=int, default=HEAVY_HITTER_CAPACITY,
+                        help=f"记录的取值数，越大越准确 (默认 {HEAVY_HITTER_CAPACITY})")
+    parser.add_argument('--chart', help="同时生成柱状图 (前 k 名 + 其他) 到该 HTML 文件")
+    args = parser.parse_args(argv)
+
+    try:
+        sketch = sketch_rosters(args.files, [args.col], args.capacity)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    top = sketch.top(args.col, args.top)
+    print(f"# {args.col}: {sketch.total(args.col)} 人，约 {sketch.distinct(args.col)} 个不同取值；"
+          f"人数为上界，真实人数不少于 最少人数")
+    print("名次\t取值\t人数\t最少人数")
+    for rank, (value, row) in enumerate(top.iterrows(), 1):
+        print(f"{rank}\t{value}\t{row['人数']}\t{row['最少人数']}")
+    if args.chart:
+        from chart_output import save_chart
+        from charts import build_city_bar
+        counts = top_k_counts(sketch.counts(args.col), args.top, total=sketch.total(args.col))
+        save_chart(build_city_bar(counts, title=f"{args.col}人数排名 (估计值)"), args.chart)
+        print(f"柱状图已保存为 {args.chart}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""图表 HTML 的输出方式。
+
+'cdn' (默认) 与 pyecharts 的 render() 相同：选项逐个系列内联 (带缩进)，ECharts 和
+地图脚本从 CDN 加载。
+
+'offline' 生成更小、可在内网直接打开的文件：
+  * ECharts 和地图脚本放在共用的资源目录 (默认为输出文件旁的 echarts_assets/)，
+    各图表只引用同一份文件，不复制进每个 HTML。缺少的资源依次从环境变量
+    STUDENT_INFO_ECHARTS_ASSETS 指定的目录复制，或从 CDN 下载；内网机器可以先在
+    联网的机器上运行 `python chart_output.py fetch 目录`，再把目录拷贝过去。
+  * 折线图 / 柱状图改用 ECharts dataset：数据只保存一份二维表，各系列用 encode
+    指定所用的列，不再在每个点上重复 X 轴名称。
+  * 选项 JSON 不缩进。
+
+gzip=True 时另外写出预压缩的 .gz 文件 (浏览器直接打开的仍是未压缩文件，.gz 供
+HTTP 服务直接发送)。
+"""
+import gzip
+import html
+import json
+import os
+import re
+import shutil
+import sys
+import urllib.request
+
+ASSETS_DIRNAME = 'echarts_assets'
+ASSETS_SOURCE_ENV = 'STUDENT_INFO_ECHARTS_ASSETS'
+# 本项目的图表用到的资源 (pyecharts 的依赖名 -> 资源目录中的相对路径)
+DEFAULT_ASSETS = {'echarts': 'echarts.min.js', 'china': 'maps/china.js'}
+DOWNLOAD_TIMEOUT = 30
+
+OFFLINE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>{title}</title>
+{scripts}
+</head>
+<body>
+<div id="chart" style="width:{width};height:{height};"></div>
+<script>
+var chart = echarts.init(document.getElementById('chart'), '{theme}', {{renderer: '{renderer}'}});
+chart.setOption({options});
+</script>
+</body>
+</html>
+"""
+
+
+class OutputOptions:
+    def __init__(self, mode='cdn', assets_dir=None, gzip=False):
+        if mode not in ('cdn', 'offline'):
+            raise ValueError(f"未知的输出方式: {mode}")
+        self.mode = mode
+        self.assets_dir = assets_dir # None 表示输出文件旁的 echarts_assets/
+        self.gzip = gzip
+
+    def cache_token(self, output_file):
+        # 计入图表缓存键：输出方式或引用资源的相对路径不同的文件不能互相复用
+        token = {'output_mode': self.mode, 'gzip': self.gzip}
+        if self.mode == 'offline':
+            token['assets'] = assets_location(output_file, self.assets_dir)[1]
+        return token
+
+
+_current = OutputOptions()
+
+
+def configure(mode='cdn', assets_dir=None, gzip=False):
+    # 设置之后生成的所有图表的输出方式 (GUI 和批处理在开始生成前调用)
+    global _current
+    _current = OutputOptions(mode, assets_dir, gzip)
+    return _current
+
+
+def current():
+    return _current
+
+
+# --- 资源文件 ---
+
+def assets_location(output_file, assets_dir=None):
+    # 返回 (资源目录的绝对路径, HTML 中引用资源时使用的前缀)
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    assets_dir = os.path.abspath(assets_dir or os.path.join(output_dir, ASSETS_DIRNAME))
+    try:
+        prefix = os.path.relpath(assets_dir, output_dir).replace(os.sep, '/')
+    except ValueError: # Windows 上不在同一个盘符
+        prefix = 'file:///' + assets_dir.replace(os.sep, '/')
+    return assets_dir, prefix
+
+
+def asset_path(dependency):
+    # pyecharts 依赖名 (如 'echarts'、'china') -> 资源目录中的相对路径
+    if dependency in DEFAULT_ASSETS:
+        return DEFAULT_ASSETS[dependency]
+    from pyecharts.datasets import FILENAMES
+    name, ext = FILENAMES[dependency]
+    return f"{name}.{ext}"
+
+
+def _copy_or_download(relpath, dest, host):
+    source_dir = os.environ.get(ASSETS_SOURCE_ENV)
+    if source_dir and os.path.exists(os.path.join(source_dir, relpath)):
+        shutil.copyfile(os.path.join(source_dir, relpath), dest)
+        return
+    try:
+        with urllib.request.urlopen(host + relpath, timeout=DOWNLOAD_TIMEOUT) as response, open(dest, 'wb') as f:
+            shutil.copyfileobj(response, f)
+    except OSError as e:
+        raise OSError(
+            f"缺少 ECharts 资源文件 {relpath}，且无法下载 ({e})。\n"
+            f"请在联网的机器上运行 `python chart_output.py fetch 目录`，把该目录拷贝到本机后，"
+            f"设置环境变量 {ASSETS_SOURCE_ENV} 指向它，或直接放到 {os.path.dirname(os.path.dirname(dest))}。"
+        ) from e
+
+
+def ensure_assets(assets_dir, dependencies, host=None, compress=False):
+    # 保证资源目录中有所需的脚本；返回各脚本的相对路径 (与 dependencies 顺序相同)
+    if host is None:
+        from pyecharts.globals import CurrentConfig
+        host = CurrentConfig.ONLINE_HOST
+    relpaths = []
+    for dependency in dependencies:
+        relpath = asset_path(dependency)
+        dest = os.path.join(assets_dir, relpath)
+        if not os.path.exists(dest):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            tmp_path = f"{dest}.{os.getpid()}.tmp"
+            try:
+                _copy_or_download(relpath, tmp_path, host)
+                os.replace(tmp_path, dest) # 多个图表同时生成时不会读到写了一半的文件
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        if compress and not os.path.exists(dest + '.gz'):
+            write_gzip(dest)
+        relpaths.append(relpath)
+    return relpaths
+
+
+# --- 选项压缩 ---
+
+_NOT_CONVERTIBLE = object()
+
+
+def _point_value(point, category):
+    # 折线图的点为 [x, y]，柱状图为 y；其他形式 (带单独样式的数据项) 不能放进 dataset
+    if isinstance(point, list) and len(point) == 2 and point[0] == category:
+        return point[1]
+    if point is None or isinstance(point, (int, float)):
+        return point
+    return _NOT_CONVERTIBLE
+
+
+def use_dataset(options):
+    # 类目轴上的折线 / 柱状系列改为共用一个 dataset；不满足条件时原样返回
+    series = options.get('series') or []
+    xaxis = options.get('xAxis') or []
+    if not series or len(xaxis) != 1 or 'dataset' in options:
+        return options
+    categories = xaxis[0].get('data')
+    if not categories or any(s.get('type') not in ('line', 'bar') or 'data' not in s for s in series):
+        return options
+
+    columns = []
+    for s in series:
+        data = s['data']
+        if len(data) != len(categories):
+            return options
+        values = [_point_value(point, category) for point, category in zip(data, categories)]
+        if any(v is _NOT_CONVERTIBLE for v in values):
+            return options
+        columns.append(values)
+
+    # 行 = 类目 (X 轴)，第 0 列为类目名，第 i 列为第 i 个系列
+    options['dataset'] = {'source': [[category, *row] for category, row in zip(categories, zip(*columns))],
+                          'sourceHeader': False}
+    del xaxis[0]['data']
+    for i, s in enumerate(series, 1):
+        del s['data']
+        s['encode'] = {'x': 0, 'y': i}
+    return options
+
+
+def compact_options(chart, dataset=True):
+    # 图表的 ECharts 选项 (dict)；dataset=True 时尽量改用 dataset
+    options = json.loads(chart.dump_options_with_quotes())
+    return use_dataset(options) if dataset else options
+
+
+def compact_options_json(chart, dataset=True):
+    text = json.dumps(compact_options(chart, dataset), ensure_ascii=False, separators=(',', ':'))
+    text = re.sub('"?--x_x--0_0--"?', "", text) # JsCode 占位符，与 pyecharts 的处理相同
+    return text.replace("</", "<\\/") # 数据中的 "</script>" 不会提前结束脚本
+
+
+# --- 写出文件 ---
+
+def write_offline_html(chart, output_file, assets_dir=None, compress=False):
+    assets_dir, prefix = assets_location(output_file, assets_dir)
+    relpaths = ensure_assets(assets_dir, list(chart.js_dependencies.items), chart.js_host, compress)
+    scripts = "\n".join(f'<script src="{prefix}/{relpath}"></script>' for relpath in relpaths)
+    page = OFFLINE_TEMPLATE.format(
+        title=html.escape(chart.page_title), scripts=scripts, width=chart.width, height=chart.height,
+        theme=chart.theme, renderer=chart.renderer, options=compact_options_json(chart),
+    )
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return output_file
+
+
+def write_gzip(path):
+    with open(path, 'rb') as src, gzip.open(path + '.gz', 'wb', compresslevel=9) as dst:
+        shutil.copyfileobj(src, dst)
+    return path + '.gz'
+
+
+def save_chart(chart, output_file, options=None):
+    # 各 render_* 写出 pyecharts 图表时统一调用这里，按当前设置选择输出方式
+    options = options or _current
+    if options.mode == 'offline':
+        write_offline_html(chart, output_file, options.assets_dir, options.gzip)
+    else:
+        chart.render(output_file)
+    if options.gzip:
+        write_gzip(output_file)
+    return output_file
+
+
+def restore_cached(output_file, options=None):
+    # 图表缓存只保存 HTML 本身：命中缓存后补齐它引用的资源和 .gz 文件
+    options = options or _current
+    if not output_file.endswith('.html'):
+        return
+    if options.mode == 'offline':
+        ensure_assets(assets_location(output_file, options.assets_dir)[0], list(DEFAULT_ASSETS),
+                      compress=options.gzip)
+    if options.gzip:
+        write_gzip(output_file)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2 or argv[0] != 'fetch':
+        print("用法: python chart_output.py fetch 资源目录", file=sys.stderr)
+        return 2
+    for relpath in ensure_assets(argv[1], list(DEFAULT_ASSETS)):
+        print(os.path.join(argv[1], relpath))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1088 @@
+"""各图表的数据统计与生成逻辑 (不依赖 tkinter)。
+
+每个 render_* 函数都可以在后台线程中执行：通过 progress(比例, 说明) 汇报进度，
+在各阶段之间检查 cancel (threading.Event)，数据不满足要求时抛出 ChartError，
+由调用方 (GUI 或批处理脚本) 决定如何提示用户。
+"""
+import inspect
+import math
+import os
+import warnings
+from itertools import combinations
+
+import perf_trace
+from artifact_cache import artifact_key
+import chart_output
+import grade_analytics
+from category_ranking import OTHER_LABEL, top_k_columns, top_k_counts, top_k_indices
+from chart_output import save_chart
+from dorm_layout import dorm_layout
+from job_scheduler import ChartError, JobCancelled # 定义在轻量模块中，工作进程和调度器不必导入本模块
+from motto_tokens import MottoTokenizer
+from startup_profile import lazy_module, timed_import
+from student_loader import CLASS_COL, RANK_COLS
+from student_summary import dorm_members_of
+from wordcloud_renderer import get_renderer as get_wordcloud_renderer
+
+# 大型库在第一次生成图表时才导入，避免拖慢程序启动
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+opts = lazy_module('pyecharts.options')
+echarts = lazy_module('pyecharts.charts') # Pie, Map, Bar, Line, Graph, HeatMap
+
+DEFAULT_FONT_PATH = 'C:/Windows/Fonts/simhei.ttf'
+
+
+class ChartResult:
+    def __init__(self, output_file, message, notices=None, image=None, from_cache=False, chart=None, pending=None):
+        self.output_file = output_file # 生成的文件 (保存失败或不写文件时为 None)
+        self.message = message         # 完成后给用户的提示
+        self.notices = notices or []   # 额外提示 [(level, title, message), ...]
+        self.image = image             # 词云的像素数组，供 GUI 显示 (命中缓存时为 None)
+        self.from_cache = from_cache   # 是否直接复用了图表缓存中的文件
+        self.chart = chart             # pyecharts 图表对象 (命中缓存时为 None)
+        self.pending = pending         # 仍在后台写入文件的 Future (结果为文件路径)，例如词云的完整分辨率图片
+
+
+def _step(progress, cancel, fraction, text):
+    # 阶段之间的检查点：先响应取消，再汇报进度
+    if cancel is not None and cancel.is_set():
+        raise JobCancelled()
+    if progress is not None:
+        progress(fraction, text)
+
+
+def _finish(chart, output_file, message, notices=None):
+    # output_file 为 None 时不写文件，只返回图表对象 (本地看板直接取用其选项)
+    if output_file is not None:
+        save_chart(chart, output_file)
+    return ChartResult(output_file, message, notices=notices, chart=chart)
+
+
+def _require_columns(df, cols, message):
+    if any(col not in df.columns for col in cols):
+        raise ChartError("错误", message)
+
+
+def _value_counts(df, col, summary):
+    # summary 为加载时构建的 StudentSummary，没有时才扫描整列
+    if summary is not None:
+        return summary.counts(col)
+    value_counts = df[col].value_counts()
+    return value_counts[value_counts > 0] # category 列会包含人数为 0 的类别
+
+
+# --- 性别分布饼图 ---
+
+def build_gender_pie(gender_counts):
+    gender_data_pair = [list(z) for z in zip(gender_counts.index, gender_counts.values.astype(float))] # pyecharts 需要 float
+    return (
+        echarts.Pie(init_opts=opts.InitOpts(width="600px", height="400px")) # 设置图表大小
+        .add(
+            "", # 系列名称，留空
+            gender_data_pair,
+            radius=["40%", "75%"], # 设置饼图内外半径，做成环状图
+        )
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="同学性别分布"),
+            legend_opts=opts.LegendOpts(orient="vertical", pos_top="15%", pos_left="2%"), # 图例设置
+        )
+        .set_series_opts(label_opts=opts.LabelOpts(formatter="{b}: {c} ({d}%)")) # 标签格式
+    )
+
+
+def render_gender(df, output_file="gender_distribution_pie.html", summary=None, progress=None, cancel=None):
+    _require_columns(df, ['性别'], "数据中缺少 '性别' 列！")
+    _step(progress, cancel, 0.1, "统计性别")
+    gender_counts = _value_counts(df, '性别', summary)
+    _step(progress, cancel, 0.4, "生成图表")
+    pie_chart = build_gender_pie(gender_counts)
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(pie_chart, output_file, f"性别分布饼图已生成：\n{output_file}")
+
+
+# --- 省份分布地图 ---
+
+def province_counts_for_map(province_counts):
+    # 省份名称已在加载时规范化为地图使用的简称 (见 regions.py)，这里只去掉人数为 0 的类别
+    province_counts = province_counts[province_counts > 0].copy()
+    province_counts.index = province_counts.index.astype(str)
+    return province_counts
+
+
+def build_province_map(province_counts):
+    province_data_pair = [list(z) for z in zip(province_counts.index, province_counts.values.astype(float))]
+
+    max_value = float(province_counts.max()) if not province_counts.empty else 1.0 # 避免空数据出错
+
+    return (
+        echarts.Map(init_opts=opts.InitOpts(width="800px", height="600px"))
+        .add("生源地人数", province_data_pair, "china")
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title="同学省份分布地图"),
+            visualmap_opts=opts.VisualMapOpts(max_=max_value, is_piecewise=False),
+            tooltip_opts=opts.TooltipOpts(formatter="{b}: {c}人") # 鼠标悬停提示
+        )
+    )
+
+
+def render_province(df, output_file="province_distribution_map.html", summary=None, progress=None, cancel=None):
+    _require_columns(df, ['生源省份'], "数据中缺少 '生源省份' 列！")
+    _step(progress, cancel, 0.1, "统计省份")
+    province_counts = province_counts_for_map(_value_counts(df, '生源省份', summary))
+    _step(progress, cancel, 0.4, "生成地图")
+    map_chart = build_province_map(province_counts)
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(map_chart, output_file, f"省份分布地图已生成：\n{output_file}")
+
+
+# --- 城市分布柱状图 ---
+
+# 柱状图最多单独显示的城市数，其余城市合并为 "其他" (top_k=None 时全部显示)
+CITY_TOP_K = 30
+
+
+def build_city_bar(city_counts, title="同学城市分布", subtitle=None):
+    return (
+        echarts.Bar(init_opts=opts.InitOpts(width="900px", height="500px"))
+        .add_xaxis(city_counts.index.astype(str).tolist())
+        .add_yaxis("人数", city_counts.values.tolist())
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title=title, subtitle=subtitle),
+            xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=-30)), # X轴标签旋转
+            datazoom_opts=[opts.DataZoomOpts(), opts.DataZoomOpts(type_="inside")], # 添加缩放
+            tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="shadow") # 悬停提示
+        )
+    )
+
+
+def _top_k_subtitle(distinct, k, noun, approximate=False):
+    if k is None or distinct <= k:
+        return None
+    return f"共{'约' if approximate else ''} {distinct} 个{noun}，显示人数最多的 {k} 个"
+
+
+def render_city(df, output_file="city_distribution_bar.html", top_k=CITY_TOP_K, other_label=OTHER_LABEL,
+                summary=None, progress=None, cancel=None):
+    # summary 中的城市人数可能是近似的 (只统计时的 StudentSummary(sketch_cols=...) 或 CategorySketch)：
+    # 只记录了部分城市，其余人数由 total 补足
+    _require_columns(df, ['生源城市'], "数据中缺少 '生源城市' 列！")
+    _step(progress, cancel, 0.1, "统计城市")
+    city_counts = _value_counts(df, '生源城市', summary)
+    if summary is not None:
+        distinct, total = summary.distinct('生源城市'), summary.total('生源城市')
+    else:
+        distinct, total = len(city_counts), None
+    approximate = summary is not None and summary.is_approximate('生源城市')
+    city_counts = top_k_counts(city_counts, top_k, other_label, total)
+    _step(progress, cancel, 0.4, "生成柱状图")
+    bar_chart = build_city_bar(city_counts, subtitle=_top_k_subtitle(distinct, top_k, "城市", approximate))
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(bar_chart, output_file, f"城市分布柱状图已生成：\n{output_file}")
+
+
+# --- 人生格言词云 ---
+
+# 长期使用同一个分词器，已分词的格言在多次生成词云之间复用 (见 motto_tokens.py)
+_default_tokenizer = None
+
+
+def default_tokenizer():
+    global _default_tokenizer
+    if _default_tokenizer is None:
+        _default_tokenizer = MottoTokenizer()
+    return _default_tokenizer
+
+
+def motto_frequencies(df, tokenizer=None, progress=None, cancel=None):
+    tokenizer = tokenizer or default_tokenizer()
+    mottos = df['人生格言'].dropna().astype(str)
+    if mottos.empty:
+        raise ChartError("提示", "没有有效的 '人生格言' 数据可供生成词云。", level='info')
+    # 过滤掉特定标点符号 (标点表可在 MottoTokenizer 中配置)
+    if not any(tokenizer.clean(m) for m in mottos):
+        raise ChartError("提示", "过滤后没有足够的文本内容生成词云。", level='info')
+
+    def report(done, total):
+        _step(progress, cancel, 0.1 + 0.5 * done / total, f"分词中 ({done}/{total})")
+
+    try:
+        frequencies = tokenizer.term_frequencies(mottos, progress=report)
+    except ImportError:
+        raise ChartError("库缺失", "请确保已安装 'jieba' 和 'wordcloud' 库:\n pip install jieba wordcloud")
+    if not frequencies:
+        raise ChartError("提示", "分词和过滤后没有足够的词语生成词云。", level='info')
+    return frequencies
+
+
+def _wordcloud_renderer(font_path):
+    try:
+        timed_import('wordcloud')
+    except ImportError:
+        raise ChartError("库缺失", "请确保已安装 'jieba' 和 'wordcloud' 库:\n pip install jieba wordcloud")
+    # 检查字体文件是否存在
+    if not os.path.exists(font_path):
+        raise ChartError("字体错误", f"指定的字体文件未找到:\n{font_path}\n请在代码顶部修改 FONT_PATH 为有效的字体路径。")
+    return get_wordcloud_renderer(font_path)
+
+
+def _font_error(e):
+    return ChartError("字体错误", f"生成词云时可能字体路径配置错误:\n{e}\n请检查代码中的 FONT_PATH 设置。")
+
+
+def render_wordcloud(df, output_file="motto_wordcloud.png", font_path=DEFAULT_FONT_PATH, tokenizer=None,
+                     preview_budget=None, progress=None, cancel=None):
+    # preview_budget (秒) 不为空时先返回低分辨率预览 (result.image)，完整分辨率的图片在后台写入
+    # output_file，result.pending 为对应的 Future；为空时直接生成完整分辨率的图片
+    _require_columns(df, ['人生格言'], "数据中缺少 '人生格言' 列！")
+    renderer = _wordcloud_renderer(font_path)
+
+    _step(progress, cancel, 0.1, "整理格言文本")
+    frequencies = motto_frequencies(df, tokenizer, progress, cancel) # 停用词已在分词阶段过滤
+
+    if preview_budget is not None and output_file is not None:
+        _step(progress, cancel, 0.6, "生成预览")
+        try:
+            image = renderer.preview(frequencies, preview_budget)
+        except (RuntimeError, OSError) as e:
+            raise _font_error(e)
+        pending = renderer.submit(frequencies, output_file)
+        return ChartResult(None, f"完整分辨率的词云图正在后台生成，完成后保存为: {output_file}",
+                           image=np.asarray(image), pending=pending)
+
+    _step(progress, cancel, 0.6, "排布词云")
+    try:
+        image = renderer.render_image(frequencies)
+    except (RuntimeError, OSError) as e:
+        raise _font_error(e)
+
+    _step(progress, cancel, 0.9, "保存图片")
+    if output_file is None:
+        return ChartResult(None, "词云图已生成。", image=np.asarray(image))
+    # 保存图片 (可选)
+    try:
+        image.save(output_file)
+    except Exception as save_err:
+        return ChartResult(None, "词云图已生成。", image=np.asarray(image),
+                           notices=[('warning', "保存失败", f"词云图已显示，但保存到文件失败:\n{save_err}")])
+    return ChartResult(output_file, f"词云图已生成并显示。\n图片已保存为: {output_file}", image=np.asarray(image))
+
+
+# --- 成绩趋势折线图 ---
+
+def grade_table(df):
+    # 找出数据中实际存在的成绩列
+    valid_rank_cols = [col for col in RANK_COLS if col in df.columns]
+
+    if not valid_rank_cols:
+        raise ChartError("错误", "数据中没有找到任何有效的成绩排名列！")
+    if '姓名' not in df.columns:
+        raise ChartError("错误", "数据中缺少 '姓名' 列！")
+
+    # 准备数据，将姓名设为索引
+    df_grades = df[['姓名'] + valid_rank_cols].copy()
+    df_grades = df_grades.set_index('姓名')
+    # 筛选掉所有成绩都为空的学生
+    df_grades = df_grades.dropna(how='all')
+
+    if df_grades.empty:
+        raise ChartError("提示", "没有找到有效的学生成绩数据来绘制趋势图。", level='info')
+    return df_grades
+
+
+# 学生人数超过该值时 (mode='auto') 改为绘制分位数汇总图，避免每人一条折线导致 HTML 过大
+GRADE_DETAIL_MAX_STUDENTS = 300
+GRADE_SAMPLE_SIZE = 20 # 汇总图中叠加显示的个人轨迹数
+GRADE_PERCENTILES = (10, 25, 50, 75, 90)
+GRADE_PERCENTILE_NAMES = {10: "P10", 25: "P25", 50: "中位数", 75: "P75", 90: "P90"}
+
+
+def _grade_values(df_grades):
+    return df_grades.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _to_chart_list(values, ndigits=None):
+    # Pyecharts 需要把 NaN 处理为 None
+    if ndigits is not None:
+        values = np.round(values, ndigits)
+    return [None if v != v else float(v) for v in values.tolist()]
+
+
+def grade_percentiles(df_grades, percentiles=GRADE_PERCENTILES):
+    # 每个学期名次的分位数 (向量化计算)；行 = 分位数，列 = 学期
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning) # 某学期全部缺失时结果为 NaN
+        bands = np.nanpercentile(_grade_values(df_grades), percentiles, axis=0)
+    return pd.DataFrame(bands, index=list(percentiles), columns=df_grades.columns)
+
+
+def sample_grade_students(df_grades, sample_size=GRADE_SAMPLE_SIZE, sample='top', seed=0):
+    # 选出叠加显示的个人轨迹：'top' = 平均名次最靠前的 N 人；'random' = 随机 N 人 (固定种子，结果可复现)
+    if sample_size <= 0:
+        return df_grades.iloc[:0]
+    if len(df_grades) <= sample_size:
+        return df_grades
+    if sample == 'random':
+        idx = np.sort(np.random.default_rng(seed).choice(len(df_grades), sample_size, replace=False))
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean_rank = np.nanmean(_grade_values(df_grades), axis=1)
+        idx = np.argpartition(mean_rank, sample_size - 1)[:sample_size] # 部分排序，O(n)
+        idx = idx[np.argsort(mean_rank[idx], kind='stable')]
+    return df_grades.iloc[idx]
+
+
+def _grade_line_base(semesters, title):
+    return (
+         echarts.Line(init_opts=opts.InitOpts(width="1000px", height="600px"))
+         .set_global_opts(
+            title_opts=opts.TitleOpts(title=title),
+            tooltip_opts=opts.TooltipOpts(trigger="axis"),
+            xaxis_opts=opts.AxisOpts(type_="category", name="学期"),
+            yaxis_opts=opts.AxisOpts(
+                type_="value",
+                name="名次",
+                is_inverse=True, # Y轴反转，数字小的在上面
+                splitline_opts=opts.SplitLineOpts(is_show=True),
+            ),
+            legend_opts=opts.LegendOpts(type_="scroll", pos_left="10%", orient="horizontal", pos_top="5%"),
+            datazoom_opts=[opts.DataZoomOpts(orient="horizontal"), opts.DataZoomOpts(type_="inside", orient="horizontal")],
+         )
+         .add_xaxis(semesters) # X轴是学期名称
+    )
+
+
+def _add_student_lines(line_chart, df_grades, progress, cancel, **series_opts):
+    total = len(df_grades)
+    names = df_grades.index.astype(str).tolist()
+    values = _grade_values(df_grades)
+    for i, (student_name, ranks) in enumerate(zip(names, values)):
+        if i % 200 == 0:
+            _step(progress, cancel, 0.2 + 0.5 * i / total, f"添加折线 ({i}/{total})")
+        line_chart.add_yaxis(
+            student_name,
+            _to_chart_list(ranks),
+            is_smooth=False, # 不使用平滑曲线
+            label_opts=opts.LabelOpts(is_show=False), # 不显示线上标签，太多会乱
+            # 设置鼠标悬停时高亮相关项
+            emphasis_opts=opts.EmphasisOpts(focus='series'),
+            **series_opts
+            )
+    return line_chart
+
+
+def build_grade_line(df_grades, progress=None, cancel=None):
+    # 明细模式：为每个学生添加一条线
+    line_chart = _grade_line_base(list(df_grades.columns), "同学成绩名次变化趋势 (名次越低越靠前)")
+    return _add_student_lines(line_chart, df_grades, progress, cancel, symbol="circle")
+
+
+def build_grade_summary_line(df_grades, sample_size=GRADE_SAMPLE_SIZE, sample='top', progress=None, cancel=None):
+    # 汇总模式：各学期名次的分位数带 + 少量个人轨迹
+    _step(progress, cancel, 0.2, "计算名次分位数")
+    bands = grade_percentiles(df_grades)
+    line_chart = _grade_line_base(
+        list(df_grades.columns), f"同学成绩名次分布趋势 (共 {len(df_grades)} 人，名次越低越靠前)"
+    )
+    for p, row in bands.iterrows():
+        is_median = p == 50
+        line_chart.add_yaxis(
+            GRADE_PERCENTILE_NAMES.get(p, f"P{p}"),
+            _to_chart_list(row.to_numpy(), ndigits=1),
+            is_smooth=False,
+            symbol="circle" if is_median else "none",
+            label_opts=opts.LabelOpts(is_show=False),
+            linestyle_opts=opts.LineStyleOpts(width=3 if is_median else 2, type_="solid" if is_median else "dashed"),
+            z=3, # 分位数线画在个人轨迹之上
+        )
+
+    sampled = sample_grade_students(df_grades, sample_size, sample)
+    return _add_student_lines(
+        line_chart, sampled, progress, cancel,
+        symbol="none",
+        linestyle_opts=opts.LineStyleOpts(width=1, opacity=0.35),
+    )
+
+
+def render_grades(df, output_file="grade_trends_line.html", mode='auto', sample_size=GRADE_SAMPLE_SIZE,
+                  sample='top', summary=None, progress=None, cancel=None):
+    # mode: 'detail' 每人一条线；'summary' 分位数带 + 抽样个人轨迹；'auto' 按人数自动选择
+    # summary (StudentSummary) 记录了有成绩的人数，没有成绩时不必整理整张表
+    if summary is not None and summary.students_with_ranks == 0 and '姓名' in df.columns:
+        raise ChartError("提示", "没有找到有效的学生成绩数据来绘制趋势图。", level='info')
+    _step(progress, cancel, 0.1, "整理成绩数据")
+    df_grades = grade_table(df)
+    if mode == 'auto':
+        mode = 'detail' if len(df_grades) <= GRADE_DETAIL_MAX_STUDENTS else 'summary'
+
+    if mode == 'summary':
+        line_chart = build_grade_summary_line(df_grades, sample_size, sample, progress, cancel)
+        sample_note = "平均名次前" if sample == 'top' else "随机"
+        note = f"\n(共 {len(df_grades)} 人，已绘制名次分位数带，并叠加{sample_note} {min(sample_size, len(df_grades))} 人的轨迹)"
+    else:
+        line_chart = build_grade_line(df_grades, progress, cancel)
+        note = ""
+    _step(progress, cancel, 0.8, "写入 HTML")
+    return _finish(line_chart, output_file, f"成绩趋势折线图已生成：\n{output_file}{note}")
+
+
+# --- 成绩进退步分析 (计算见 grade_analytics.py) ---
+
+MOVERS_TOP_N = 10 # 进步 / 退步排行各显示的人数
+
+
+def grade_movement(df, with_classes=False):
+    df_grades = grade_table(df)
+    groups = grade_analytics.row_groups(df, df_grades, CLASS_COL) if with_classes else None
+    return grade_analytics.analyze(df_grades, groups)
+
+
+def _mover_labels(table):
+    # "姓名 (起始学期→最终学期)"；有班级列时加上班级，避免不同班级的同名学生混淆
+    names = table['姓名'].astype(str)
+    if '班级' in table.columns:
+        names = table['班级'].astype(str) + " " + names
+    return (names + " (" + table['起始学期'].astype(str) + "→" + table['最终学期'].astype(str) + ")").tolist()
+
+
+def build_movers_bar(risers, fallers):
+    # 横向条形图：上半部分为进步最多的学生 (最多的在最上面)，下半部分为退步最多的学生
+    rows = pd.concat([fallers, risers.iloc[::-1]], ignore_index=True)
+    change = rows['总变化'].to_numpy(dtype='float64')
+    bar_chart = echarts.Bar(init_opts=opts.InitOpts(width="1000px", height=f"{max(400, 28 * len(rows) + 120)}px"))
+    bar_chart.add_xaxis(_mover_labels(rows))
+    bar_chart.add_yaxis("进步", _to_chart_list(np.where(change > 0, change, np.nan)), stack="变化",
+                        color="#3ba272", label_opts=opts.LabelOpts(is_show=True, position="right"))
+    bar_chart.add_yaxis("退步", _to_chart_list(np.where(change < 0, change, np.nan)), stack="变化",
+                        color="#ee6666", label_opts=opts.LabelOpts(is_show=True, position="left"))
+    return bar_chart.reversal_axis().set_global_opts(
+        title_opts=opts.TitleOpts(title="名次进步 / 退步最多的同学",
+                                  subtitle="第一个与最后一个有名次的学期相比，正数为名次上升"),
+        legend_opts=opts.LegendOpts(pos_top="5%"),
+        tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="shadow"),
+        xaxis_opts=opts.AxisOpts(type_="value", name="名次变化"),
+        yaxis_opts=opts.AxisOpts(type_="category"),
+    )
+
+
+def render_grade_movers(df, output_file="grade_movers_bar.html", top_n=MOVERS_TOP_N, progress=None, cancel=None):
+    _step(progress, cancel, 0.1, "整理成绩数据")
+    movement = grade_movement(df)
+    _step(progress, cancel, 0.4, "计算名次变化")
+    risers, fallers = movement.risers(top_n), movement.fallers(top_n)
+    if risers.empty and fallers.empty:
+        raise ChartError("提示", "没有学生有两个及以上学期的名次，无法比较名次变化。", level='info')
+    _step(progress, cancel, 0.6, "生成条形图")
+    bar_chart = build_movers_bar(risers, fallers)
+    _step(progress, cancel, 0.8, "写入 HTML")
+    return _finish(bar_chart, output_file, f"名次进退步排行已生成：\n{output_file}")
+
+
+def build_rank_correlation_heatmap(corr):
+    labels = corr.columns.tolist()
+    values = corr.to_numpy()
+    data = [[j, i, None if values[i, j] != values[i, j] else round(float(values[i, j]), 2)]
+            for i in range(len(labels)) for j in range(len(labels))]
+    heatmap = echarts.HeatMap(init_opts=opts.InitOpts(width="700px", height="600px"))
+    heatmap.add_xaxis(labels)
+    heatmap.add_yaxis("相关系数", labels, data, label_opts=opts.LabelOpts(is_show=True, position="inside"))
+    return heatmap.set_global_opts(
+        title_opts=opts.TitleOpts(title="各学期名次的相关性 (Spearman)",
+                                  subtitle="越接近 1 表示两个学期的名次顺序越一致"),
+        visualmap_opts=opts.VisualMapOpts(min_=-1, max_=1, precision=2, pos_left="right", pos_top="center",
+                                          range_color=["#5470c6", "#f5f5f5", "#ee6666"]),
+        tooltip_opts=opts.TooltipOpts(is_show=True),
+    )
+
+
+def render_rank_correlation(df, output_file="rank_correlation_heatmap.html", progress=None, cancel=None):
+    _step(progress, cancel, 0.1, "整理成绩数据")
+    movement = grade_movement(df)
+    if len(movement.semesters) < 2:
+        raise ChartError("提示", "至少需要两个学期的名次才能计算相关性。", level='info')
+    _step(progress, cancel, 0.4, "计算相关系数")
+    corr = movement.correlation()
+    _step(progress, cancel, 0.6, "生成热力图")
+    heatmap = build_rank_correlation_heatmap(corr)
+    _step(progress, cancel, 0.8, "写入 HTML")
+    return _finish(heatmap, output_file, f"学期名次相关性热力图已生成：\n{output_file}")
+
+
+# --- 寝室关系图 ---
+
+# 人数不超过该值的寝室两两相连 (与原图一致，边数 ≤ n·(k-1)/2)；
+# 更大的群组 (整栋楼、合租等) 改为 "寝室中心节点 + 成员" 的星形结构，边数与人数成正比
+DORM_CLIQUE_MAX_SIZE = 6
+
+
+def _dorm_nodes_links(dorm_groups, mode, hub_category=None):
+    # dorm_groups: [(寝室号, 成员姓名列表, 成员的节点类别列表), ...]
+    # hub_category 为 None 时寝室中心节点沿用第一个成员的类别
+    # 节点坐标由 dorm_layout 预先计算 (按寝室成簇，同一份数据每次相同)，图表不再在浏览器中模拟
+    dorm_groups = list(dorm_groups)
+    hubs = [len(members) >= 2 and (mode == 'hub' or (mode == 'auto' and len(members) > DORM_CLIQUE_MAX_SIZE))
+            for _, members, _ in dorm_groups]
+    xs, ys = dorm_layout([dorm for dorm, _, _ in dorm_groups], [len(members) for _, members, _ in dorm_groups], hubs)
+    xs, ys = xs.tolist(), ys.tolist()
+    nodes_data, links_data = [], []
+    for (dorm, members, member_categories), use_hub in zip(dorm_groups, hubs):
+        # 为 Pyecharts 准备节点数据 (学生)
+        start = len(nodes_data)
+        nodes_data.extend(
+            {"name": name, "symbolSize": 10, "category": category, "x": x, "y": y}
+            for name, category, x, y in zip(members, member_categories, xs[start:], ys[start:])
+        )
+        if use_hub:
+            hub = f"寝室 {dorm}"
+            category = member_categories[0] if hub_category is None else hub_category
+            p = len(nodes_data)
+            nodes_data.append({"name": hub, "symbolSize": 18, "category": category, "symbol": "diamond",
+                               "x": xs[p], "y": ys[p]})
+            links_data.extend({"source": u, "target": hub} for u in members)
+        elif len(members) >= 2:
+            links_data.extend({"source": u, "target": v} for u, v in combinations(members, 2))
+    return nodes_data, links_data
+
+
+# 图例中最多单独列出的寝室 (按班级着色时为班级) 数，其余合并为一个 "其他" 类别
+DORM_LEGEND_TOP_K = 30
+
+
+def _legend_categories(names, sizes, top_k, other_label):
+    # 人数最多的 top_k 个取值各为一类 (图例按人数降序)，其余归入 other_label 类
+    # 返回 (每个取值的类别编号, 类别名称列表)；other_label 为 None 时其余取值的类别为 None (不着色)
+    chosen = top_k_indices(sizes, top_k)
+    if len(chosen) == len(names):
+        return list(range(len(names))), list(names)
+    other = len(chosen) if other_label is not None else None
+    codes = [other] * len(names)
+    for code, i in enumerate(chosen.tolist()):
+        codes[i] = code
+    legend = [names[i] for i in chosen.tolist()]
+    return codes, legend + ([other_label] if other_label is not None else [])
+
+
+def dorm_graph_data(df, mode='auto', summary=None, legend_top_k=DORM_LEGEND_TOP_K, other_label=OTHER_LABEL):
+    # mode: 'auto' 按寝室人数逐个选择；'clique' 全部两两相连；'hub' 全部使用寝室中心节点
+    # 寝室成员名单优先取自加载时构建的汇总 (summary)
+    dorm_members = summary.dorm_members if summary is not None else dorm_members_of(df)
+    if not dorm_members:
+        raise ChartError("提示", "没有有效的学生姓名和寝室号数据来构建关系图。", level='info')
+
+    # 每个寝室一个节点类别 (颜色)；寝室很多时只有人数最多的 legend_top_k 个单独成类
+    codes, legend = _legend_categories(list(dorm_members), [len(m) for m in dorm_members.values()],
+                                       legend_top_k, other_label)
+    nodes_data, links_data = _dorm_nodes_links(
+        ((dorm, members, [code] * len(members)) for code, (dorm, members) in zip(codes, dorm_members.items())),
+        mode,
+    )
+    categories = [opts.GraphCategory(name=name) for name in legend]
+    return nodes_data, links_data, categories
+
+
+DORM_LABEL_MAX_NODES = 300 # 节点超过该数量时只在鼠标悬停时显示姓名
+
+
+def build_dorm_graph(nodes_data, links_data, categories, title="寝室关系图 (同寝室相连)"):
+    # 坐标已在 _dorm_nodes_links 中算好 (layout="none")，打开页面即显示最终布局
+    show_labels = len(nodes_data) <= DORM_LABEL_MAX_NODES
+    return (
+        echarts.Graph(init_opts=opts.InitOpts(width="1000px", height="700px"))
+        .add(
+            "", # 系列名称
+            nodes=nodes_data,
+            links=links_data,
+            categories=categories, # 定义节点类别（用于颜色区分）
+            layout="none", # 使用预先计算的坐标
+            is_roam=True, # 可缩放、平移
+            is_preserve_aspect=True, # 按原比例缩放坐标，寝室的圆不会被拉伸
+            is_rotate_label=True, # 标签是否旋转
+            linestyle_opts=opts.LineStyleOpts(color="source", curve=0.3), # 边样式
+            label_opts=opts.LabelOpts(is_show=show_labels, position="right"), # 显示标签
+            emphasis_opts=opts.EmphasisOpts(focus="adjacency", label_opts=opts.LabelOpts(is_show=True)),
+            edge_symbol=['', 'arrow'] # 边两端形状
+        )
+        .set_global_opts(
+            title_opts=opts.TitleOpts(title=title),
+            legend_opts=opts.LegendOpts(orient='vertical', pos_left='2%', pos_top='20%'), # 显示图例（寝室号 / 班级）
+        )
+    )
+
+
+def render_dorm_network(df, output_file="dorm_relationship_graph.html", mode='auto', legend_top_k=DORM_LEGEND_TOP_K,
+                        other_label=OTHER_LABEL, summary=None, progress=None, cancel=None):
+    _require_columns(df, ['姓名', '寝室号'], "数据中缺少 '姓名' 或 '寝室号' 列！")
+    _step(progress, cancel, 0.1, "构建节点与连线")
+    nodes_data, links_data, categories = dorm_graph_data(df, mode, summary, legend_top_k, other_label)
+
+    notices = []
+    if not links_data:
+        notices.append(('info', "提示", "没有找到同一寝室超过一人的情况，无法生成关系连线。"))
+        # 可以选择只显示节点
+
+    _step(progress, cancel, 0.5, "生成关系图")
+    graph_chart = build_dorm_graph(nodes_data, links_data, categories)
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(graph_chart, output_file, f"寝室关系图已生成：\n{output_file}", notices=notices)
+
+
+# --- 班级对比视图 (同时加载多个班级的表后可用，见 class_rosters.py) ---
+
+def _require_classes(df):
+    if CLASS_COL not in df.columns:
+        raise ChartError("提示", "数据中没有 '班级' 列，请先同时加载多个班级的表再使用班级对比。", level='info')
+
+
+def class_value_counts(df, col, summary=None):
+    # 行 = 班级 (按加载顺序)，列 = 取值 (按总人数降序)
+    if summary is not None and summary.classes:
+        return summary.class_counts(col)
+    table = df.groupby([CLASS_COL, col], observed=True).size().unstack(fill_value=0)
+    table.index = table.index.astype(str)
+    table = table.loc[:, table.sum() > 0]
+    return table[table.sum().sort_values(ascending=False, kind='stable').index]
+
+
+def _grid_shape(n):
+    # n 个小图排成接近正方形的网格；返回 (列数, 行数)
+    cols = math.ceil(math.sqrt(n))
+    return cols, math.ceil(n / cols)
+
+
+CLASS_PIE_CELL = 260 # 每个班级饼图所占的像素
+
+
+def build_gender_pies_by_class(table):
+    # 每个班级一个环形图，排成网格；图例 (性别) 在各饼图之间共用
+    cols, rows = _grid_shape(len(table))
+    top = 60 # 总标题占用的高度
+    width, height = cols * CLASS_PIE_CELL, rows * CLASS_PIE_CELL + top
+    pie_chart = echarts.Pie(init_opts=opts.InitOpts(width=f"{width}px", height=f"{height}px"))
+    titles = [opts.TitleOpts(title="各班级性别分布")]
+    for i, (class_name, counts) in enumerate(table.iterrows()):
+        row, col = divmod(i, cols)
+        x = (col + 0.5) * CLASS_PIE_CELL
+        y = top + (row + 0.5) * CLASS_PIE_CELL
+        counts = counts[counts > 0]
+        pie_chart.add(
+            class_name,
+            [list(z) for z in zip(counts.index.astype(str), counts.values.astype(float))],
+            center=[f"{x / width:.2%}", f"{y / height:.2%}"],
+            radius=[CLASS_PIE_CELL * 0.18, CLASS_PIE_CELL * 0.32],
+            label_opts=opts.LabelOpts(formatter="{b}: {c}"),
+        )
+        titles.append(opts.TitleOpts(
+            subtitle=f"{class_name} ({int(counts.sum())}人)",
+            pos_left=f"{x / width:.2%}", pos_top=f"{(y - CLASS_PIE_CELL * 0.48) / height:.2%}",
+            text_align="center",
+        ))
+    pie_chart.set_global_opts(
+        legend_opts=opts.LegendOpts(pos_top="2%", pos_right="2%"),
+        tooltip_opts=opts.TooltipOpts(formatter="{a}<br/>{b}: {c} ({d}%)"),
+    )
+    pie_chart.options["title"] = titles # 每个饼图上方的班级名 (ECharts 支持多个标题)
+    return pie_chart
+
+
+def render_gender_by_class(df, output_file="gender_by_class_pie.html", summary=None, progress=None, cancel=None):
+    _require_columns(df, ['性别'], "数据中缺少 '性别' 列！")
+    _require_classes(df)
+    _step(progress, cancel, 0.1, "按班级统计性别")
+    table = class_value_counts(df, '性别', summary)
+    _step(progress, cancel, 0.4, "生成图表")
+    pie_chart = build_gender_pies_by_class(table)
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(pie_chart, output_file, f"各班级性别分布饼图已生成：\n{output_file}")
+
+
+def build_province_map_by_class(table):
+    # 每个班级一个地图系列：同一地图上的多个系列数值相加，在图例中勾选班级即可对比或合计
+    table = table.loc[:, table.sum() > 0]
+    map_chart = echarts.Map(init_opts=opts.InitOpts(width="900px", height="650px"))
+    for class_name, counts in table.iterrows():
+        counts = counts[counts > 0]
+        map_chart.add(
+            class_name,
+            [list(z) for z in zip(counts.index.astype(str), counts.values.astype(float))],
+            "china",
+            is_map_symbol_show=False,
+            label_opts=opts.LabelOpts(is_show=False),
+        )
+    max_value = float(table.sum().max()) if not table.empty else 1.0
+    return map_chart.set_global_opts(
+        title_opts=opts.TitleOpts(title="各班级省份分布地图", subtitle="在图例中勾选班级进行对比"),
+        visualmap_opts=opts.VisualMapOpts(max_=max_value, is_piecewise=False),
+        legend_opts=opts.LegendOpts(type_="scroll", orient="vertical", pos_left="2%", pos_top="15%"),
+    )
+
+
+def render_province_by_class(df, output_file="province_by_class_map.html", summary=None, progress=None, cancel=None):
+    _require_columns(df, ['生源省份'], "数据中缺少 '生源省份' 列！")
+    _require_classes(df)
+    _step(progress, cancel, 0.1, "按班级统计省份")
+    table = class_value_counts(df, '生源省份', summary)
+    table.columns = table.columns.astype(str)
+    _step(progress, cancel, 0.4, "生成地图")
+    map_chart = build_province_map_by_class(table)
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(map_chart, output_file, f"各班级省份分布地图已生成：\n{output_file}")
+
+
+def build_city_bar_by_class(table, subtitle=None):
+    # 堆叠柱状图：X 轴为城市 (按总人数降序)，每个班级一段
+    bar_chart = echarts.Bar(init_opts=opts.InitOpts(width="1000px", height="550px"))
+    bar_chart.add_xaxis(table.columns.astype(str).tolist())
+    for class_name, counts in table.iterrows():
+        bar_chart.add_yaxis(class_name, counts.tolist(), stack="班级", label_opts=opts.LabelOpts(is_show=False))
+    return bar_chart.set_global_opts(
+        title_opts=opts.TitleOpts(title="各班级城市分布", subtitle=subtitle),
+        legend_opts=opts.LegendOpts(type_="scroll", pos_top="5%"),
+        xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=-30)),
+        datazoom_opts=[opts.DataZoomOpts(), opts.DataZoomOpts(type_="inside")],
+        tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="shadow"),
+    )
+
+
+def render_city_by_class(df, output_file="city_by_class_bar.html", top_k=CITY_TOP_K, other_label=OTHER_LABEL,
+                         summary=None, progress=None, cancel=None):
+    _require_columns(df, ['生源城市'], "数据中缺少 '生源城市' 列！")
+    _require_classes(df)
+    _step(progress, cancel, 0.1, "按班级统计城市")
+    table = class_value_counts(df, '生源城市', summary)
+    subtitle = _top_k_subtitle(table.shape[1], top_k, "城市")
+    table = top_k_columns(table, top_k, other_label)
+    _step(progress, cancel, 0.4, "生成柱状图")
+    bar_chart = build_city_bar_by_class(table, subtitle)
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(bar_chart, output_file, f"各班级城市分布柱状图已生成：\n{output_file}")
+
+
+def class_grade_medians(df):
+    # 行 = 班级，列 = 学期；值为该班级该学期名次的中位数
+    valid_rank_cols = [col for col in RANK_COLS if col in df.columns]
+    if not valid_rank_cols:
+        raise ChartError("错误", "数据中没有找到任何有效的成绩排名列！")
+    medians = df.groupby(CLASS_COL, observed=True, sort=False)[valid_rank_cols].median().dropna(how='all')
+    if medians.empty:
+        raise ChartError("提示", "没有找到有效的学生成绩数据来绘制趋势图。", level='info')
+    return medians
+
+
+def build_grade_line_by_class(medians):
+    line_chart = _grade_line_base(list(medians.columns), "各班级名次中位数变化 (名次越低越靠前)")
+    for class_name, values in zip(medians.index.astype(str), _grade_values(medians)):
+        line_chart.add_yaxis(
+            class_name,
+            _to_chart_list(values, 1),
+            symbol="circle",
+            label_opts=opts.LabelOpts(is_show=False),
+            emphasis_opts=opts.EmphasisOpts(focus='series'),
+        )
+    return line_chart
+
+
+def render_grades_by_class(df, output_file="grade_by_class_line.html", progress=None, cancel=None):
+    _require_classes(df)
+    _step(progress, cancel, 0.1, "整理成绩数据")
+    medians = class_grade_medians(df)
+    _step(progress, cancel, 0.5, "生成折线图")
+    line_chart = build_grade_line_by_class(medians)
+    _step(progress, cancel, 0.8, "写入 HTML")
+    return _finish(line_chart, output_file, f"各班级成绩趋势折线图已生成：\n{output_file}")
+
+
+def build_movement_bar_by_class(means):
+    # 分组柱状图：X 轴为相邻两个学期，每个班级一根柱子；正数表示班级平均名次上升
+    bar_chart = echarts.Bar(init_opts=opts.InitOpts(width="1000px", height="550px"))
+    bar_chart.add_xaxis(means.columns.tolist())
+    for class_name, values in zip(means.index, means.to_numpy(dtype='float64')):
+        bar_chart.add_yaxis(class_name, _to_chart_list(values, 2), label_opts=opts.LabelOpts(is_show=False))
+    return bar_chart.set_global_opts(
+        title_opts=opts.TitleOpts(title="各班级相邻学期的平均名次变化", subtitle="正数表示班级同学的名次平均上升"),
+        legend_opts=opts.LegendOpts(type_="scroll", pos_top="5%"),
+        yaxis_opts=opts.AxisOpts(name="平均名次变化"),
+        tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="shadow"),
+    )
+
+
+def render_grade_movers_by_class(df, output_file="grade_movers_by_class_bar.html", progress=None, cancel=None):
+    _require_classes(df)
+    _step(progress, cancel, 0.1, "整理成绩数据")
+    movement = grade_movement(df, with_classes=True)
+    if not movement.transitions:
+        raise ChartError("提示", "至少需要两个学期的名次才能比较名次变化。", level='info')
+    _step(progress, cancel, 0.4, "按班级计算名次变化")
+    means = movement.group_mean_changes()
+    _step(progress, cancel, 0.6, "生成柱状图")
+    bar_chart = build_movement_bar_by_class(means)
+    _step(progress, cancel, 0.8, "写入 HTML")
+    return _finish(bar_chart, output_file, f"各班级名次变化对比图已生成：\n{output_file}")
+
+
+def build_rank_correlation_line_by_class(corr):
+    line_chart = echarts.Line(init_opts=opts.InitOpts(width="1000px", height="550px"))
+    line_chart.add_xaxis(corr.columns.tolist())
+    for class_name, values in zip(corr.index, corr.to_numpy(dtype='float64')):
+        line_chart.add_yaxis(class_name, _to_chart_list(values, 3), symbol="circle",
+                             label_opts=opts.LabelOpts(is_show=False),
+                             emphasis_opts=opts.EmphasisOpts(focus='series'))
+    return line_chart.set_global_opts(
+        title_opts=opts.TitleOpts(title="各班级相邻学期名次的相关性 (Spearman)",
+                                  subtitle="越接近 1 表示班级内名次顺序越稳定"),
+        legend_opts=opts.LegendOpts(type_="scroll", pos_top="5%"),
+        yaxis_opts=opts.AxisOpts(type_="value", name="相关系数", min_=-1, max_=1),
+        tooltip_opts=opts.TooltipOpts(trigger="axis"),
+    )
+
+
+def render_rank_correlation_by_class(df, output_file="rank_correlation_by_class_line.html", progress=None,
+                                     cancel=None):
+    _require_classes(df)
+    _step(progress, cancel, 0.1, "整理成绩数据")
+    movement = grade_movement(df, with_classes=True)
+    if not movement.transitions:
+        raise ChartError("提示", "至少需要两个学期的名次才能计算相关性。", level='info')
+    _step(progress, cancel, 0.4, "按班级计算相关系数")
+    corr = movement.group_adjacent_correlation()
+    _step(progress, cancel, 0.6, "生成折线图")
+    line_chart = build_rank_correlation_line_by_class(corr)
+    _step(progress, cancel, 0.8, "写入 HTML")
+    return _finish(line_chart, output_file, f"各班级名次相关性折线图已生成：\n{output_file}")
+
+
+def dorm_graph_data_by_class(df, mode='auto', legend_top_k=DORM_LEGEND_TOP_K, other_label=OTHER_LABEL):
+    # 与 dorm_graph_data 相同的连线规则，但节点按班级着色 (同一寝室可能住着不同班级的同学)
+    valid = df.dropna(subset=['姓名', '寝室号'])
+    if valid.empty:
+        raise ChartError("提示", "没有有效的学生姓名和寝室号数据来构建关系图。", level='info')
+    class_codes, class_names = pd.factorize(valid[CLASS_COL].astype(str))
+    codes, legend = _legend_categories(class_names.tolist(), np.bincount(class_codes, minlength=len(class_names)),
+                                       legend_top_k, other_label)
+    class_codes = np.asarray(codes, dtype=object)[class_codes]
+    dorm_codes, dorm_names = pd.factorize(valid['寝室号'].astype(str))
+    order = np.argsort(dorm_codes, kind='stable')
+    bounds = np.cumsum(np.bincount(dorm_codes, minlength=len(dorm_names)))[:-1]
+    names = np.split(valid['姓名'].astype(str).to_numpy()[order], bounds)
+    classes = np.split(class_codes[order], bounds)
+    hub_category = len(legend) # 寝室中心节点单独一类
+    nodes_data, links_data = _dorm_nodes_links(
+        ((dorm, members.tolist(), codes.tolist()) for dorm, members, codes in zip(dorm_names.tolist(), names, classes)),
+        mode, hub_category,
+    )
+    categories = [opts.GraphCategory(name=name) for name in legend]
+    categories.append(opts.GraphCategory(name="寝室"))
+    return nodes_data, links_data, categories
+
+
+def render_dorm_network_by_class(df, output_file="dorm_by_class_graph.html", mode='auto',
+                                 legend_top_k=DORM_LEGEND_TOP_K, other_label=OTHER_LABEL, progress=None, cancel=None):
+    _require_columns(df, ['姓名', '寝室号'], "数据中缺少 '姓名' 或 '寝室号' 列！")
+    _require_classes(df)
+    _step(progress, cancel, 0.1, "构建节点与连线")
+    nodes_data, links_data, categories = dorm_graph_data_by_class(df, mode, legend_top_k, other_label)
+    _step(progress, cancel, 0.5, "生成关系图")
+    graph_chart = build_dorm_graph(nodes_data, links_data, categories, title="寝室关系图 (按班级着色)")
+    _step(progress, cancel, 0.7, "写入 HTML")
+    return _finish(graph_chart, output_file, f"按班级着色的寝室关系图已生成：\n{output_file}")
+
+
+CLASS_WORDCLOUD_SIZE = (400, 240) # 每个班级词云的宽、高
+CLASS_WORDCLOUD_CAPTION = 36      # 班级名所占的高度
+
+
+def render_wordcloud_by_class(df, output_file="motto_wordcloud_by_class.png", font_path=DEFAULT_FONT_PATH,
+                              tokenizer=None, preview_budget=None, progress=None, cancel=None):
+    # 每个班级一张小词云，拼成一张网格图片 (分词结果在各班级之间共用缓存，各班级复用同一个渲染器)
+    # 每格都很小，直接生成，不使用预览 (preview_budget 只为与 render_wordcloud 的参数一致)
+    _require_columns(df, ['人生格言'], "数据中缺少 '人生格言' 列！")
+    _require_classes(df)
+    renderer = _wordcloud_renderer(font_path)
+    Image = timed_import('PIL.Image')
+    ImageDraw = timed_import('PIL.ImageDraw')
+    ImageFont = timed_import('PIL.ImageFont')
+
+    groups = list(df.groupby(CLASS_COL, observed=True, sort=False))
+    cols, rows = _grid_shape(len(groups))
+    cell_w, cell_h = CLASS_WORDCLOUD_SIZE
+    cell_h += CLASS_WORDCLOUD_CAPTION
+    canvas = Image.new('RGB', (cols * cell_w, rows * cell_h), 'white')
+    draw = ImageDraw.Draw(canvas)
+    caption_font = ImageFont.truetype(renderer.font, 20)
+    skipped = []
+    for i, (class_name, group) in enumerate(groups):
+        _step(progress, cancel, 0.1 + 0.8 * i / len(groups), f"生成词云 ({i}/{len(groups)})")
+        row, col = divmod(i, cols)
+        x, y = col * cell_w, row * cell_h
+        draw.text((x + 10, y + 6), str(class_name), fill='black', font=caption_font)
+        try:
+            frequencies = motto_frequencies(group, tokenizer)
+        except ChartError:
+            skipped.append(str(class_name))
+            continue
+        try:
+            cloud = renderer.render_image(frequencies, CLASS_WORDCLOUD_SIZE, scale=1)
+        except (RuntimeError, OSError) as e:
+            raise _font_error(e)
+        canvas.paste(cloud, (x, y + CLASS_WORDCLOUD_CAPTION))
+
+    if len(skipped) == len(groups):
+        raise ChartError("提示", "没有有效的 '人生格言' 数据可供生成词云。", level='info')
+    notices = []
+    if skipped:
+        notices.append(('info', "提示", f"以下班级没有足够的格言内容，已留空: {'、'.join(skipped)}"))
+    image = np.asarray(canvas)
+    _step(progress, cancel, 0.9, "保存图片")
+    if output_file is None:
+        return ChartResult(None, "各班级词云图已生成。", notices=notices, image=image)
+    try:
+        canvas.save(output_file)
+    except Exception as save_err:
+        notices.append(('warning', "保存失败", f"词云图已显示，但保存到文件失败:\n{save_err}"))
+        return ChartResult(None, "各班级词云图已生成。", notices=notices, image=image)
+    return ChartResult(output_file, f"各班级词云图已生成并显示。\n图片已保存为: {output_file}",
+                       notices=notices, image=image)
+
+
+# --- 图表注册表 (供批处理等按名称调用) ---
+# 键 -> (生成函数, 默认输出文件名, 图表名称)
+CHARTS = {
+    'gender': (render_gender, "gender_distribution_pie.html", "性别分布饼图"),
+    'province': (render_province, "province_distribution_map.html", "省份分布地图"),
+    'city': (render_city, "city_distribution_bar.html", "城市分布柱状图"),
+    'grades': (render_grades, "grade_trends_line.html", "成绩趋势折线图"),
+    'dorm': (render_dorm_network, "dorm_relationship_graph.html", "寝室关系图"),
+    'wordcloud': (render_wordcloud, "motto_wordcloud.png", "词云图"),
+    'movers': (render_grade_movers, "grade_movers_bar.html", "名次进退步排行"),
+    'rank_corr': (render_rank_correlation, "rank_correlation_heatmap.html", "学期名次相关性热力图"),
+}
+
+# 班级对比视图：键与 CHARTS 相同
+CLASS_CHARTS = {
+    'gender': (render_gender_by_class, "gender_by_class_pie.html", "各班级性别分布饼图"),
+    'province': (render_province_by_class, "province_by_class_map.html", "各班级省份分布地图"),
+    'city': (render_city_by_class, "city_by_class_bar.html", "各班级城市分布柱状图"),
+    'grades': (render_grades_by_class, "grade_by_class_line.html", "各班级成绩趋势折线图"),
+    'dorm': (render_dorm_network_by_class, "dorm_by_class_graph.html", "按班级着色的寝室关系图"),
+    'wordcloud': (render_wordcloud_by_class, "motto_wordcloud_by_class.png", "各班级词云图"),
+    'movers': (render_grade_movers_by_class, "grade_movers_by_class_bar.html", "各班级名次变化对比图"),
+    'rank_corr': (render_rank_correlation_by_class, "rank_correlation_by_class_line.html", "各班级名次相关性折线图"),
+}
+
+# 每个图表实际读取的列；只有这些列或生成选项变化时才需要重新生成
+CHART_INPUT_COLUMNS = {
+    'gender': ['性别'],
+    'province': ['生源省份'],
+    'city': ['生源城市'],
+    'grades': ['姓名'] + RANK_COLS,
+    'dorm': ['姓名', '寝室号'],
+    'wordcloud': ['人生格言'],
+    'movers': ['姓名'] + RANK_COLS,
+    'rank_corr': ['姓名'] + RANK_COLS,
+}
+
+
+# 可以直接读取 StudentSummary 的图表
+SUMMARY_CHARTS = {'gender', 'province', 'city', 'grades', 'dorm'}
+CLASS_SUMMARY_CHARTS = {'gender', 'province', 'city'}
+
+
+def charts_affected_by(columns, by_class=False):
+    # 输入列中有任何一列发生变化的图表 (文件局部修改后只需重新生成这些图表，见 roster_watch.py)
+    columns = set(columns)
+    return [key for key, input_columns in CHART_INPUT_COLUMNS.items()
+            if columns.intersection(input_columns) or (by_class and CLASS_COL in columns)]
+
+
+# 只影响生成过程、不影响最终文件内容的选项，不计入缓存键
+RENDER_ONLY_OPTIONS = ('preview_budget',)
+
+# 修改图表的生成逻辑 (包括 dorm_layout.py、wordcloud_renderer.py 中影响输出的部分) 时递增，
+# 旧版本生成的缓存文件和看板的 ETag 随之失效
+CHART_RENDER_VERSION = 1
+
+# render_* 中不属于生成选项的参数
+_NON_OPTION_PARAMS = ('df', 'output_file', 'summary', 'progress', 'cancel') + RENDER_ONLY_OPTIONS
+
+
+def render_settings(key, by_class=False, options=None, summary=None):
+    # 决定图表内容的全部设置：版本号、生成函数各参数的默认值 (被 options 覆盖)，以及本模块的
+    # 调节常量 (如 CITY_TOP_K、GRADE_DETAIL_MAX_STUDENTS)；任何一项变化时缓存的结果都不再复用
+    # summary 中近似计数的列 (StudentSummary(sketch_cols=...)) 也计入：同一份数据的近似图表与精确图表不同
+    render = (CLASS_CHARTS if by_class else CHARTS)[key][0]
+    resolved = {name: param.default for name, param in inspect.signature(render).parameters.items()
+                if param.default is not inspect.Parameter.empty and name not in _NON_OPTION_PARAMS}
+    resolved.update((name, value) for name, value in (options or {}).items() if name not in _NON_OPTION_PARAMS)
+    constants = {name: value for name, value in globals().items()
+                 if name.isupper() and isinstance(value, (bool, int, float, str, tuple))}
+    settings = {'version': CHART_RENDER_VERSION, 'options': resolved, 'constants': constants}
+    if summary is not None and key in (CLASS_SUMMARY_CHARTS if by_class else SUMMARY_CHARTS):
+        approximate = [col for col in CHART_INPUT_COLUMNS[key] if summary.is_approximate(col)]
+        if approximate: # 精确的汇总不改变设置，与不传 summary 时共用缓存
+            settings['approximate'] = approximate
+    return settings
+
+
+def render_chart(key, df, output_file=None, cache=None, progress=None, cancel=None, summary=None,
+                 by_class=False, **options):
+    # 按名称生成图表；cache (ArtifactCache) 不为空时，数据和选项都未变化则直接复用上次的文件
+    # options 为传给 render_* 的生成选项 (会计入缓存键)；精确的 summary 只是加速统计，不影响结果
+    # (近似计数的 summary 会计入缓存键，见 render_settings)
+    # by_class=True 时生成按班级拆分/对比的视图 (CLASS_CHARTS)
+    # 打开 perf_trace 时记录总耗时和各阶段 (每次汇报进度即进入下一阶段) 的耗时
+    label = (CLASS_CHARTS if by_class else CHARTS)[key][2]
+    with perf_trace.span(label, cat='chart', rows=len(df)) as trace:
+        result = _render_chart(key, df, output_file, cache, trace.wrap_progress(progress), cancel, summary,
+                               by_class, options)
+        if result.output_file:
+            trace.set(output_bytes=os.path.getsize(result.output_file), from_cache=result.from_cache)
+    return result
+
+
+def chart_view(key, df, summary=None, by_class=False, progress=None, cancel=None, **options):
+    # 与 render_chart 相同的生成逻辑，但不写文件：返回的 ChartResult 带有图表对象 (词云为像素数组)
+    registry, summary_charts = (CLASS_CHARTS, CLASS_SUMMARY_CHARTS) if by_class else (CHARTS, SUMMARY_CHARTS)
+    if summary is not None and key in summary_charts:
+        options = dict(options, summary=summary)
+    return registry[key][0](df, output_file=None, progress=progress, cancel=cancel, **options)
+
+
+def _render_chart(key, df, output_file, cache, progress, cancel, summary, by_class, options):
+    if by_class:
+        render, default_output, label = CLASS_CHARTS[key]
+        input_columns = [CLASS_COL] + CHART_INPUT_COLUMNS[key]
+        uses_summary = key in CLASS_SUMMARY_CHARTS
+    else:
+        render, default_output, label = CHARTS[key]
+        input_columns = CHART_INPUT_COLUMNS[key]
+        uses_summary = key in SUMMARY_CHARTS
+    output_file = output_file or default_output
+    if summary is not None and uses_summary:
+        options_for_render = dict(options, summary=summary)
+    else:
+        options_for_render = options
+    if cache is None:
+        return render(df, output_file=output_file, progress=progress, cancel=cancel, **options_for_render)
+
+    _step(progress, cancel, 0.05, "检查图表缓存")
+    cache_options = render_settings(key, by_class, options, summary)
+    if by_class:
+        cache_options['by_class'] = True
+    if output_file.endswith('.html'):
+        cache_options.update(chart_output.current().cache_token(output_file))
+    digest = artifact_key(key, df, input_columns, cache_options)
+    if cache.fetch(digest, output_file):
+        chart_output.restore_cached(output_file)
+        return ChartResult(output_file, f"{label}未发生变化，已直接打开上次生成的文件：\n{output_file}", from_cache=True)
+
+    result = render(df, output_file=output_file, progress=progress, cancel=cancel, **options_for_render)
+    if result.output_file:
+        cache.store(digest, result.output_file)
+    elif result.pending is not None:
+        # 文件在后台写完后再存入缓存
+        def store_when_written(future):
+            if not future.cancelled() and future.exception() is None:
+                cache.store(digest, future.result())
+
+        result.pending.add_done_callback(store_when_written)
+    return result
@@ -0,0 +1,86 @@
+"""同时加载多个班级的学生信息表，并合并为一张带 班级 列的表。
+
+读取和清洗 Excel 主要消耗 CPU 且受 GIL 限制，所以每个表在进程池中独立加载，
+总耗时随 CPU 核数而不是文件数增长。每行记上来源班级 (默认取文件名)，之后
+各图表可以按班级拆分或对比 (见 charts.py 中的 *_by_class)。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from job_scheduler import JobCancelled
+from student_loader import load_student_data, merge_rosters, tag_class
+
+
+def class_names_for(filepaths):
+    # 班级名取文件名 (不含扩展名)；重名时依次加上 (2)、(3) ...
+    names, seen = [], {}
+    for path in filepaths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(stem if seen[stem] == 1 else f"{stem}({seen[stem]})")
+    return names
+
+
+def load_class_roster(filepath, class_name, cache=None, streaming=False):
+    # 在工作进程中执行：加载一个表并标记班级；返回 (DataFrame, 是否命中缓存)
+    df, from_cache = load_student_data(filepath, cache=cache, streaming=streaming)
+    return tag_class(df, class_name), from_cache
+
+
+def load_class_rosters(filepaths, cache=None, streaming=False, workers=None, on_roster=None,
+                       progress=None, cancel=None):
+    # 返回 (合并后的 DataFrame, 每个文件的加载记录)；个别文件失败时跳过并记录原因，全部失败时抛出 ValueError
+    # on_roster(df) 在调用方进程中按文件顺序收到每个班级的表 (用于累加 StudentSummary)；
+    # 前面的文件加载完之前，后面先完成的表暂时保留，不必等待全部完成
+    class_names = class_names_for(filepaths)
+    records = [{'roster': path, '班级': name} for path, name in zip(filepaths, class_names)]
+    frames = [None] * len(filepaths)
+    delivered = 0
+
+    def finish(i, load):
+        nonlocal delivered
+        try:
+            df, from_cache = load()
+        except Exception as e:
+            records[i].update(status='error', message=f"{type(e).__name__}: {e}")
+        else:
+            records[i].update(status='ok', rows=len(df), cached=from_cache)
+            frames[i] = df
+        while delivered < len(records) and 'status' in records[delivered]:
+            if on_roster is not None and frames[delivered] is not None:
+                on_roster(frames[delivered])
+            delivered += 1
+
+    def report(done):
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled()
+        if progress is not None:
+            progress(0.9 * done / len(filepaths), f"已加载 {done}/{len(filepaths)} 个班级")
+
+    workers = min(workers or os.cpu_count() or 1, len(filepaths))
+    if workers <= 1:
+        # 只有一个文件时不启动进程池
+        for i, (path, name) in enumerate(zip(filepaths, class_names)):
+            finish(i, lambda: load_class_roster(path, name, cache, streaming))
+            report(i + 1)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(load_class_roster, path, name, cache, streaming): i
+                for i, (path, name) in enumerate(zip(filepaths, class_names))
+            }
+            try:
+                for done, future in enumerate(as_completed(futures), 1):
+                    finish(futures[future], future.result)
+                    report(done)
+            except JobCancelled:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    loaded = [df for df in frames if df is not None]
+    if not loaded:
+        details = "\n".join(f"{os.path.basename(r['roster'])}: {r['message']}" for r in records)
+        raise ValueError(f"所有文件均加载失败:\n{details}")
+    if progress is not None:
+        progress(0.95, "合并各班级数据")
+    return merge_rosters(loaded), records
@@ -0,0 +1,575 @@
+"""本地图表看板：在 localhost 上用 asyncio 提供一个页面，集中显示六种图表。
+
+逐个按钮生成图表时，每次都要写一个 HTML 文件并打开一个新的浏览器标签页。看板
+只在浏览器请求时才根据已加载的数据生成图表的 ECharts 选项 (与 GUI 各按钮使用
+同一套 charts.render_* 逻辑，只是不写文件)，结果按数据内容缓存在内存中并带有
+ETag：刷新页面或其他人打开同一看板时，数据未变化的图表直接返回 304。同一台
+机器上的多个用户打开同一个地址，看到的是同一份已加载的数据。
+
+    python dashboard_server.py 班级1.xlsx [班级2.xlsx ...] --port 8765 --open
+    python dashboard_server.py 班级1.xlsx --watch   # 文件被修改后增量更新 (见 roster_watch.py)
+
+GUI 中点击 "打开本地看板" 时在后台线程中启动同一个服务，重新加载数据后看板自动更新。
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import chart_output
+import charts
+import perf_trace
+from artifact_cache import artifact_key
+from charts import ChartError
+from startup_profile import timed_import
+from student_loader import CLASS_COL
+
+DEFAULT_HOST = '127.0.0.1' # 只接受本机的连接
+DEFAULT_PORT = 8765
+KEEPALIVE_TIMEOUT = 15     # 空闲的长连接保持的秒数
+MAX_HEADER_LINES = 100
+GZIP_MIN_BYTES = 1024      # 小于该大小的响应不压缩
+DATA_POLL_MS = 5000        # 页面检查数据是否已重新加载的间隔
+WATCH_INTERVAL = 2         # --watch 时检查文件的间隔 (秒)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>学生信息看板</title>
+{scripts}
+<style>
+body {{ font-family: sans-serif; margin: 0; background: #f4f5f7; }}
+header {{ padding: 10px 16px; background: #fff; border-bottom: 1px solid #ddd; display: flex; gap: 16px; align-items: center; }}
+header .title {{ font-weight: bold; }}
+main {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(560px, 1fr)); gap: 12px; padding: 12px; }}
+.card {{ background: #fff; border: 1px solid #ddd; border-radius: 4px; padding: 8px; }}
+.card h2 {{ font-size: 15px; margin: 0 0 4px; }}
+.card .note {{ color: #666; font-size: 13px; min-height: 1em; white-space: pre-line; }}
+.card .chart {{ width: 100%; height: 520px; overflow: auto; }}
+.card img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<header>
+<span class="title" id="title">尚未加载数据</span>
+<label><input type="checkbox" id="by-class"> 按班级对比</label>
+<button id="refresh">刷新</button>
+</header>
+<main id="cards"></main>
+<script>
+const VIEWS = {views};
+let token = null;
+
+function card(view) {{
+  let el = document.getElementById('card-' + view.key);
+  if (!el) {{
+    el = document.createElement('div');
+    el.className = 'card';
+    el.id = 'card-' + view.key;
+    el.innerHTML = '<h2></h2><div class="note"></div><div class="chart"></div>';
+    document.getElementById('cards').appendChild(el);
+  }}
+  return el;
+}}
+
+async function loadChart(view) {{
+  const el = card(view), note = el.querySelector('.note'), box = el.querySelector('.chart');
+  const byClass = document.getElementById('by-class').checked;
+  el.querySelector('h2').textContent = byClass ? view.class_label : view.label;
+  note.textContent = '生成中…';
+  // 浏览器按 ETag 重新验证，数据未变化时服务器返回 304
+  const response = await fetch('/api/chart/' + view.key + (byClass ? '?by_class=1' : ''));
+  if ((response.headers.get('Content-Type') || '').startsWith('image/')) {{
+    echarts.dispose(box);
+    box.innerHTML = '';
+    const img = document.createElement('img');
+    img.src = URL.createObjectURL(await response.blob());
+    box.appendChild(img);
+    note.textContent = '';
+    return;
+  }}
+  const data = await response.json();
+  if (data.error) {{
+    echarts.dispose(box);
+    box.innerHTML = '';
+    note.textContent = data.error.message;
+    return;
+  }}
+  if (box.querySelector('img')) box.innerHTML = '';
+  const chart = echarts.getInstanceByDom(box) || echarts.init(box);
+  chart.setOption(data.options, true);
+  note.textContent = data.notices.join('\\n');
+}}
+
+function loadAll() {{
+  VIEWS.forEach(view => loadChart(view).catch(e => {{ card(view).querySelector('.note').textContent = '加载失败: ' + e; }}));
+}}
+
+async function checkData() {{
+  // 数据重新加载后 (token 变化) 刷新全部图表
+  try {{
+    const info = await (await fetch('/api/data')).json();
+    document.getElementById('title').textContent = info.title ? info.title + ' (共 ' + info.rows + ' 条记录)' : '尚未加载数据';
+    const byClass = document.getElementById('by-class');
+    byClass.disabled = !info.has_classes;
+    if (!info.has_classes) byClass.checked = false;
+    if (info.token && info.token !== token) {{
+      if (token === null && info.has_classes) byClass.checked = true;
+      token = info.token;
+      loadAll();
+    }}
+  }} catch (e) {{}}
+}}
+
+document.getElementById('by-class').addEventListener('change', loadAll);
+document.getElementById('refresh').addEventListener('click', loadAll);
+window.addEventListener('resize', () => document.querySelectorAll('.chart').forEach(box => {{
+  const chart = echarts.getInstanceByDom(box);
+  if (chart) chart.resize();
+}}));
+checkData();
+setInterval(checkData, {poll_ms});
+</script>
+</body>
+</html>
+"""
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+CONTENT_TYPES = {'.js': 'application/javascript; charset=utf-8', '.json': 'application/json; charset=utf-8'}
+
+
+class Response:
+    def __init__(self, status, body=b'', content_type='text/plain; charset=utf-8', etag=None,
+                 cache_control='no-cache', gzipped=None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.cache_control = cache_control # no-cache：每次都用 ETag 向服务器确认
+        self._gzipped = gzipped            # 预压缩的内容；需要时才压缩，压缩结果随缓存的响应一起保留
+
+    def gzipped(self):
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+    def compressible(self):
+        return len(self.body) >= GZIP_MIN_BYTES and not self.content_type.startswith('image/')
+
+
+def json_response(obj, status=200, etag=None):
+    body = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return Response(status, body, CONTENT_TYPES['.json'], etag)
+
+
+def error_response(status, message):
+    return json_response({'error': {'title': "错误", 'message': message, 'level': 'error'}}, status)
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match or etag is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f"W/{etag}" in tags
+
+
+class DashboardData:
+    # 看板当前显示的一份数据；token 由数据内容决定，重新加载同一文件时各图表的 ETag 不变
+    def __init__(self, df, summary=None, title="", font_path=charts.DEFAULT_FONT_PATH):
+        self.df = df
+        self.summary = summary
+        self.title = title
+        self.font_path = font_path
+        self.has_classes = CLASS_COL in df.columns
+        self.token = artifact_key('dashboard', df, list(df.columns),
+                                  {'font_path': font_path, 'version': charts.CHART_RENDER_VERSION})[:16]
+        self.chart_tokens = {} # (图表, 是否按班级) -> 沿用的上一份数据的 token (输入列没有变化的图表)
+
+    def chart_token(self, key, by_class):
+        return self.chart_tokens.get((key, by_class), self.token)
+
+    def chart_options(self, key):
+        return {'font_path': self.font_path} if key == 'wordcloud' else {}
+
+    def chart_etag(self, key, by_class):
+        # 数据内容 + 图表的全部生成设置 (版本号、解析后的默认选项、汇总中近似计数的列，见
+        # charts.render_settings)：升级或修改默认值后，即使数据不变，浏览器也会重新获取
+        settings = charts.render_settings(key, by_class, self.chart_options(key), self.summary)
+        digest = hashlib.sha256(json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str)
+                                .encode('utf-8')).hexdigest()[:8]
+        return f'"{self.chart_token(key, by_class)}-{digest}-{key}{"-class" if by_class else ""}"'
+
+    def info(self):
+        return {'title': self.title, 'rows': len(self.df), 'has_classes': self.has_classes, 'token': self.token}
+
+
+class DashboardServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, assets_dir=None, workers=2):
+        # assets_dir 不为空时 ECharts 脚本从本地资源目录提供 (见 chart_output.py)，否则从 CDN 加载
+        self.host = host
+        self.port = port
+        self.assets_dir = os.path.abspath(assets_dir) if assets_dir else None
+        self.data = None
+        self._cache = {}   # (ETag, 图表, 是否按班级) -> Response，只保留当前数据的结果
+        self._pending = {} # 同上 -> 正在生成的 Future，同一图表的并发请求只生成一次
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="dashboard")
+        self._page = None
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host = 'localhost' if self.host in ('127.0.0.1', '0.0.0.0', '') else self.host
+        return f"http://{host}:{self.port}/"
+
+    def publish(self, df, summary=None, title="", font_path=charts.DEFAULT_FONT_PATH, changed_columns=None):
+        # 更换看板显示的数据 (可在任意线程调用)；已打开的页面会在几秒内自动刷新
+        # changed_columns：与上一份数据相比内容有变化的列 (见 roster_watch.py)，
+        # 输入列都没有变化的图表沿用已生成的结果和 ETag，浏览器得到 304
+        data = DashboardData(df, summary, title, font_path)
+        previous = self.data
+        if changed_columns is not None and previous is not None and previous.font_path == font_path:
+            for by_class in (False, True):
+                affected = charts.charts_affected_by(changed_columns, by_class)
+                for key in charts.CHARTS:
+                    if key not in affected:
+                        data.chart_tokens[(key, by_class)] = previous.chart_token(key, by_class)
+        self.data = data
+        return data
+
+    # --- 启动和停止 ---
+
+    async def serve(self, ready=None):
+        if self.assets_dir:
+            chart_output.ensure_assets(self.assets_dir, list(chart_output.DEFAULT_ASSETS))
+        self._loop = asyncio.get_running_loop()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1] # port=0 时由系统分配
+        if ready is not None:
+            ready.set()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError: # stop()
+            pass
+
+    def start_in_thread(self):
+        # GUI 使用：在后台线程中运行事件循环，启动失败 (如端口被占用) 时在调用方抛出异常
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            try:
+                asyncio.run(self.serve(ready))
+            except BaseException as e:
+                errors.append(e)
+                ready.set()
+
+        self._thread = threading.Thread(target=run, name="dashboard-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+        return self.url
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- HTTP ---
+
+    async def _read_headers(self, reader):
+        headers = {}
+        for _ in range(MAX_HEADER_LINES):
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        raise ValueError("请求头过长")
+
+    async def _handle_connection(self, reader, writer):
+        # 支持 HTTP/1.1 长连接：同一连接上依次处理多个请求，空闲超时或客户端要求时关闭
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                headers = await self._read_headers(reader)
+                parts = request_line.decode('latin-1').split()
+                if len(parts) != 3:
+                    self._write(writer, error_response(400, "无法解析的请求"), 'GET', headers, keep_alive=False)
+                    break
+                method, target, version = parts
+                try:
+                    response = await self._dispatch(method, target, headers)
+                except Exception as e:
+                    response = error_response(500, f"{type(e).__name__}: {e}")
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                self._write(writer, response, method, headers, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    def _write(self, writer, response, method, headers, keep_alive):
+        body = response.body
+        lines = [f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}",
+                 f"Content-Type: {response.content_type}",
+                 f"Cache-Control: {response.cache_control}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if response.etag:
+            lines.append(f"ETag: {response.etag}")
+        if response.compressible():
+            lines.append("Vary: Accept-Encoding")
+            if 'gzip' in headers.get('accept-encoding', '') and response.status != 304:
+                body = response.gzipped()
+                lines.append("Content-Encoding: gzip")
+        if response.status == 304:
+            body = b''
+        lines.append(f"Content-Length: {len(body)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+        if method != 'HEAD':
+            writer.write(body)
+
+    async def _dispatch(self, method, target, headers):
+        if method not in ('GET', 'HEAD'):
+            return error_response(405, f"不支持的请求方法: {method}")
+        url = urlsplit(target)
+        path = unquote(url.path)
+        if path in ('/', '/index.html'):
+            response = self._page_response()
+        elif path == '/api/data':
+            data = self.data
+            response = json_response(data.info() if data else {'title': "", 'rows': 0, 'has_classes': False, 'token': None})
+        elif path.startswith('/api/chart/'):
+            by_class = parse_qs(url.query).get('by_class', ['0'])[0] not in ('0', '')
+            response = await self._chart_response(path[len('/api/chart/'):], by_class, headers)
+        elif path.startswith('/assets/') and self.assets_dir:
+            response = self._asset_response(path[len('/assets/'):])
+        else:
+            response = error_response(404, f"找不到: {path}")
+        if response.status == 200 and _etag_matches(headers.get('if-none-match'), response.etag):
+            return Response(304, etag=response.etag, content_type=response.content_type,
+                            cache_control=response.cache_control)
+        return response
+
+    # --- 页面和资源 ---
+
+    def _page_response(self):
+        if self._page is None:
+            if self.assets_dir:
+                sources = [f"/assets/{chart_output.asset_path(dep)}" for dep in chart_output.DEFAULT_ASSETS]
+            else:
+                from pyecharts.globals import CurrentConfig
+                sources = [CurrentConfig.ONLINE_HOST + chart_output.asset_path(dep) for dep in chart_output.DEFAULT_ASSETS]
+            views = [{'key': key, 'label': label, 'class_label': charts.CLASS_CHARTS[key][2]}
+                     for key, (_, _, label) in charts.CHARTS.items()]
+            body = PAGE_TEMPLATE.format(
+                scripts="\n".join(f'<script src="{src}"></script>' for src in sources),
+                views=json.dumps(views, ensure_ascii=False), poll_ms=DATA_POLL_MS,
+            ).encode('utf-8')
+            etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+            self._page = Response(200, body, 'text/html; charset=utf-8', etag)
+        return self._page
+
+    def _asset_response(self, relpath):
+        path = os.path.abspath(os.path.join(self.assets_dir, relpath))
+        if not path.startswith(self.assets_dir + os.sep) or not os.path.isfile(path):
+            return error_response(404, f"找不到资源: {relpath}")
+        with open(path, 'rb') as f:
+            body = f.read()
+        gzipped = None
+        if os.path.exists(path + '.gz'): # chart_output 的 gzip 选项预先写好的压缩文件
+            with open(path + '.gz', 'rb') as f:
+                gzipped = f.read()
+        stat = os.stat(path)
+        etag = f'"{stat.st_size:x}-{int(stat.st_mtime):x}"'
+        content_type = CONTENT_TYPES.get(os.path.splitext(path)[1], 'application/octet-stream')
+        return Response(200, body, content_type, etag, cache_control='max-age=86400', gzipped=gzipped)
+
+    # --- 图表 ---
+
+    async def _chart_response(self, key, by_class, headers):
+        data = self.data
+        if data is None:
+            return error_response(503, "尚未加载数据")
+        if key not in charts.CHARTS:
+            return error_response(404, f"未知的图表: {key}")
+        # ETag 只由数据内容和图表的生成设置决定：命中时不必生成图表
+        etag = data.chart_etag(key, by_class)
+        if _etag_matches(headers.get('if-none-match'), etag):
+            return Response(304, etag=etag)
+
+        # 按 ETag 而不是数据 token 缓存：同一份数据换成近似计数的汇总时不会返回旧结果
+        cache_key = (etag, key, by_class)
+        response = self._cache.get(cache_key)
+        if response is not None:
+            return response
+        future = self._pending.get(cache_key)
+        if future is None:
+            future = self._loop.run_in_executor(self._executor, self._build, data, key, by_class, etag)
+            self._pending[cache_key] = future
+            future.add_done_callback(lambda f: self._store(cache_key, f))
+        # shield：某个浏览器断开连接时不取消其他请求也在等待的生成任务
+        return await asyncio.shield(future)
+
+    def _store(self, cache_key, future):
+        self._pending.pop(cache_key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        data = self.data
+        if data is None or cache_key[0] != data.chart_etag(*cache_key[1:]): # 生成期间数据已更换
+            return
+        current = {k: data.chart_etag(*k[1:]) for k in self._cache}
+        if any(k[0] != etag for k, etag in current.items()):
+            self._cache = {k: v for k, v in self._cache.items() if k[0] == current[k]}
+        self._cache[cache_key] = future.result()
+
+    def _build(self, data, key, by_class, etag):
+        # 在工作线程中执行；数据不足等 ChartError 也作为结果缓存 (数据不变时结果不变)
+        options = data.chart_options(key)
+        label = (charts.CLASS_CHARTS if by_class else charts.CHARTS)[key][2]
+        with perf_trace.span(f"看板: {label}", cat='chart', rows=len(data.df)) as trace:
+            try:
+                result = charts.chart_view(key, data.df, data.summary, by_class, progress=trace.wrap_progress(None),
+                                           **options)
+            except ChartError as e:
+                return json_response({'error': {'title': e.title, 'message': e.message, 'level': e.level}}, etag=etag)
+            if result.chart is None: # 词云
+                buffer = io.BytesIO()
+                timed_import('PIL.Image').fromarray(result.image).save(buffer, format='PNG')
+                response = Response(200, buffer.getvalue(), 'image/png', etag)
+            else:
+                notices = [message for _, _, message in result.notices]
+                response = json_response({'options': chart_output.compact_options(result.chart), 'notices': notices},
+                                         etag=etag)
+            trace.set(output_bytes=len(response.body))
+        return response
+
+
+def load_rosters(paths, use_cache=True):
+    # 返回 (DataFrame, StudentSummary, 标题)；多个文件时按班级合并 (见 class_rosters.py)
+    from class_rosters import load_class_rosters
+    from roster_cache import RosterCache
+    from student_loader import load_student_data
+    from student_summary import StudentSummary
+
+    cache = RosterCache() if use_cache else None
+    summary = StudentSummary()
+    if len(paths) == 1:
+        df, _ = load_student_data(paths[0], cache=cache, on_chunk=summary.update)
+        return df, summary, os.path.basename(paths[0])
+    df, records = load_class_rosters(paths, cache=cache, on_roster=summary.update)
+    for r in records:
+        if r['status'] == 'error':
+            print(f"警告: 跳过 {r['roster']}: {r['message']}", file=sys.stderr)
+    loaded = sum(r['status'] != 'error' for r in records)
+    return df, summary, f"{loaded} 个班级"
+
+
+def watch_roster(server, filepath, title, font_path, interval=WATCH_INTERVAL):
+    # 完整加载一次后在后台线程中监视文件，修改后增量更新并重新发布
+    from roster_watch import RosterWatcher
+
+    watcher = RosterWatcher(filepath)
+    result = watcher.start()
+    server.publish(result.df, result.summary, title, font_path)
+
+    def loop(df, summary):
+        while True:
+            time.sleep(interval)
+            if not watcher.changed():
+                continue
+            try:
+                result = watcher.reload(df, summary)
+            except Exception as e: # 文件可能还没保存完，下次再试
+                print(f"警告: 读取修改后的文件失败，稍后重试: {e}", file=sys.stderr)
+                continue
+            watcher.accept(result)
+            df, summary = result.df, result.summary
+            print(f"{os.path.basename(filepath)}: {result.diff.describe()}")
+            if not result.diff.is_empty():
+                server.publish(df, summary, title, font_path, changed_columns=result.diff.changed_columns)
+
+    threading.Thread(target=loop, args=(result.df, result.summary), name="roster-watch", daemon=True).start()
+    return result.df
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="在本机启动学生信息图表看板")
+    parser.add_argument('rosters', nargs='+', help="学生信息表 (.xlsx / .csv / .parquet，多个文件时按班级合并)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f"监听地址 (默认 {DEFAULT_HOST}，只允许本机访问)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"端口 (默认 {DEFAULT_PORT}，0 表示自动选择)")
+    parser.add_argument('--font-path', default=charts.DEFAULT_FONT_PATH, help="词云使用的中文字体文件")
+    parser.add_argument('--assets-dir', default=None,
+                        help="从本地目录提供 ECharts 脚本 (内网使用，见 chart_output.py)；默认从 CDN 加载")
+    parser.add_argument('--no-cache', action='store_true', help="不读写已清洗数据的缓存")
+    parser.add_argument('--open', action='store_true', help="启动后在浏览器中打开看板")
+    parser.add_argument('--watch', action='store_true', help="监视文件，修改后增量更新看板 (只支持单个文件)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.watch and len(args.rosters) != 1:
+        print("错误: --watch 只支持单个文件", file=sys.stderr)
+        return 2
+    server = DashboardServer(args.host, args.port, args.assets_dir)
+    try:
+        if args.watch:
+            df = watch_roster(server, args.rosters[0], os.path.basename(args.rosters[0]), args.font_path)
+        else:
+            df, summary, title = load_rosters(args.rosters, use_cache=not args.no_cache)
+            server.publish(df, summary, title, args.font_path)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+
+    async def run():
+        ready = asyncio.Event()
+        task = asyncio.create_task(server.serve(ready))
+        ready_task = asyncio.create_task(ready.wait())
+        # 启动失败 (如端口被占用) 时 ready 不会被设置：同时等待 serve()，由它抛出异常
+        await asyncio.wait({task, ready_task}, return_when=asyncio.FIRST_COMPLETED)
+        if not ready.is_set():
+            ready_task.cancel()
+            await task
+            return
+        print(f"看板已启动: {server.url}  (共 {len(df)} 条记录，按 Ctrl+C 退出)")
+        if args.open:
+            webbrowser.open(server.url)
+        await task
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
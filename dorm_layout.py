@@ -0,0 +1,121 @@
+"""寝室关系图的节点坐标：在 Python 中预先算好，图表以 layout="none" 直接显示。
+
+浏览器中的力引导布局在几千个节点时要模拟很久，而且每次打开的结果都不一样。这里改为
+确定性的 "按寝室成簇" 布局：
+
+  * 每个寝室是一簇：人数不多时成员均匀排在一个圆上，人数多时按葵花籽螺旋排成圆盘，
+    寝室中心节点 (hub) 放在圆心；
+  * 各簇按顺序逐行排列 (行宽按总面积取接近图表宽高比的值)，同一楼栋的寝室相邻，
+    换楼栋时多留一段空隙；
+  * 所有成员的坐标用 NumPy 一次算出，只有逐簇排列的一步按寝室循环。
+
+布局只取决于各寝室的名称、人数和是否使用中心节点，结果按这些内容的哈希缓存在内存中
+(同一份数据反复打开、看板和 GUI 同时使用时只计算一次)。
+"""
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+from filter_index import dorm_building
+from startup_profile import lazy_module
+
+np = lazy_module('numpy')
+
+NODE_SPACING = 24     # 同一寝室相邻成员之间的距离
+CLUSTER_GAP = 18      # 相邻寝室之间的空隙
+BUILDING_GAP = 60     # 换楼栋时额外的空隙
+RING_MAX_SIZE = 12    # 人数不超过该值的寝室排成一个圆，更多时排成螺旋圆盘
+ASPECT_RATIO = 1.4    # 整体的宽高比 (与图表画布接近)
+CACHE_SIZE = 8        # 内存中保留的布局数
+
+_GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def cluster_radii(sizes):
+    # 每个寝室所占圆的半径
+    sizes = np.asarray(sizes, dtype='float64')
+    ring = np.maximum(NODE_SPACING * sizes / (2 * math.pi), NODE_SPACING * 0.6)
+    disc = NODE_SPACING * 0.55 * np.sqrt(sizes + 1)
+    radii = np.where(sizes <= RING_MAX_SIZE, ring, disc)
+    return np.where(sizes <= 1, NODE_SPACING * 0.3, radii)
+
+
+def pack_clusters(radii, buildings):
+    # 各簇按顺序逐行排列；返回圆心坐标 (cx, cy)
+    cells = 2 * radii + CLUSTER_GAP
+    row_width = max(math.sqrt(float((cells ** 2).sum()) * ASPECT_RATIO), float(cells.max()))
+    cx, cy = np.empty(len(radii)), np.empty(len(radii))
+    x = y = row_height = 0.0
+    previous = None
+    for i, (cell, building) in enumerate(zip(cells.tolist(), buildings)):
+        if previous is not None and building != previous and x > 0:
+            x += BUILDING_GAP
+        if x > 0 and x + cell > row_width:
+            x, y, row_height = 0.0, y + row_height, 0.0
+        cx[i], cy[i] = x + cell / 2, y + cell / 2
+        x += cell
+        row_height = max(row_height, cell)
+        previous = building
+    return cx, cy
+
+
+def member_offsets(sizes):
+    # 各成员相对所在簇圆心的坐标 (按寝室顺序)；返回 (所在寝室的序号, dx, dy)
+    sizes = np.asarray(sizes, dtype=np.intp)
+    group = np.repeat(np.arange(len(sizes)), sizes)
+    starts = np.cumsum(sizes) - sizes
+    j = np.arange(len(group)) - starts[group]        # 成员在寝室中的序号
+    k = sizes[group].astype('float64')
+    ring = k <= RING_MAX_SIZE
+    angle = np.where(ring, 2 * math.pi * j / np.maximum(k, 1) - math.pi / 2, j * _GOLDEN_ANGLE)
+    radius = np.where(ring, cluster_radii(sizes)[group], NODE_SPACING * 0.55 * np.sqrt(j + 1))
+    radius = np.where(k <= 1, 0.0, radius)
+    return group, radius * np.cos(angle), radius * np.sin(angle)
+
+
+def _layout_key(dorms, sizes, hubs):
+    h = hashlib.sha1()
+    h.update("\0".join(map(str, dorms)).encode('utf-8'))
+    h.update(np.asarray(sizes, dtype=np.int64).tobytes())
+    h.update(np.asarray(hubs, dtype=bool).tobytes())
+    return h.hexdigest()
+
+
+def _compute(dorms, sizes, hubs):
+    sizes = np.asarray(sizes, dtype=np.intp)
+    hubs = np.asarray(hubs, dtype=bool)
+    buildings = [dorm_building(dorm) for dorm in dorms]
+    cx, cy = pack_clusters(cluster_radii(sizes), buildings)
+    group, dx, dy = member_offsets(sizes)
+    member_x, member_y = cx[group] + dx, cy[group] + dy
+    # 在每个寝室的成员之后插入中心节点 (位于圆心)
+    ends = np.cumsum(sizes)
+    insert_at = ends[hubs]
+    x = np.insert(member_x, insert_at, cx[hubs])
+    y = np.insert(member_y, insert_at, cy[hubs])
+    return np.round(x, 1), np.round(y, 1)
+
+
+def dorm_layout(dorms, sizes, hubs):
+    # dorms: 寝室号 (按图中顺序)；sizes: 各寝室人数；hubs: 各寝室是否使用中心节点
+    # 返回 (x, y) 数组，顺序与节点相同：寝室 1 的成员、寝室 1 的中心节点 (若有)、寝室 2 的成员 ...
+    key = _layout_key(dorms, sizes, hubs)
+    with _lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    layout = _compute(dorms, sizes, hubs)
+    with _lock:
+        _cache[key] = layout
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return layout
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
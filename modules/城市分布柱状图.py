@@ -1,7 +1,10 @@
 import matplotlib.pyplot as plt
 from pyecharts.charts import Bar
+from category_ranking import top_k_counts
 
-city_counts = df['生源城市'].value_counts()
+# Counted once at load time; keep the 30 largest cities and merge the rest into '其他'
+# (total covers the cities a streaming sketch did not keep)
+city_counts = top_k_counts(summary.counts('生源城市'), 30, total=summary.total('生源城市'))
 
 # --- Matplotlib Version ---
 plt.figure(figsize=(12, 7))
@@ -4,23 +4,13 @@ from itertools import combinations
 
 G = nx.Graph()
 
-# Add nodes (students). Use '姓名' or '学号' as node ID. Assuming '姓名' is unique enough here.
-# Add dorm info as node attribute
-for index, row in df.iterrows():
-    # Check if '姓名' and '寝室号' are not NaN/None before adding
-    if pd.notna(row['姓名']) and pd.notna(row['寝室号']):
-        G.add_node(row['姓名'], dorm=str(row['寝室号'])) # Ensure dorm is string
-
-# Group students by dorm
-dorm_groups = df.dropna(subset=['姓名', '寝室号']).groupby('寝室号')['姓名'].apply(list)
-
-# Add edges between students in the same dorm
-for dorm, students in dorm_groups.items():
-    if len(students) > 1:
-        for u, v in combinations(students, 2):
-            # Check if nodes exist before adding edge (due to potential NaNs handled above)
-            if G.has_node(u) and G.has_node(v):
-                G.add_edge(u, v, dorm=str(dorm))
+# Dorm members were grouped once at load time (rows missing '姓名' or '寝室号' are skipped).
+# Use '姓名' or '学号' as node ID. Assuming '姓名' is unique enough here.
+for dorm, students in summary.dorm_members.items():
+    # Add nodes (students) with dorm info as node attribute
+    G.add_nodes_from(students, dorm=dorm)
+    # Add edges between students in the same dorm
+    G.add_edges_from(combinations(students, 2), dorm=dorm)
 
 # --- Matplotlib Visualization ---
 plt.figure(figsize=(15, 15))
@@ -3,7 +3,7 @@ from pyecharts import options as opts
 from pyecharts.charts import Pie
 
 # --- Matplotlib Version ---
-gender_counts = df['性别'].value_counts()
+gender_counts = summary.counts('性别') # Counted once at load time
 plt.figure(figsize=(6, 6))
 plt.rcParams['font.sans-serif'] = ['SimHei'] # Or your specific font name
 plt.rcParams['axes.unicode_minus'] = False # Display minus sign correctly
@@ -1,6 +1,6 @@
 from pyecharts.charts import Map
 
-province_counts = df['生源省份'].value_counts()
+province_counts = summary.counts('生源省份') # Counted once at load time
 province_data_pair = [list(z) for z in zip(province_counts.index, province_counts.values)]
 
 # Ensure province names match pyecharts expectations (e.g., '黑龙江省' vs '黑龙江')
@@ -1,7 +1,23 @@
+import os
+import sys
 import pandas as pd
 
+# Allow running from the modules/ directory: the loader lives in the project root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from student_loader import load_student_data, scan_student_data, RANK_COLS
+from student_summary import StudentSummary
+from category_ranking import SKETCH_COLS
+
 # --- Configuration ---
 excel_file = 'your_student_data.xlsx' # Replace with your actual file path
+# Set to True for very large rosters: rows are read and cleaned in chunks with a read-only
+# row iterator, so no object-dtype copy of the whole workbook is built. The compacted table
+# is still kept in memory, so memory keeps growing with the number of rows.
+USE_STREAMING = False
+# Set to True when only the counting snippets (gender, province, city, dorm) are needed:
+# each chunk is counted and then discarded, so memory no longer depends on the number of rows
+# (apart from the dorm member lists). df is None in this mode.
+SUMMARY_ONLY = False
 # Example path for a common Chinese font on Windows. Adjust if needed.
 # On Linux/MacOS, find a suitable font path like '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc'
 FONT_PATH = 'C:/Windows/Fonts/simhei.ttf'
@@ -9,11 +25,24 @@ FONT_PATH = 'C:/Windows/Fonts/simhei.ttf'
 
 
 try:
-    df = pd.read_excel(excel_file)
-    print("Data loaded successfully. First 5 rows:")
-    print(df.head())
-    print("\nData Info:")
-    df.info()
+    # Basic Data Cleaning is applied by the loader (chunk by chunk when streaming):
+    # empty mottos become '', rank columns are converted to numeric (non-numeric values become NaN).
+    # The summary is filled in the same pass: category counts, dorm members and rank statistics
+    # that the chart snippets read instead of rescanning df. In SUMMARY_ONLY mode province and
+    # city counts are kept in a fixed-size approximate sketch instead of one exact counter per value;
+    # otherwise the whole table is in memory anyway and the counts stay exact.
+    if SUMMARY_ONLY:
+        summary = StudentSummary(sketch_cols=SKETCH_COLS)
+        df = None
+        rows = scan_student_data(excel_file, on_chunk=summary.update)
+        print(f"Summarized {rows} rows (province/city counts are approximate).")
+    else:
+        summary = StudentSummary()
+        df, _ = load_student_data(excel_file, streaming=USE_STREAMING, on_chunk=summary.update)
+        print("Data loaded successfully. First 5 rows:")
+        print(df.head())
+        print("\nData Info:")
+        df.info()
 except FileNotFoundError:
     print(f"Error: File not found at {excel_file}")
     exit()
@@ -21,9 +50,4 @@ except Exception as e:
     print(f"Error loading Excel file: {e}")
     exit()
 
-# Basic Data Cleaning (Example: Handle potential empty mottos)
-df['人生格言'] = df['人生格言'].fillna('') # Replace NaN with empty string
-# Convert rank columns to numeric, coercing errors (non-numeric values become NaN)
-rank_cols = ['大一上学期名次', '大一下学期名次', '大二上学期名次', '大二下学期名次', '大三上学期名次']
-for col in rank_cols:
-    df[col] = pd.to_numeric(df[col], errors='coerce')
+rank_cols = RANK_COLS
@@ -0,0 +1,110 @@
+"""人生格言的分词与词频统计。
+
+每条格言单独分词，结果按 "去标点后文本的哈希" 缓存 (LRU，最多 TOKEN_CACHE_SIZE 条)：
+再次生成词云时，没有变化的格言不会重新分词。未缓存的格言较多时分批交给进程池并行分词。
+统计结果是 Counter (词 -> 次数)，可直接传给 WordCloud.generate_from_frequencies。
+"""
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from startup_profile import timed_import
+
+# 定义一些停用词 (可以根据需要添加更多)
+DEFAULT_STOPWORDS = frozenset({' ', '的', '是', '了', '我', '你', '他', '她', '它', '都', '就', '也', '不', '在', '有', '人', '个', '\n', '\t'})
+# 分词前删除的标点符号
+DEFAULT_PUNCTUATION = ' ，。！？.,!?'
+MIN_WORD_LENGTH = 2 # 过滤单字
+
+PARALLEL_MIN_TEXTS = 5000 # 未缓存的格言达到该数量才启用进程池 (进程启动和加载词典有固定开销)
+BATCH_SIZE = 1000
+TOKEN_CACHE_SIZE = 100_000 # 缓存的格言数 (每条约 600 字节，约 60 MB)；界面、看板和批处理进程长期运行
+
+
+def _segment_batch(texts):
+    # 在工作进程中执行，必须是模块级函数才能被 pickle
+    jieba = timed_import('jieba')
+    return [tuple(jieba.lcut(text, cut_all=False)) for text in texts]
+
+
+def _text_key(text):
+    return hashlib.sha1(text.encode('utf-8')).digest()
+
+
+class MottoTokenizer:
+    def __init__(self, stopwords=DEFAULT_STOPWORDS, punctuation=DEFAULT_PUNCTUATION,
+                 min_length=MIN_WORD_LENGTH, workers=None, cache_size=TOKEN_CACHE_SIZE):
+        self.stopwords = frozenset(stopwords)
+        self.punctuation = punctuation
+        self.min_length = min_length
+        self.workers = workers
+        self.cache_size = cache_size
+        self._table = str.maketrans('', '', punctuation)
+        # 文本哈希 -> 分词结果 (未过滤停用词，修改停用词无需重新分词)，按最近使用的顺序，超过 cache_size 时淘汰最久未用的
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock() # 界面和看板的图表任务在不同线程中共用同一个分词器
+
+    def clean(self, motto):
+        return str(motto).translate(self._table)
+
+    def cached_count(self):
+        return len(self._tokens)
+
+    def clear_cache(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def _tokens_for(self, texts, progress=None):
+        # texts 中每条格言的分词结果 (列表，与 texts 对应)；先查完缓存再分词和写入，
+        # 这样不同的格言多于 cache_size 时，本次用到的结果也不会在使用前被淘汰
+        keys = [_text_key(text) for text in texts]
+        tokens = [None] * len(texts)
+        with self._lock:
+            for i, key in enumerate(keys):
+                words = self._tokens.get(key)
+                if words is not None:
+                    self._tokens.move_to_end(key)
+                    tokens[i] = words
+        missing = [i for i, words in enumerate(tokens) if words is None]
+        total = len(missing)
+        if not missing:
+            return tokens
+        batches = [missing[i:i + BATCH_SIZE] for i in range(0, total, BATCH_SIZE)]
+        texts_of = lambda batch: [texts[i] for i in batch]
+        done = 0
+        if total >= PARALLEL_MIN_TEXTS and self.workers != 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for batch, words in zip(batches, pool.map(_segment_batch, map(texts_of, batches))):
+                    self._store(batch, words, keys, tokens)
+                    done += len(batch)
+                    if progress is not None:
+                        progress(done, total)
+        else:
+            for batch in batches:
+                self._store(batch, _segment_batch(texts_of(batch)), keys, tokens)
+                done += len(batch)
+                if progress is not None:
+                    progress(done, total)
+        return tokens
+
+    def _store(self, batch, words, keys, tokens):
+        with self._lock:
+            for i, w in zip(batch, words):
+                tokens[i] = w
+                self._tokens[keys[i]] = w
+            while len(self._tokens) > self.cache_size:
+                self._tokens.popitem(last=False)
+
+    def term_frequencies(self, mottos, progress=None):
+        # mottos: 可迭代的格言文本；progress(已分词数, 待分词总数) 用于汇报进度
+        # 相同的格言只分词一次，按出现次数累加词频
+        texts = Counter(text for text in (self.clean(m) for m in mottos) if text)
+        tokens = self._tokens_for(list(texts), progress)
+
+        frequencies = Counter()
+        for occurrences, words in zip(texts.values(), tokens):
+            for word in words:
+                if len(word) >= self.min_length and word not in self.stopwords:
+                    frequencies[word] += occurrences
+        return frequencies
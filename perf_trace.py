@@ -0,0 +1,200 @@
+"""加载文件和生成图表的分阶段计时记录 (默认关闭)。
+
+打开后 (perf_trace.enable()，或设置环境变量 STUDENT_INFO_TRACE=1)，每个阶段
+记录耗时、峰值内存 (tracemalloc)、行数和输出文件大小，可以在界面状态栏中实时
+显示，并导出为 JSON 或 Chrome trace (在 chrome://tracing 或 Perfetto 中打开)。
+
+关闭时 span() 只检查一个全局开关并返回同一个空对象，几乎没有开销。
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_enabled = os.environ.get('STUDENT_INFO_TRACE', '') not in ('', '0') # 环境变量只打开计时，不统计内存
+_track_memory = False
+_lock = threading.Lock()
+_events = []       # 已结束的阶段，按结束顺序
+_active = set()    # 尚未结束、正在统计峰值内存的阶段
+MAX_EVENTS = 10000 # 只保留最近的记录
+_origin = time.perf_counter()
+
+
+def enable(track_memory=True):
+    # track_memory 会启动 tracemalloc，分配内存较多的阶段会明显变慢，只在排查问题时打开
+    global _enabled, _track_memory
+    _enabled = True
+    _track_memory = track_memory
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global _enabled, _track_memory
+    _enabled = False
+    if _track_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _track_memory = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def clear():
+    with _lock:
+        _events.clear()
+
+
+def events():
+    with _lock:
+        return list(_events)
+
+
+def last_event():
+    with _lock:
+        return _events[-1] if _events else None
+
+
+class _NullSpan:
+    # 关闭记录时使用的空对象
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+    def wrap_progress(self, progress):
+        return progress
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _fold_peak():
+    # 调用方持有 _lock：把当前峰值计入每个进行中的阶段，再重置峰值
+    # (tracemalloc 只有一个全局峰值，嵌套和并发的阶段都从这里分别累计)
+    if not tracemalloc.is_tracing():
+        return 0
+    current, peak = tracemalloc.get_traced_memory()
+    for span in _active:
+        span.peak = max(span.peak, peak)
+    tracemalloc.reset_peak()
+    return current
+
+
+class Span:
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = dict(args)
+        self.parent = None
+        self.peak = self.start_memory = 0
+        self._stage = None
+
+    def __enter__(self):
+        if _track_memory:
+            with _lock:
+                self.start_memory = self.peak = _fold_peak()
+                _active.add(self)
+        thread = threading.current_thread()
+        self.tid, self.thread_name = thread.ident, thread.name
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._end_stage()
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        event = {
+            'name': self.name,
+            'cat': self.cat,
+            'start': self.start - _origin,
+            'seconds': end - self.start,
+            'tid': self.tid,
+            'thread': self.thread_name,
+            'parent': self.parent,
+            'args': self.args,
+        }
+        with _lock:
+            if self in _active:
+                _fold_peak()
+                _active.discard(self)
+                event['args']['peak_mb'] = round((self.peak - self.start_memory) / 2**20, 2)
+            _events.append(event)
+            del _events[:-MAX_EVENTS]
+        return False
+
+    def set(self, **args):
+        # 记录行数 (rows)、输出文件大小 (output_bytes) 等
+        self.args.update(args)
+
+    def wrap_progress(self, progress):
+        # 把 progress(比例, 说明) 的每次调用当作一个子阶段的开始，上一个子阶段随之结束；
+        # charts.render_* 在各阶段之间都会汇报进度，因此不必在每个函数里单独加记录
+        def report(fraction, text):
+            self._end_stage()
+            self._stage = Span(text, 'stage', {})
+            self._stage.parent = self.name
+            self._stage.__enter__()
+            if progress is not None:
+                progress(fraction, text)
+        return report
+
+    def _end_stage(self):
+        if self._stage is not None:
+            stage, self._stage = self._stage, None
+            stage.__exit__(None, None, None)
+
+
+def span(name, cat='task', **args):
+    # with perf_trace.span("寝室关系图", rows=len(df)) as s: ...; s.set(output_bytes=...)
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, cat, args)
+
+
+def format_event(event):
+    # 状态栏中显示的一行摘要
+    args = event['args']
+    parts = [f"{event['name']} {event['seconds'] * 1000:.0f} ms"]
+    if 'peak_mb' in args:
+        parts.append(f"峰值 {args['peak_mb']:.1f} MB")
+    if 'rows' in args:
+        parts.append(f"{args['rows']} 行")
+    if 'output_bytes' in args:
+        parts.append(f"输出 {args['output_bytes'] / 1024:.0f} KB")
+    if 'error' in args:
+        parts.append(f"出错: {args['error']}")
+    return " · ".join(parts)
+
+
+def export_json(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'events': events()}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def export_chrome_trace(path):
+    # Chrome trace 事件格式：完整事件 (ph='X')，时间单位为微秒
+    pid = os.getpid()
+    trace_events = [
+        {
+            'name': e['name'], 'cat': e['cat'], 'ph': 'X', 'pid': pid, 'tid': e['tid'],
+            'ts': round(e['start'] * 1e6), 'dur': round(e['seconds'] * 1e6), 'args': e['args'],
+        }
+        for e in events()
+    ]
+    threads = {e['tid']: e['thread'] for e in events()}
+    trace_events.extend(
+        {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+        for tid, name in threads.items()
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    return path
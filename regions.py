@@ -0,0 +1,233 @@
+"""内置的省份 / 城市名称字典，以及把自由填写的 生源省份 / 生源城市 规范化的匹配器。
+
+加载数据时 (student_loader.clean_student_data) 调用一次：每个不同的取值只匹配一次，
+结果保存为 category 列，类别 = 全部规范名称 (顺序固定) + 未能识别的原始取值。
+因此各图表按整数编码统计，而且同一名称在不同数据集中的编码相同。
+
+匹配顺序：先按别名精确查找 (哈希表)；找不到时用前缀树做最长前缀匹配，
+可以处理 "山东省青岛市"、"山东青岛市南区" 这类带有多级地名的写法。城市先去掉开头的
+省份名再匹配 ("吉林省长春市" 是长春市，不是吉林市)；省份名之后紧接着更长的已知地名时
+(如青海的 "海南藏族自治州")，按该地名处理，不截取其中的省份名。
+"""
+from startup_profile import lazy_module
+
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+# (行政区划代码 GB/T 2260, 规范简称, 全称)；简称与 pyecharts 中国地图使用的名称一致
+PROVINCES = [
+    ('11', '北京', '北京市'), ('12', '天津', '天津市'), ('13', '河北', '河北省'),
+    ('14', '山西', '山西省'), ('15', '内蒙古', '内蒙古自治区'), ('21', '辽宁', '辽宁省'),
+    ('22', '吉林', '吉林省'), ('23', '黑龙江', '黑龙江省'), ('31', '上海', '上海市'),
+    ('32', '江苏', '江苏省'), ('33', '浙江', '浙江省'), ('34', '安徽', '安徽省'),
+    ('35', '福建', '福建省'), ('36', '江西', '江西省'), ('37', '山东', '山东省'),
+    ('41', '河南', '河南省'), ('42', '湖北', '湖北省'), ('43', '湖南', '湖南省'),
+    ('44', '广东', '广东省'), ('45', '广西', '广西壮族自治区'), ('46', '海南', '海南省'),
+    ('50', '重庆', '重庆市'), ('51', '四川', '四川省'), ('52', '贵州', '贵州省'),
+    ('53', '云南', '云南省'), ('54', '西藏', '西藏自治区'), ('61', '陕西', '陕西省'),
+    ('62', '甘肃', '甘肃省'), ('63', '青海', '青海省'), ('64', '宁夏', '宁夏回族自治区'),
+    ('65', '新疆', '新疆维吾尔自治区'), ('71', '台湾', '台湾省'), ('81', '香港', '香港特别行政区'),
+    ('82', '澳门', '澳门特别行政区'),
+]
+
+# 其他常见写法
+PROVINCE_EXTRA_ALIASES = {
+    '内蒙': '内蒙古', '广西壮族': '广西', '宁夏回族': '宁夏', '新疆维吾尔': '新疆',
+    '香港特区': '香港', '澳门特区': '澳门',
+}
+
+# 各省地级行政区 (规范全称)；"全称:简称" 用于简称不能由去掉 市/地区/盟 得到的情况
+CITIES = {
+    '北京': "北京市",
+    '天津': "天津市",
+    '河北': "石家庄市 唐山市 秦皇岛市 邯郸市 邢台市 保定市 张家口市 承德市 沧州市 廊坊市 衡水市",
+    '山西': "太原市 大同市 阳泉市 长治市 晋城市 朔州市 晋中市 运城市 忻州市 临汾市 吕梁市",
+    '内蒙古': "呼和浩特市 包头市 乌海市 赤峰市 通辽市 鄂尔多斯市 呼伦贝尔市 巴彦淖尔市 乌兰察布市 "
+             "兴安盟 锡林郭勒盟 阿拉善盟",
+    '辽宁': "沈阳市 大连市 鞍山市 抚顺市 本溪市 丹东市 锦州市 营口市 阜新市 辽阳市 盘锦市 铁岭市 朝阳市 葫芦岛市",
+    '吉林': "长春市 吉林市 四平市 辽源市 通化市 白山市 松原市 白城市 延边朝鲜族自治州:延边",
+    '黑龙江': "哈尔滨市 齐齐哈尔市 鸡西市 鹤岗市 双鸭山市 大庆市 伊春市 佳木斯市 七台河市 牡丹江市 黑河市 绥化市 "
+             "大兴安岭地区",
+    '上海': "上海市",
+    '江苏': "南京市 无锡市 徐州市 常州市 苏州市 南通市 连云港市 淮安市 盐城市 扬州市 镇江市 泰州市 宿迁市",
+    '浙江': "杭州市 宁波市 温州市 嘉兴市 湖州市 绍兴市 金华市 衢州市 舟山市 台州市 丽水市",
+    '安徽': "合肥市 芜湖市 蚌埠市 淮南市 马鞍山市 淮北市 铜陵市 安庆市 黄山市 滁州市 阜阳市 宿州市 六安市 亳州市 "
+            "池州市 宣城市",
+    '福建': "福州市 厦门市 莆田市 三明市 泉州市 漳州市 南平市 龙岩市 宁德市",
+    '江西': "南昌市 景德镇市 萍乡市 九江市 新余市 鹰潭市 赣州市 吉安市 宜春市 抚州市 上饶市",
+    '山东': "济南市 青岛市 淄博市 枣庄市 东营市 烟台市 潍坊市 济宁市 泰安市 威海市 日照市 临沂市 德州市 聊城市 "
+            "滨州市 菏泽市",
+    '河南': "郑州市 开封市 洛阳市 平顶山市 安阳市 鹤壁市 新乡市 焦作市 濮阳市 许昌市 漯河市 三门峡市 南阳市 商丘市 "
+            "信阳市 周口市 驻马店市 济源市",
+    '湖北': "武汉市 黄石市 十堰市 宜昌市 襄阳市 鄂州市 荆门市 孝感市 荆州市 黄冈市 咸宁市 随州市 "
+            "恩施土家族苗族自治州:恩施 仙桃市 潜江市 天门市 神农架林区:神农架",
+    '湖南': "长沙市 株洲市 湘潭市 衡阳市 邵阳市 岳阳市 常德市 张家界市 益阳市 郴州市 永州市 怀化市 娄底市 "
+            "湘西土家族苗族自治州:湘西",
+    '广东': "广州市 韶关市 深圳市 珠海市 汕头市 佛山市 江门市 湛江市 茂名市 肇庆市 惠州市 梅州市 汕尾市 河源市 "
+            "阳江市 清远市 东莞市 中山市 潮州市 揭阳市 云浮市",
+    '广西': "南宁市 柳州市 桂林市 梧州市 北海市 防城港市 钦州市 贵港市 玉林市 百色市 贺州市 河池市 来宾市 崇左市",
+    '海南': "海口市 三亚市 三沙市 儋州市",
+    '重庆': "重庆市",
+    '四川': "成都市 自贡市 攀枝花市 泸州市 德阳市 绵阳市 广元市 遂宁市 内江市 乐山市 南充市 眉山市 宜宾市 广安市 "
+            "达州市 雅安市 巴中市 资阳市 阿坝藏族羌族自治州:阿坝 甘孜藏族自治州:甘孜 凉山彝族自治州:凉山",
+    '贵州': "贵阳市 六盘水市 遵义市 安顺市 毕节市 铜仁市 黔西南布依族苗族自治州:黔西南 "
+            "黔东南苗族侗族自治州:黔东南 黔南布依族苗族自治州:黔南",
+    '云南': "昆明市 曲靖市 玉溪市 保山市 昭通市 丽江市 普洱市 临沧市 楚雄彝族自治州:楚雄 红河哈尼族彝族自治州:红河 "
+            "文山壮族苗族自治州:文山 西双版纳傣族自治州:西双版纳 大理白族自治州:大理 德宏傣族景颇族自治州:德宏 "
+            "怒江傈僳族自治州:怒江 迪庆藏族自治州:迪庆",
+    '西藏': "拉萨市 日喀则市 昌都市 林芝市 山南市 那曲市 阿里地区",
+    '陕西': "西安市 铜川市 宝鸡市 咸阳市 渭南市 延安市 汉中市 榆林市 安康市 商洛市",
+    '甘肃': "兰州市 嘉峪关市 金昌市 白银市 天水市 武威市 张掖市 平凉市 酒泉市 庆阳市 定西市 陇南市 "
+            "临夏回族自治州:临夏 甘南藏族自治州:甘南",
+    '青海': "西宁市 海东市 海北藏族自治州:海北 黄南藏族自治州:黄南 海南藏族自治州:海南州 果洛藏族自治州:果洛 "
+            "玉树藏族自治州:玉树 海西蒙古族藏族自治州:海西",
+    '宁夏': "银川市 石嘴山市 吴忠市 固原市 中卫市",
+    '新疆': "乌鲁木齐市 克拉玛依市 吐鲁番市 哈密市 昌吉回族自治州:昌吉 博尔塔拉蒙古自治州:博尔塔拉 "
+            "巴音郭楞蒙古自治州:巴音郭楞 阿克苏地区 克孜勒苏柯尔克孜自治州:克孜勒苏 喀什地区 和田地区 "
+            "伊犁哈萨克自治州:伊犁 塔城地区 阿勒泰地区 石河子市",
+    '台湾': "台北市 新北市 桃园市 台中市 台南市 高雄市",
+    '香港': "香港特别行政区:香港",
+    '澳门': "澳门特别行政区:澳门",
+}
+
+
+class PrefixMatcher:
+    # 基于前缀树 (trie) 的别名匹配；精确匹配走哈希表
+    _END = object()
+
+    def __init__(self, aliases):
+        self.exact = dict(aliases) # 别名 -> 规范名称
+        self.root = {}
+        for alias, canonical in self.exact.items():
+            node = self.root
+            for ch in alias:
+                node = node.setdefault(ch, {})
+            node[self._END] = canonical
+
+    def longest_prefix(self, text, start=0):
+        # 返回 (规范名称, 匹配结束位置)；没有匹配时返回 (None, start)
+        node, found, end = self.root, None, start
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            if self._END in node:
+                found, end = node[self._END], i + 1
+        return found, end
+
+
+def _split_city(entry):
+    name, _, short = entry.partition(':')
+    if not short:
+        for suffix in ('市', '地区', '盟'):
+            if name.endswith(suffix) and len(name) - len(suffix) >= 2:
+                short = name[:-len(suffix)]
+                break
+    return name, short
+
+
+def _build_tables():
+    province_aliases = {}
+    for _, short, full in PROVINCES:
+        province_aliases[short] = short
+        province_aliases[full] = short
+        if full.endswith('特别行政区'):
+            province_aliases[short + '市'] = short
+    province_aliases.update(PROVINCE_EXTRA_ALIASES)
+
+    city_names, city_province, city_aliases = [], {}, {}
+    for province, entries in CITIES.items():
+        for entry in entries.split():
+            name, short = _split_city(entry)
+            city_names.append(name)
+            city_province[name] = province
+            city_aliases[name] = name
+            if short:
+                city_aliases.setdefault(short, name)
+    return province_aliases, city_names, city_province, city_aliases
+
+
+_PROVINCE_ALIASES, CITY_NAMES, CITY_PROVINCE, _CITY_ALIASES = _build_tables()
+PROVINCE_NAMES = [short for _, short, _ in PROVINCES]
+PROVINCE_CODES = {short: code for code, short, _ in PROVINCES}
+
+_province_matcher = PrefixMatcher(_PROVINCE_ALIASES)
+_city_matcher = PrefixMatcher(_CITY_ALIASES)
+
+
+def _leading_province(text):
+    # 开头的省份名：返回 (规范简称, 结束位置)；没有时返回 (None, 0)
+    # 省份名之后紧接着更长的已知地名时 (如青海的 "海南藏族自治州")，开头是该地名而不是省份名，
+    # 此时返回该地名所属的省份，结束位置为 0 (不截取)
+    province, end = _province_matcher.longest_prefix(text)
+    city, city_end = _city_matcher.longest_prefix(text)
+    if province is not None and city_end > end:
+        return CITY_PROVINCE[city], 0
+    return province, end
+
+
+def match_province(value):
+    text = str(value).strip()
+    canonical = _province_matcher.exact.get(text)
+    if canonical is None:
+        canonical, _ = _leading_province(text) # 例如 "山东省青岛市"
+    return canonical
+
+
+def match_city(value):
+    text = str(value).strip()
+    canonical = _city_matcher.exact.get(text)
+    if canonical is not None:
+        return canonical
+    # 先去掉开头的省份名再匹配，例如 "山东青岛"、"吉林省长春市" (否则 "吉林" 会被当作吉林市)
+    province, end = _leading_province(text)
+    if end > 0 and end < len(text):
+        canonical, _ = _city_matcher.longest_prefix(text, end)
+        if canonical is not None:
+            return canonical
+    canonical, _ = _city_matcher.longest_prefix(text) # 开头直接是城市名，例如 "青岛市市南区"
+    return canonical
+
+
+def _normalize(series, match, canonical_names):
+    # 每个不同的取值只匹配一次，再用整数编码映射回整列
+    codes, uniques = pd.factorize(series)
+    position = {name: i for i, name in enumerate(canonical_names)}
+    categories = list(canonical_names)
+    lookup = np.empty(len(uniques), dtype=np.int64)
+    for i, raw in enumerate(uniques.tolist()):
+        canonical = match(raw)
+        if canonical is None:
+            canonical = str(raw).strip() # 未能识别的取值原样保留为一个类别
+            if canonical not in position:
+                position[canonical] = len(categories)
+                categories.append(canonical)
+        lookup[i] = position[canonical]
+    new_codes = np.where(codes >= 0, lookup[codes] if len(lookup) else codes, -1)
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=categories),
+                     index=series.index, name=series.name)
+
+
+def normalize_provinces(series):
+    return _normalize(series, match_province, PROVINCE_NAMES)
+
+
+def normalize_cities(series):
+    return _normalize(series, match_city, CITY_NAMES)
+
+
+def unmatched_values(series, canonical_names):
+    # 规范化后仍未识别的取值及其人数
+    counts = series.value_counts()
+    known = set(canonical_names)
+    return {name: int(n) for name, n in counts.items() if n > 0 and name not in known}
+
+
+def unmatched_report(df):
+    report = {}
+    for col, names in (('生源省份', PROVINCE_NAMES), ('生源城市', CITY_NAMES)):
+        if col in df.columns:
+            unmatched = unmatched_values(df[col], names)
+            if unmatched:
+                report[col] = unmatched
+    return report
@@ -0,0 +1,133 @@
+"""已清洗学生信息表的磁盘缓存。
+
+缓存键 = 源文件内容的 SHA-256 + 清洗规则版本号，值为清洗后的 DataFrame，
+以 Feather (Arrow IPC) 列式格式保存。再次打开未修改过的 Excel 文件时直接
+读取缓存，无需重新 read_excel 和清洗。
+"""
+import hashlib
+import os
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'STUDENT_INFO_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'student_info_analysis'),
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 缓存目录总大小上限：512 MB
+
+CACHE_SUFFIX = '.feather'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_digest(filepath):
+    # 按块读取文件计算 SHA-256，避免一次性把大文件读入内存
+    h = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def list_cache_entries(cache_dir, suffix):
+    # 返回 [(路径, 大小, 修改时间), ...]，按修改时间从旧到新排序
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for name in os.listdir(cache_dir):
+        if not name.endswith(suffix):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # 可能刚被其他进程删除
+        entries.append((path, st.st_size, st.st_mtime))
+    entries.sort(key=lambda e: e[2])
+    return entries
+
+
+def evict_to_size(cache_dir, suffix, max_bytes, max_entries=None):
+    # 按最近使用时间 (mtime) 淘汰最旧的条目，直到总大小不超过 max_bytes
+    # (且条目数不超过 max_entries)；suffix 可以是字符串或字符串元组
+    entries = list_cache_entries(cache_dir, suffix)
+    total = sum(size for _, size, _ in entries)
+    count = len(entries)
+    removed = 0
+    for path, size, _ in entries:
+        if total <= max_bytes and (max_entries is None or count <= max_entries):
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        count -= 1
+        removed += 1
+    return removed
+
+
+class RosterCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'rosters')
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, digest, rules_version):
+        return os.path.join(self.cache_dir, f"{digest}-v{rules_version}{CACHE_SUFFIX}")
+
+    def get(self, digest, rules_version):
+        path = self._entry_path(digest, rules_version)
+        if not os.path.exists(path):
+            return None
+        try:
+            import pandas as pd
+            df = pd.read_feather(path)
+        except ImportError:
+            return None  # 未安装 pyarrow，缓存不可用
+        except Exception as e:
+            print(f"警告: 缓存文件损坏，已忽略: {path} ({e})")
+            self._remove(path)
+            return None
+        # 更新 mtime，作为 LRU 淘汰的依据
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return df
+
+    def put(self, digest, rules_version, df):
+        path = self._entry_path(digest, rules_version)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Feather 要求默认的 RangeIndex
+            df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, path)  # 原子替换，避免读到写了一半的文件
+        except ImportError:
+            print("提示: 未安装 'pyarrow'，学生信息表缓存已停用 (pip install pyarrow)。")
+            self._remove(tmp_path)
+            return False
+        except Exception as e:
+            # 例如某列同时混有数字和文本，Arrow 无法转换；此时仅跳过缓存
+            print(f"警告: 写入缓存失败，本次不缓存: {e}")
+            self._remove(tmp_path)
+            return False
+        evict_to_size(self.cache_dir, CACHE_SUFFIX, self.max_bytes)
+        return True
+
+    def size(self):
+        return sum(size for _, size, _ in list_cache_entries(self.cache_dir, CACHE_SUFFIX))
+
+    def clear(self):
+        # 删除全部缓存条目，返回 (删除数量, 释放字节数)
+        count, freed = 0, 0
+        for path, size, _ in list_cache_entries(self.cache_dir, CACHE_SUFFIX):
+            if self._remove(path):
+                count += 1
+                freed += size
+        return count, freed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
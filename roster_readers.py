@@ -0,0 +1,188 @@
+"""按文件类型选择读取学生信息表的后端 (Excel / CSV / Parquet)。
+
+读取 .xlsx 是加载中最慢的一步，而很多上游系统也能直接导出 CSV 或 Parquet。各后端只负责
+把文件读成 "原始表" (表头为列名、各格为原值，与 pd.read_excel 的结果相同)，之后统一经过
+clean_student_data + compact_student_data，所以不论从哪种文件加载，得到的表结构都相同。
+
+  excel    .xlsx / .xlsm / .xls：安装了 python-calamine 时用 calamine 解析 (Rust 实现，快数倍)，
+           否则由 pandas 选择 (openpyxl / xlrd)；扩展名无法识别的文件也按 Excel 读取
+  csv      .csv / .tsv：安装了 pyarrow 时用其多线程 CSV 解析，否则用 pandas 的 C 解析器；
+           自动识别 UTF-8 (含 BOM) 与 GBK / GB18030 编码
+  parquet  .parquet / .pq：pyarrow
+  arrow    .feather / .arrow：pyarrow (内存映射读取)
+
+流式加载 (iter_raw_chunks) 同样按后端分块读取：Excel 用 openpyxl 只读模式逐行读，CSV 按行数
+分块读，Parquet 按批读，Arrow 按行切片。
+"""
+import codecs
+import importlib.util
+import os
+
+from startup_profile import lazy_module, timed_import
+
+pd = lazy_module('pandas')
+
+# 扩展名 -> 后端
+SUFFIXES = {
+    '.xlsx': 'excel', '.xlsm': 'excel', '.xls': 'excel',
+    '.csv': 'csv', '.tsv': 'csv',
+    '.parquet': 'parquet', '.pq': 'parquet',
+    '.feather': 'arrow', '.arrow': 'arrow',
+}
+DEFAULT_BACKEND = 'excel'
+ENCODING_SAMPLE_BYTES = 64 * 1024 # 识别 CSV 编码时读取的字节数
+FALLBACK_ENCODING = 'gb18030'     # 不是合法 UTF-8 时按 GB18030 (兼容 GBK / GB2312) 读取
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def backend_for(filepath):
+    return SUFFIXES.get(os.path.splitext(filepath)[1].lower(), DEFAULT_BACKEND)
+
+
+def engines_for(backend):
+    # 该后端可用的解析器 (按速度从快到慢)
+    if backend == 'excel':
+        return (['calamine'] if _installed('python_calamine') else []) + ['openpyxl']
+    if backend == 'csv':
+        return (['pyarrow'] if _installed('pyarrow') else []) + ['pandas']
+    return ['pyarrow']
+
+
+def detect_encoding(filepath, sample_bytes=ENCODING_SAMPLE_BYTES):
+    with open(filepath, 'rb') as f:
+        sample = f.read(sample_bytes)
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False) # 末尾被截断的字符不算错误
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return 'utf-8'
+
+
+def _delimiter(filepath):
+    return '\t' if filepath.lower().endswith('.tsv') else ','
+
+
+# --- 整表读取 ---
+
+def _read_excel(filepath, engine):
+    # openpyxl 只能读 .xlsx / .xlsm；其他格式 (.xls 等) 交给 pandas 选择
+    if engine == 'openpyxl' and not filepath.lower().endswith(('.xlsx', '.xlsm')):
+        engine = None
+    return pd.read_excel(filepath, engine=engine)
+
+
+def _read_csv(filepath, engine):
+    encoding = detect_encoding(filepath)
+    if engine == 'pyarrow':
+        csv = timed_import('pyarrow.csv')
+        table = csv.read_csv(
+            filepath,
+            # UTF-8 (含 BOM) 由 pyarrow 直接解析，其他编码先转码
+            read_options=csv.ReadOptions(encoding='utf8' if encoding.startswith('utf-8') else encoding,
+                                         use_threads=True),
+            parse_options=csv.ParseOptions(delimiter=_delimiter(filepath)),
+            # 空字符串读为空值，与 Excel 中的空单元格一致
+            convert_options=csv.ConvertOptions(strings_can_be_null=True),
+        )
+        return table.to_pandas()
+    return pd.read_csv(filepath, encoding=encoding, sep=_delimiter(filepath))
+
+
+def _read_parquet(filepath, engine):
+    return pd.read_parquet(filepath, engine='pyarrow')
+
+
+def _read_arrow(filepath, engine):
+    return timed_import('pyarrow.feather').read_table(filepath, memory_map=True).to_pandas()
+
+
+# --- 分块读取 (流式加载) ---
+
+def _iter_excel_chunks(filepath, chunk_size):
+    # 使用 openpyxl 只读模式逐行读取第一个工作表，每 chunk_size 行产出一块
+    load_workbook = timed_import('openpyxl').load_workbook
+
+    wb = load_workbook(filepath, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+        width = len(columns)
+
+        buffer = []
+        produced = False
+        for row in rows:
+            if all(v is None for v in row):
+                continue  # 跳过空行 (只读模式常会读到格式化过的空白行)
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame.from_records(buffer, columns=columns)
+                buffer = []
+                produced = True
+        if buffer or not produced:
+            yield pd.DataFrame.from_records(buffer, columns=columns)
+    finally:
+        wb.close()
+
+
+def _iter_csv_chunks(filepath, chunk_size):
+    # 各块独立推断类型 (某列在后面的块中才出现文本也不会出错)
+    with pd.read_csv(filepath, encoding=detect_encoding(filepath), sep=_delimiter(filepath),
+                     chunksize=chunk_size) as reader:
+        yield from reader
+
+
+def _iter_parquet_chunks(filepath, chunk_size):
+    parquet_file = timed_import('pyarrow.parquet').ParquetFile(filepath)
+    produced = False
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+        produced = True
+    if not produced:
+        yield parquet_file.schema_arrow.empty_table().to_pandas()
+
+
+def _iter_arrow_chunks(filepath, chunk_size):
+    table = timed_import('pyarrow.feather').read_table(filepath, memory_map=True)
+    for start in range(0, max(table.num_rows, 1), chunk_size):
+        yield table.slice(start, chunk_size).to_pandas()
+
+
+# 后端 -> (整表读取, 分块读取, 说明)
+BACKENDS = {
+    'excel': (_read_excel, _iter_excel_chunks, "Excel"),
+    'csv': (_read_csv, _iter_csv_chunks, "CSV"),
+    'parquet': (_read_parquet, _iter_parquet_chunks, "Parquet"),
+    'arrow': (_read_arrow, _iter_arrow_chunks, "Arrow / Feather"),
+}
+
+
+def read_roster(filepath, backend=None, engine=None):
+    # 读取未清洗的原始表；backend / engine 为空时按扩展名和已安装的库选择最快的
+    backend = backend or backend_for(filepath)
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的读取后端: {backend}；可选: {', '.join(BACKENDS)}")
+    engine = engine or engines_for(backend)[0]
+    return BACKENDS[backend][0](filepath, engine)
+
+
+def iter_raw_chunks(filepath, chunk_size, backend=None):
+    # 分块读取原始表，每块最多 chunk_size 行；文件只有表头时产出一个空块
+    backend = backend or backend_for(filepath)
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的读取后端: {backend}；可选: {', '.join(BACKENDS)}")
+    return BACKENDS[backend][1](filepath, chunk_size)
+
+
+def describe(filepath):
+    # 如 "CSV (pyarrow)"，用于性能记录和界面提示
+    backend = backend_for(filepath)
+    return f"{BACKENDS[backend][2]} ({engines_for(backend)[0]})"
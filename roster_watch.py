@@ -0,0 +1,203 @@
+"""监视学生信息表的变化，只把新增、删除和修改的行应用到已加载的数据上。
+
+辅导员一天内会多次修改表格 (调整寝室号、补录新学期名次等)，每次都完整重新加载
+并重新生成全部图表并不必要。打开监视后：
+
+  * 每隔几秒检查文件的修改时间和大小 (只调用 stat)；
+  * 发生变化时读取新表，按稳定的键 (有 学号 列时用学号，否则用姓名) 与上次的
+    每行内容哈希对齐，得到新增、删除和修改的行；上次读取时只保留每行一个 64 位
+    哈希，不保留原始表；
+  * 只清洗新增和修改的行，与未变化的 (已清洗的) 行按新表的顺序拼回，结果与完整
+    重新加载相同；StudentSummary 只扣除/累加变化的行；
+  * 比较修改前后的各列，得出实际发生变化的列，只需重新生成用到这些列的图表
+    (charts.charts_affected_by)。
+
+键列有重复值或在新表中消失时无法对齐，此时退回完整重新加载。
+"""
+import os
+
+from roster_readers import read_roster
+from startup_profile import lazy_module
+from student_loader import _concat_chunks, clean_student_data, compact_student_data
+from student_summary import StudentSummary
+
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+KEY_COLUMNS = ['学号', '姓名'] # 按顺序选择第一个存在且没有重复和空值的列
+WATCH_INTERVAL_MS = 2000
+
+
+def file_signature(filepath):
+    stat = os.stat(filepath)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def choose_key(raw):
+    for col in KEY_COLUMNS:
+        if col in raw.columns:
+            values = raw[col]
+            if values.notna().all() and values.is_unique:
+                return col
+    return None
+
+
+def row_hashes(raw):
+    # 每行原始内容的哈希；按列名排序，表格中调整列的顺序不算修改
+    return pd.util.hash_pandas_object(raw[sorted(raw.columns, key=str)], index=False, categorize=False).to_numpy()
+
+
+def _key_index(values):
+    # 学号在不同版本的表中可能读成 int 或 str，统一按字符串对齐
+    return pd.Index(values.astype(str))
+
+
+class RosterSnapshot:
+    # 上次读取时的文件状态，以及每行的键和原始内容哈希 (与已加载的 DataFrame 逐行对应)
+    def __init__(self, signature, key, keys, hashes):
+        self.signature = signature
+        self.key = key
+        self.keys = keys
+        self.hashes = hashes
+
+
+class RosterDiff:
+    def __init__(self, key, added, removed, modified, changed_columns, full_reload=False):
+        self.key = key                         # 用于对齐的列 (学号 或 姓名)
+        self.added = added                     # 新增的行数
+        self.removed = removed                 # 删除的行数
+        self.modified = modified               # 内容实际发生变化的行数
+        self.changed_columns = changed_columns # 内容发生变化的列 (集合)
+        self.full_reload = full_reload         # 完整加载 (打开监视时，或无法逐行对齐时)
+
+    def is_empty(self):
+        return not self.changed_columns
+
+    def describe(self):
+        if self.full_reload:
+            return "已完整重新加载"
+        if self.is_empty():
+            return "内容没有变化"
+        columns = "、".join(sorted(map(str, self.changed_columns)))
+        return f"新增 {self.added} 行，删除 {self.removed} 行，修改 {self.modified} 行 (变化的列: {columns})"
+
+
+class ReloadResult:
+    def __init__(self, df, summary, snapshot, diff):
+        self.df = df
+        self.summary = summary
+        self.snapshot = snapshot
+        self.diff = diff
+
+
+def _read_raw(filepath):
+    signature = file_signature(filepath)
+    return read_roster(filepath), signature
+
+
+def _snapshot_of(raw, signature):
+    key = choose_key(raw)
+    keys = _key_index(raw[key]) if key else None
+    return RosterSnapshot(signature, key, keys, row_hashes(raw))
+
+
+def load_baseline(filepath):
+    # 打开监视时完整加载一次，同时记录每行的哈希；返回 ReloadResult
+    raw, signature = _read_raw(filepath)
+    snapshot = _snapshot_of(raw, signature)
+    df = compact_student_data(clean_student_data(raw))
+    summary = StudentSummary()
+    summary.update(df)
+    diff = RosterDiff(snapshot.key, len(df), 0, 0, set(df.columns), full_reload=True)
+    return ReloadResult(df, summary, snapshot, diff)
+
+
+def _comparable(s):
+    # 转为 Python 对象，空值 (NaN / NA) 统一为 None，不同 dtype (Int16 与 float 等) 之间可以直接比较
+    return s.astype(object).where(s.notna(), None).to_numpy()
+
+
+def _changed_columns(old_rows, new_rows):
+    # 逐列比较 (两者行已对齐)；返回 (变化的列, 每行是否有变化)
+    columns = set(old_rows.columns) ^ set(new_rows.columns)
+    row_changed = np.zeros(len(new_rows), dtype=bool)
+    for col in set(old_rows.columns) & set(new_rows.columns):
+        a, b = _comparable(old_rows[col]), _comparable(new_rows[col])
+        same = a == b
+        if not same.all():
+            columns.add(col)
+            row_changed |= ~same
+    return columns, row_changed
+
+
+def reload_changes(filepath, df, summary, snapshot):
+    # 读取修改后的文件，只清洗和累加变化的行；不修改传入的 df / summary
+    raw, signature = _read_raw(filepath)
+    new_snapshot = _snapshot_of(raw, signature)
+    if snapshot.key is None or new_snapshot.key != snapshot.key or len(snapshot.keys) != len(df):
+        result = load_baseline(filepath)
+        result.diff.changed_columns = set(result.df.columns) | set(df.columns)
+        return result
+
+    old_pos = snapshot.keys.get_indexer(new_snapshot.keys) # 新表每行在旧表中的位置，新增的行为 -1
+    added = old_pos < 0
+    hash_changed = np.zeros(len(raw), dtype=bool)
+    hash_changed[~added] = snapshot.hashes[old_pos[~added]] != new_snapshot.hashes[~added]
+    removed = np.ones(len(df), dtype=bool)
+    removed[old_pos[~added]] = False
+
+    changed = added | hash_changed
+    unchanged = ~changed
+    parts = [df.iloc[old_pos[unchanged]].reset_index(drop=True)]
+    if changed.any():
+        cleaned = compact_student_data(clean_student_data(raw[changed].reset_index(drop=True), warn=lambda msg: None))
+        parts.append(cleaned)
+    else:
+        cleaned = df.iloc[:0]
+    # 未变化的行在前、变化的行在后拼接，再按新表的行顺序重排；
+    # 只看变化的几行无法判断文本列是否重复度高，拼接后对整表重新压缩
+    merged = _concat_chunks(parts)
+    order = np.empty(len(raw), dtype=np.intp)
+    order[unchanged] = np.arange(int(unchanged.sum()))
+    order[changed] = len(parts[0]) + np.arange(int(changed.sum()))
+    new_df = compact_student_data(merged.take(order).reset_index(drop=True))
+
+    # 修改的行：比较清洗后的新旧内容，哈希不同但清洗后相同 (如 5 与 5.0) 的不算修改
+    modified_in_cleaned = hash_changed[changed]
+    old_modified = df.iloc[old_pos[hash_changed]].reset_index(drop=True)
+    changed_columns, row_changed = _changed_columns(old_modified, cleaned[modified_in_cleaned].reset_index(drop=True))
+    if added.any() or removed.any():
+        changed_columns |= set(df.columns) | set(new_df.columns)
+
+    new_summary = summary.copy()
+    new_summary.remove(pd.concat([df[removed], old_modified]) if removed.any() else old_modified)
+    new_summary.update(cleaned)
+    new_summary.rebuild_rank_bounds(new_df)
+
+    diff = RosterDiff(snapshot.key, int(added.sum()), int(removed.sum()), int(row_changed.sum()), changed_columns)
+    return ReloadResult(new_df, new_summary, new_snapshot, diff)
+
+
+class RosterWatcher:
+    # changed() 只检查文件状态，可以在界面线程中定时调用；reload() 较慢，应在后台执行，
+    # 结果确认使用后调用 accept()
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.snapshot = None
+
+    def start(self):
+        result = load_baseline(self.filepath)
+        self.snapshot = result.snapshot
+        return result
+
+    def changed(self):
+        try:
+            return self.snapshot is not None and file_signature(self.filepath) != self.snapshot.signature
+        except OSError: # 文件正在被替换 (保存时先删除再写入)
+            return False
+
+    def reload(self, df, summary):
+        return reload_changes(self.filepath, df, summary, self.snapshot)
+
+    def accept(self, result):
+        self.snapshot = result.snapshot
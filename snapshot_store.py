@@ -0,0 +1,372 @@
+"""历次学生信息表导出的本地快照库 (只追加)。
+
+每学期都会拿到一份新的学生信息表。以前旧表只是文件夹里的文件，每个 "趋势" 问题都要把它们
+全部重新 read_excel 一遍。快照库把每次导出清洗后保存为一个不可修改、带时间戳的列式分区：
+
+    快照目录/
+        manifest.jsonl            每行一个快照的元数据 (只追加，不改写)
+        parts/<快照编号>.feather   清洗、压缩后的表 (Arrow IPC，写入后设为只读)
+
+  * 导入 (ingest) 时写临时文件再原子改名，然后向 manifest.jsonl 追加一行；同一内容重复导入
+    时直接返回已有的快照 (ingest_file 先按文件的哈希查找，已导入的文件不再读取和清洗)；
+  * 查询只读取用到的列 (Feather 按列存储并内存映射)，已读取的分区按 (快照, 列) 缓存在内存中，
+    不再打开任何 Excel 文件；
+  * history()       某个学生在各次导出中的名次等字段；
+  * distribution()  某列 (如 生源省份) 在各次导出中的人数，distribution_shift() 比较两次导出；
+  * combined()      把多次导出合成一张表，班级 列为快照标签，GUI 和各图表的 "按班级对比" 视图
+                    (省份地图、成绩趋势等) 即按导出批次对比；
+  * merged_latest() 最新一次导出，其中缺失的名次用更早导出中的值补齐，可直接用于成绩趋势图。
+
+快照目录默认为 ~/.local/share/student_info_analysis/snapshots，可用环境变量
+STUDENT_INFO_SNAPSHOT_DIR 指定。命令行用法：
+
+    python snapshot_store.py ingest 2023秋.xlsx 2024春.xlsx
+    python snapshot_store.py list
+    python snapshot_store.py history 张三 --key 姓名
+    python snapshot_store.py distribution 生源省份
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import stat
+import sys
+import threading
+from collections import OrderedDict
+
+from roster_cache import file_digest
+from startup_profile import lazy_module
+from student_loader import (CLASS_COL, CLEANING_RULES_VERSION, RANK_COLS, _compact_ranks, _concat_chunks,
+                            compact_student_data, load_student_data)
+
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+DEFAULT_SNAPSHOT_DIR = os.environ.get(
+    'STUDENT_INFO_SNAPSHOT_DIR',
+    os.path.join(os.path.expanduser('~'), '.local', 'share', 'student_info_analysis', 'snapshots'),
+)
+MANIFEST_NAME = 'manifest.jsonl'
+PARTS_DIRNAME = 'parts'
+PART_SUFFIX = '.feather'
+KEY_COLUMNS = ['学号', '姓名'] # 跨快照对齐学生时按顺序选择第一个存在的列
+SNAPSHOT_COL = '快照'         # 查询结果中标记来源快照的列
+LOADED_CACHE_SIZE = 32         # 内存中保留的 (快照, 列) 读取结果数
+
+
+class Snapshot:
+    def __init__(self, id, label, taken_at, ingested_at, source, digest, rows, columns, rules_version, file):
+        self.id = id                        # 快照编号 (时间戳 + 内容哈希前缀)
+        self.label = label                  # 显示名称 (默认为文件名，如 2023秋)
+        self.taken_at = taken_at            # 导出时间 (默认为源文件的修改时间)，快照按它排序
+        self.ingested_at = ingested_at      # 导入时间
+        self.source = source                # 源文件路径 (直接导入 DataFrame 时可能为空)
+        self.digest = digest                # 源文件 (或表内容) 的 SHA-256
+        self.rows = rows
+        self.columns = columns
+        self.rules_version = rules_version  # 导入时的清洗规则版本
+        self.file = file                    # 分区文件 (相对快照目录)
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    def describe(self):
+        return f"{self.label}  ({self.taken_at[:16].replace('T', ' ')}，{self.rows} 人)"
+
+
+def _frame_digest(df):
+    h = hashlib.sha256()
+    for col in df.columns:
+        h.update(b'\0' + str(col).encode('utf-8'))
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        h.update(pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _timestamp(value):
+    # datetime / ISO 字符串 / 秒数 -> ISO 字符串 (精确到秒)
+    if value is None:
+        value = datetime.datetime.now()
+    elif isinstance(value, (int, float)):
+        value = datetime.datetime.fromtimestamp(value)
+    elif isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return value.replace(microsecond=0).isoformat()
+
+
+class SnapshotStore:
+    def __init__(self, root=None):
+        self.root = root or DEFAULT_SNAPSHOT_DIR
+        self.manifest_path = os.path.join(self.root, MANIFEST_NAME)
+        self._lock = threading.Lock()
+        self._ingest_lock = threading.Lock() # 同一进程内的导入依次进行 (见 ingest)
+        self._loaded = OrderedDict() # (快照编号, 列) -> DataFrame；分区不会被修改，可以一直复用
+        self._snapshots = None
+        self._manifest_size = -1
+
+    # --- 元数据 ---
+
+    def snapshots(self):
+        # 全部快照，按导出时间 (相同时按导入时间) 排序；manifest.jsonl 未变化时不重新解析
+        with self._lock:
+            try:
+                size = os.path.getsize(self.manifest_path)
+            except OSError:
+                size = 0
+            if self._snapshots is None or size != self._manifest_size:
+                self._snapshots = self._read_manifest()
+                self._manifest_size = size
+            return list(self._snapshots)
+
+    def _read_manifest(self):
+        snapshots = []
+        if not os.path.exists(self.manifest_path):
+            return snapshots
+        with open(self.manifest_path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    snapshots.append(Snapshot(**json.loads(line)))
+                except (ValueError, TypeError): # 写了一半的行 (例如导入时断电)
+                    continue
+        snapshots.sort(key=lambda s: (s.taken_at, s.ingested_at))
+        return snapshots
+
+    def get(self, ref):
+        # 按编号、编号前缀或标签查找；标签重复时取最新的一次
+        snapshots = self.snapshots()
+        for s in snapshots:
+            if s.id == ref:
+                return s
+        by_label = [s for s in snapshots if s.label == ref]
+        if by_label:
+            return by_label[-1]
+        by_prefix = [s for s in snapshots if s.id.startswith(str(ref))]
+        if len(by_prefix) == 1:
+            return by_prefix[0]
+        raise ValueError(f"找不到快照: {ref}" if not by_prefix else f"快照编号前缀不唯一: {ref}")
+
+    def resolve(self, refs=None):
+        # None 表示全部快照；返回按时间排序的 Snapshot 列表
+        if refs is None:
+            return self.snapshots()
+        chosen = {self.get(ref).id: None for ref in refs}
+        return [s for s in self.snapshots() if s.id in chosen]
+
+    # --- 导入 ---
+
+    def ingest(self, df, source=None, label=None, taken_at=None, digest=None):
+        # 保存一份已清洗的表；返回 (Snapshot, 是否新建)
+        # label 默认为源文件名，taken_at 默认为源文件的修改时间 (没有源文件时为当前时间)
+        if label is None:
+            label = os.path.splitext(os.path.basename(source))[0] if source else "未命名"
+        if taken_at is None and source and os.path.exists(source):
+            taken_at = os.path.getmtime(source)
+        digest = digest or (file_digest(source) if source and os.path.exists(source) else _frame_digest(df))
+        with self._ingest_lock: # 检查是否已导入与追加 manifest 之间不能插入同一内容的另一次导入
+            existing = self.find(digest)
+            if existing is not None:
+                return existing, False
+            return self._write(df, digest, source, label, taken_at), True
+
+    def _write(self, df, digest, source, label, taken_at):
+        df = compact_student_data(df.copy()) # 统一为压缩后的列类型，各快照之间可以直接拼接和比较
+        taken_at = _timestamp(taken_at)
+        snapshot_id = f"{taken_at.replace('-', '').replace(':', '')}-{digest[:12]}"
+        file = os.path.join(PARTS_DIRNAME, f"{snapshot_id}{PART_SUFFIX}")
+        path = os.path.join(self.root, file)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            try:
+                df.reset_index(drop=True).to_feather(tmp_path) # Feather 要求默认的 RangeIndex
+                os.chmod(tmp_path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH) # 分区写入后只读
+                os.replace(tmp_path, path)
+            except Exception as e:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise ValueError(f"无法保存快照 (某列可能同时混有数字和文本): {e}") from e
+
+        snapshot = Snapshot(
+            id=snapshot_id, label=label, taken_at=taken_at, ingested_at=_timestamp(None),
+            source=os.path.abspath(source) if source else None, digest=digest, rows=len(df),
+            columns=[str(c) for c in df.columns], rules_version=CLEANING_RULES_VERSION, file=file,
+        )
+        line = json.dumps(snapshot.to_dict(), ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.manifest_path, 'a', encoding='utf-8') as f: # 只追加，已有的行不会被改写
+                f.write(line)
+        return snapshot
+
+    def find(self, digest):
+        # 内容 (源文件的 SHA-256) 已导入过时返回该快照，否则返回 None
+        for s in self.snapshots():
+            if s.digest == digest:
+                return s
+        return None
+
+    def ingest_file(self, filepath, label=None, taken_at=None, cache=None):
+        # 读取并清洗学生信息表后导入 (按扩展名选择读取方式，见 roster_readers.py)；
+        # 先按文件内容查找，已导入过的文件不再读取和清洗
+        digest = file_digest(filepath)
+        existing = self.find(digest)
+        if existing is not None:
+            return existing, False
+        df, _ = load_student_data(filepath, cache=cache)
+        return self.ingest(df, source=filepath, label=label, taken_at=taken_at, digest=digest)
+
+    # --- 查询 ---
+
+    def load(self, ref, columns=None):
+        # 读取一个快照 (只读取 columns 中存在的列)；返回的表不要原地修改，它会被缓存复用
+        snapshot = ref if isinstance(ref, Snapshot) else self.get(ref)
+        if columns is not None:
+            columns = [col for col in columns if col in snapshot.columns]
+        key = (snapshot.id, None if columns is None else tuple(columns))
+        with self._lock:
+            df = self._loaded.get(key)
+            if df is not None:
+                self._loaded.move_to_end(key)
+                return df
+        df = pd.read_feather(os.path.join(self.root, snapshot.file), columns=columns)
+        with self._lock:
+            self._loaded[key] = df
+            while len(self._loaded) > LOADED_CACHE_SIZE:
+                self._loaded.popitem(last=False)
+        return df
+
+    def key_column(self, snapshots=None):
+        # 跨快照对齐学生的列：所有快照都有的第一个 KEY_COLUMNS
+        snapshots = self.snapshots() if snapshots is None else snapshots
+        for col in KEY_COLUMNS:
+            if snapshots and all(col in s.columns for s in snapshots):
+                return col
+        raise ValueError(f"快照中没有共同的 {' / '.join(KEY_COLUMNS)} 列，无法跨快照对齐学生")
+
+    def history(self, value, key=None, columns=None, refs=None):
+        # 某个学生在各快照中的取值：每个快照一行 (快照标签为索引)，列为 columns (默认各学期名次)
+        snapshots = self.resolve(refs)
+        key = key or self.key_column(snapshots)
+        columns = list(columns or RANK_COLS)
+        parts, labels = [], []
+        for s in snapshots:
+            df = self.load(s, [key] + columns)
+            if key not in df.columns:
+                continue
+            match = df[df[key].astype(str) == str(value)]
+            if len(match):
+                parts.append(match.tail(1).reindex(columns=columns))
+                labels.append(s.label)
+        if not parts:
+            return pd.DataFrame(columns=columns).rename_axis(SNAPSHOT_COL)
+        table = pd.concat(parts, ignore_index=True)
+        table.index = pd.Index(labels, name=SNAPSHOT_COL)
+        for col in table.columns.intersection(RANK_COLS): # 某些快照中整列为空时拼接结果为 object
+            table[col] = _compact_ranks(pd.to_numeric(table[col], errors='coerce'))
+        return table
+
+    def distribution(self, col, refs=None, normalize=False):
+        # 某列在各快照中的人数：行为取值，列为快照标签 (按时间顺序)
+        counts = {}
+        for s in self.resolve(refs):
+            if col in s.columns:
+                counts[s.label] = self.load(s, [col])[col].value_counts(normalize=normalize, dropna=True)
+        table = pd.DataFrame(counts).fillna(0)
+        table = table[table.sum(axis=1) > 0] # 省份/城市的类别表包含全部标准地名
+        if not normalize:
+            table = table.astype('int64')
+        return table.loc[table.sum(axis=1).sort_values(ascending=False).index]
+
+    def distribution_shift(self, col, before, after):
+        # 两个快照之间某列的变化：人数、占比及其差值，按占比变化的绝对值降序
+        table = self.distribution(col, [before, after])
+        shares = self.distribution(col, [before, after], normalize=True)
+        a, b = self.get(before).label, self.get(after).label
+        shift = pd.DataFrame({
+            f'{a} 人数': table[a], f'{b} 人数': table[b], '人数变化': table[b] - table[a],
+            f'{a} 占比': shares[a].round(4), f'{b} 占比': shares[b].round(4),
+            '占比变化': (shares[b] - shares[a]).round(4),
+        }).rename_axis(col)
+        return shift.loc[shift['占比变化'].abs().sort_values(ascending=False).index]
+
+    def combined(self, refs=None, columns=None):
+        # 多个快照合成一张表，班级 列改为快照标签 (原有的班级列被替换)，用于按导出批次对比的图表
+        parts = []
+        for s in self.resolve(refs):
+            df = self.load(s, columns).drop(columns=[CLASS_COL], errors='ignore')
+            df.insert(0, CLASS_COL, pd.Categorical([s.label] * len(df)))
+            parts.append(df)
+        if not parts:
+            raise ValueError("快照库中没有可用的快照")
+        return _concat_chunks(parts).reset_index(drop=True) if len(parts) > 1 else parts[0]
+
+    def merged_latest(self, refs=None, key=None):
+        # 最新快照的完整表，名次列中的空值用更早快照中同一学生的最新非空值补齐
+        snapshots = self.resolve(refs)
+        if not snapshots:
+            raise ValueError("快照库中没有可用的快照")
+        latest = self.load(snapshots[-1]).copy()
+        rank_cols = [col for col in RANK_COLS if any(col in s.columns for s in snapshots)]
+        if len(snapshots) == 1 or not rank_cols:
+            return latest
+        key = key or self.key_column(snapshots)
+        history = pd.concat([self.load(s, [key] + rank_cols) for s in snapshots], ignore_index=True)
+        history[key] = history[key].astype(str)
+        best = history.groupby(key, sort=False)[rank_cols].last() # 每列取时间上最后一个非空值
+        aligned = best.reindex(latest[key].astype(str).to_numpy())
+        for col in rank_cols:
+            filled = pd.Series(aligned[col].to_numpy(dtype='float64', na_value=np.nan), index=latest.index)
+            if col in latest.columns:
+                filled = latest[col].astype('float64').fillna(filled)
+            latest[col] = _compact_ranks(filled)
+        return latest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="历次学生信息表导出的快照库")
+    parser.add_argument('--store', default=None, help=f"快照目录 (默认 {DEFAULT_SNAPSHOT_DIR})")
+    commands = parser.add_subparsers(dest='command', required=True)
+    ingest = commands.add_parser('ingest', help="导入学生信息表 (每个文件一个快照)")
+    ingest.add_argument('files', nargs='+', help="学生信息表 (.xlsx / .csv / .parquet)")
+    ingest.add_argument('--label', help="快照名称 (只导入一个文件时可用；默认为文件名)")
+    ingest.add_argument('--taken-at', help="导出时间，如 2024-02-20 (默认为文件的修改时间)")
+    commands.add_parser('list', help="列出全部快照")
+    history = commands.add_parser('history', help="某个学生在各快照中的名次")
+    history.add_argument('student', help="学号或姓名")
+    history.add_argument('--key', choices=KEY_COLUMNS, help="按哪一列查找 (默认为各快照共有的学号，否则姓名)")
+    distribution = commands.add_parser('distribution', help="某列在各快照中的人数")
+    distribution.add_argument('column', help="列名，如 生源省份")
+    distribution.add_argument('--shift', nargs=2, metavar=('之前', '之后'), help="比较两个快照 (编号或名称)")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.store)
+    try:
+        if args.command == 'ingest':
+            if args.label and len(args.files) > 1:
+                raise ValueError("--label 只能在导入一个文件时使用")
+            for path in args.files:
+                snapshot, created = store.ingest_file(path, label=args.label, taken_at=args.taken_at)
+                print(f"{'已导入' if created else '已存在'}: {snapshot.id}  {snapshot.describe()}")
+        elif args.command == 'list':
+            for s in store.snapshots():
+                print(f"{s.id}  {s.describe()}  {s.source or ''}")
+        elif args.command == 'history':
+            print(store.history(args.student, key=args.key).to_string())
+        elif args.command == 'distribution':
+            if args.shift:
+                print(store.distribution_shift(args.column, *args.shift).to_string())
+            else:
+                print(store.distribution(args.column).to_string())
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""延迟导入与启动耗时统计。
+
+pandas、pyecharts、matplotlib、jieba 等库体积较大，全部在启动时导入会让窗口
+迟迟不出现。lazy_module() 返回一个占位模块，第一次访问其属性时才真正导入，
+并记录导入耗时；startup_report() 汇总这些耗时，方便发现启动变慢的回归。
+
+直接运行本文件会在独立的子进程中逐个测量各库的冷启动导入耗时：
+
+    python startup_profile.py
+"""
+import importlib
+import subprocess
+import sys
+import threading
+import time
+import types
+
+PROCESS_START = time.perf_counter()
+
+HEAVY_MODULES = ['pandas', 'pyecharts.charts', 'matplotlib.pyplot', 'wordcloud', 'jieba', 'openpyxl', 'pyarrow']
+
+IMPORT_TIMES = {}  # 模块名 -> 首次导入耗时 (秒)
+MILESTONES = {}    # 事件名 -> 距进程启动的时间 (秒)
+_lock = threading.Lock()
+
+
+def timed_import(name):
+    if name in sys.modules:
+        # 已导入时不再计时；其他线程正在导入时 import_module 会等待其初始化完成，
+        # 不会拿到只初始化了一半的模块
+        return importlib.import_module(name)
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    with _lock:
+        IMPORT_TIMES.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def mark(event):
+    with _lock:
+        MILESTONES.setdefault(event, time.perf_counter() - PROCESS_START)
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_target'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_target']
+        if module is None:
+            module = timed_import(self.__name__)
+            self.__dict__['_lazy_target'] = module
+        return module
+
+    def __getattr__(self, attr):
+        # 只有在占位模块上找不到的属性才会走到这里
+        return getattr(self._load(), attr)
+
+
+def lazy_module(name):
+    return LazyModule(name)
+
+
+def startup_report():
+    lines = ["启动过程:"]
+    for event, seconds in sorted(MILESTONES.items(), key=lambda item: item[1]):
+        lines.append(f"  {event}: {seconds * 1000:.0f} ms")
+    lines.append("延迟导入的库 (首次使用时的导入耗时):")
+    if not IMPORT_TIMES:
+        lines.append("  (尚未导入任何大型库)")
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1]):
+        lines.append(f"  {name}: {seconds * 1000:.0f} ms")
+    return "\n".join(lines)
+
+
+def measure_cold_imports(modules=HEAVY_MODULES):
+    # 每个库在全新的解释器中单独导入，结果不受导入顺序和缓存的影响
+    results = {}
+    for name in modules:
+        code = ("import time; t = time.perf_counter(); "
+                f"import {name}; print(time.perf_counter() - t)")
+        proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        results[name] = float(proc.stdout.strip()) if proc.returncode == 0 else None
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in measure_cold_imports().items():
+        cost = "未安装" if seconds is None else f"{seconds * 1000:.0f} ms"
+        print(f"{name:<20} {cost}")
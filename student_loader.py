@@ -0,0 +1,272 @@
+"""学生信息表的加载与清洗规则。
+
+修改 clean_student_data() 或 compact_student_data() 中的任何规则时，请同时递增
+CLEANING_RULES_VERSION，这样旧版本规则生成的缓存会自动失效。
+
+加载后的表经过 compact_student_data() 压缩：低基数文本列存为 category (重复的字符串
+只保存一份)，名次存为可空的小整数。memory_report() 列出每列压缩前后的字节数。
+
+Excel、CSV、Parquet 等文件由 roster_readers.py 按扩展名选择后端读取，清洗规则对所有格式相同。
+
+流式加载 (stream_student_data) 避免了整个 object 表，但仍要保留压缩后的全部数据块并在最后
+拼接，内存随行数线性增长，拼接时短暂存在两份。只需要统计结果 (StudentSummary 等) 时用
+scan_student_data()：每块交给 on_chunk 后随即丢弃，内存只取决于数据块大小和累加的结果。
+"""
+import sys
+
+import perf_trace
+import regions
+from roster_cache import file_digest
+from roster_readers import describe as describe_reader, iter_raw_chunks, read_roster
+from startup_profile import lazy_module
+
+pd = lazy_module('pandas') # 第一次加载文件时才导入
+np = lazy_module('numpy')
+
+CLEANING_RULES_VERSION = 5
+
+RANK_COLS = ['大一上学期名次', '大一下学期名次', '大二上学期名次', '大二下学期名次', '大三上学期名次']
+REQUIRED_COLS = ['性别', '生源省份', '生源城市', '姓名', '寝室号']
+# 流式加载时转换为 category 的低基数文本列，也是汇总统计中按值计数的列
+CATEGORY_COLS = ['性别', '生源省份', '生源城市', '寝室号']
+
+STREAM_CHUNK_ROWS = 5000
+# 同时加载多个班级的表时，记录每行来源班级的列 (见 class_rosters.py)
+CLASS_COL = '班级'
+# 其他文本列中不同取值不超过行数的该比例时也存为 category
+CATEGORY_MAX_RATIO = 0.5
+# 类别表以全部标准地名开头的列 (见 regions.py)：压缩时保留未出现的类别，各数据集的编码保持一致
+REGION_COLS = ['生源省份', '生源城市']
+
+
+def clean_student_data(df, warn=print):
+    # --- 基本数据清洗 ---
+    if '人生格言' in df.columns:
+        df['人生格言'] = df['人生格言'].fillna('')
+    else:
+        warn("警告: 学生信息表中缺少 '人生格言' 列，词云功能将无法使用。")
+        df['人生格言'] = ''  # 创建空列避免后续错误
+
+    for col in RANK_COLS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        else:
+            warn(f"警告: 学生信息表中缺少 '{col}' 列，成绩相关分析可能不完整。")
+
+    # 省份/城市名称规范化为统一的类别 (见 regions.py)，只在加载时做一次
+    if '生源省份' in df.columns:
+        df['生源省份'] = regions.normalize_provinces(df['生源省份'])
+    if '生源城市' in df.columns:
+        df['生源城市'] = regions.normalize_cities(df['生源城市'])
+    for col, unmatched in regions.unmatched_report(df).items():
+        sample = "、".join(list(unmatched)[:10])
+        warn(f"警告: '{col}' 列中有 {len(unmatched)} 个取值未能识别为标准地名 (如: {sample})，将按原样统计。")
+    return df
+
+
+def find_missing_columns(df):
+    # 检查必要的列是否存在
+    return [col for col in REQUIRED_COLS if col not in df.columns]
+
+
+def _compact_ranks(s):
+    # 名次都是整数时存为能容纳最大值的可空整数 (Int16 / Int32)，否则为 float32
+    values = s.to_numpy(dtype='float64', na_value=np.nan)
+    present = values[~np.isnan(values)]
+    if present.size and (present != np.round(present)).any():
+        return s.astype('float32')
+    largest = np.abs(present).max() if present.size else 0
+    for dtype, info in (('Int16', np.iinfo(np.int16)), ('Int32', np.iinfo(np.int32))):
+        if largest <= info.max:
+            return s.astype(dtype)
+    return s.astype('Int64')
+
+
+def _arrow_strings(s):
+    try:
+        return s.astype(pd.StringDtype('pyarrow'))
+    except ImportError: # 没有安装 pyarrow 时保持 object
+        return s
+
+
+def _is_repetitive_text(s):
+    return (
+        (s.dtype == object or isinstance(s.dtype, pd.StringDtype))
+        and pd.api.types.infer_dtype(s, skipna=True) == 'string'
+        and s.nunique() <= CATEGORY_MAX_RATIO * len(s)
+    )
+
+
+def compact_student_data(df):
+    # 原地压缩已清洗的表并返回：
+    #   性别/省份/城市/寝室号/班级，以及重复较多的其他文本列 -> category
+    #   (省份/城市保留 regions.py 的标准地名类别表，其他 category 列去掉未出现的类别)
+    #   其余没有空值的文本列 (姓名等) -> pyarrow 字符串 (连续存储，而不是逐个 Python 对象)
+    #   名次 -> Int16 / Int32 (可空)；其他整数列 (如学号) -> 能容纳其取值的最小整数类型
+    # 流式加载时对每个数据块分别调用，拼接时合并类别表 (_concat_chunks)
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            if col not in REGION_COLS:
+                df[col] = s.cat.remove_unused_categories()
+        elif col in RANK_COLS:
+            df[col] = _compact_ranks(s)
+        elif col in CATEGORY_COLS or col == CLASS_COL:
+            df[col] = s.where(s.isna(), s.astype(str)).astype('category')
+        elif _is_repetitive_text(s):
+            df[col] = s.astype('category')
+        elif s.dtype == object and s.notna().all() and pd.api.types.infer_dtype(s) == 'string':
+            df[col] = _arrow_strings(s)
+        elif pd.api.types.is_integer_dtype(s.dtype) and not pd.api.types.is_extension_array_dtype(s.dtype):
+            df[col] = pd.to_numeric(s, downcast='integer')
+    return df
+
+
+def _uncompacted_bytes(s):
+    # 按 read_excel 的默认形式估算：数值为 8 字节的 float64 / int64，文本为 Python 字符串 (object)
+    if pd.api.types.is_numeric_dtype(s.dtype) and not isinstance(s.dtype, pd.CategoricalDtype):
+        return 8 * len(s)
+    return int(s.astype(object).memory_usage(deep=True, index=False))
+
+
+def memory_report(df, original=None):
+    # 每列压缩前后的字节数；original 为压缩前的表 (同名列)，没有时按 read_excel 的默认类型估算
+    rows = []
+    for col in df.columns:
+        s = df[col]
+        if original is not None and col in original.columns:
+            before_dtype = str(original[col].dtype)
+            before = int(original[col].memory_usage(deep=True, index=False))
+        else:
+            before_dtype = "(估算)"
+            before = _uncompacted_bytes(s)
+        rows.append((str(col), before_dtype, str(s.dtype), before, int(s.memory_usage(deep=True, index=False))))
+    report = pd.DataFrame(rows, columns=['列', '压缩前类型', '类型', '压缩前字节', '字节']).set_index('列')
+    report.loc['合计'] = ['', '', report['压缩前字节'].sum(), report['字节'].sum()]
+    report['压缩比'] = (report['压缩前字节'] / report['字节'].clip(lower=1)).astype(float).round(1)
+    return report
+
+
+def format_memory_report(report):
+    lines = [f"{'列':<10} {'压缩前':>10} {'压缩后':>10} {'压缩比':>6}  类型"]
+    for col, r in report.iterrows():
+        dtype = f"{r['压缩前类型']} -> {r['类型']}" if r['类型'] else ""
+        lines.append(f"{col:<10} {r['压缩前字节'] / 1024:9.1f}K {r['字节'] / 1024:9.1f}K {r['压缩比']:5.1f}x  {dtype}")
+    return "\n".join(lines)
+
+
+def _concat_chunks(chunks):
+    # 按列拼接，category 列合并类别表而不退化为 object；
+    # 各块的列可以不同 (不同班级的表)，某块缺少的列补为空值
+    if len(chunks) == 1:
+        return chunks[0]
+    union_categoricals = pd.api.types.union_categoricals
+    columns = list(dict.fromkeys(col for chunk in chunks for col in chunk.columns))
+    data = {}
+    for col in columns:
+        present = [chunk[col] for chunk in chunks if col in chunk.columns]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in present):
+            dtype = present[0].dtype
+            parts = [
+                chunk[col] if col in chunk.columns
+                else pd.Series(pd.Categorical.from_codes([-1] * len(chunk), dtype=dtype))
+                for chunk in chunks
+            ]
+            data[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+        else:
+            parts = [chunk.reindex(columns=[col])[col] for chunk in chunks]
+            data[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(data)
+
+
+def tag_class(df, class_name):
+    # 标记每行的来源班级；表中已有 班级 列时只填补其中的空值
+    if CLASS_COL in df.columns:
+        values = df[CLASS_COL]
+        df[CLASS_COL] = values.where(values.isna(), values.astype(str)).fillna(class_name).astype('category')
+    else:
+        df.insert(0, CLASS_COL, pd.Categorical([class_name] * len(df)))
+    return df
+
+
+def merge_rosters(frames):
+    # 合并多个已清洗的表：先压缩各表，再按列拼接 (合并类别表)
+    return _concat_chunks([compact_student_data(df) for df in frames])
+
+
+def iter_roster_chunks(filepath, chunk_size=STREAM_CHUNK_ROWS, warn=print):
+    # 按文件类型分块读取 (见 roster_readers.iter_raw_chunks)，每块清洗、压缩后产出
+    chunk_warn = warn  # 列缺失等警告只在第一块时输出一次
+    for chunk in iter_raw_chunks(filepath, chunk_size):
+        yield compact_student_data(clean_student_data(chunk, warn=chunk_warn))
+        chunk_warn = lambda msg: None
+
+
+def stream_student_data(filepath, chunk_size=STREAM_CHUNK_ROWS, on_chunk=None):
+    # 流式加载：不构建整个 object 表，但压缩后的各块全部保留，_concat_chunks 拼接时
+    # 峰值内存约为 "两份压缩后的结果 + 一个数据块"；内存固定的统计见 scan_student_data()
+    chunks = []
+    for chunk in iter_roster_chunks(filepath, chunk_size):
+        if on_chunk is not None:
+            on_chunk(chunk)
+        chunks.append(chunk)
+    return _concat_chunks(chunks)
+
+
+def scan_student_data(filepath, on_chunk, chunk_size=STREAM_CHUNK_ROWS, warn=print):
+    # 只做统计的流式加载：每块清洗后交给 on_chunk，随即丢弃，不拼接整张表；返回行数
+    # 峰值内存约为 "一个数据块 + on_chunk 累加的结果"，与表的行数无关
+    rows = 0
+    with perf_trace.span("流式统计", cat='load', reader=describe_reader(filepath)) as trace:
+        for chunk in iter_roster_chunks(filepath, chunk_size, warn):
+            on_chunk(chunk)
+            rows += len(chunk)
+        trace.set(rows=rows)
+    return rows
+
+
+def load_student_data(filepath, cache=None, streaming=False, on_chunk=None):
+    # 读取并清洗学生信息表；返回 (DataFrame, 是否命中缓存)
+    # cache 为 None 时不使用缓存；on_chunk 会收到清洗后的每个数据块
+    # (非流式加载或命中缓存时收到整张表)，用于同步更新图表所需的统计
+    digest = None
+    if cache is not None:
+        with perf_trace.span("读取缓存", cat='load') as trace:
+            digest = file_digest(filepath)
+            cached = cache.get(digest, CLEANING_RULES_VERSION)
+            trace.set(hit=cached is not None)
+        if cached is not None:
+            if on_chunk is not None:
+                with perf_trace.span("加载时统计", cat='load', rows=len(cached)):
+                    on_chunk(cached)
+            return cached, True
+
+    if streaming:
+        with perf_trace.span("流式读取与清洗", cat='load') as trace:
+            df = stream_student_data(filepath, on_chunk=on_chunk)
+            trace.set(rows=len(df))
+    else:
+        with perf_trace.span("读取文件", cat='load', reader=describe_reader(filepath)) as trace:
+            df = read_roster(filepath)
+            trace.set(rows=len(df))
+        with perf_trace.span("清洗", cat='load', rows=len(df)):
+            df = compact_student_data(clean_student_data(df))
+        if on_chunk is not None:
+            with perf_trace.span("加载时统计", cat='load', rows=len(df)):
+                on_chunk(df)
+
+    if cache is not None:
+        with perf_trace.span("写入缓存", cat='load'):
+            cache.put(digest, CLEANING_RULES_VERSION, df)
+    return df, False
+
+
+if __name__ == "__main__":
+    # python student_loader.py 学生信息表.xlsx ...：打印各表压缩前后的内存占用
+    for path in sys.argv[1:]:
+        original = clean_student_data(read_roster(path), warn=lambda msg: None)
+        compacted = compact_student_data(original.copy())
+        print(f"{path} ({len(compacted)} 行)")
+        print(format_memory_report(memory_report(compacted, original)))
+        print("估算 (与文本存为 Python 字符串、数值存为 64 位时相比):")
+        print(format_memory_report(memory_report(compacted)))
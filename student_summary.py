@@ -0,0 +1,224 @@
+"""加载数据时一次性构建的统计汇总，供所有图表共用。
+
+StudentSummary.update() 接收清洗后的数据块 (流式加载时为每个块，否则为整张表)，
+在同一次遍历中累加：性别/省份/城市/寝室人数 (有 班级 列时同时按班级分别计数)、
+每个寝室的成员名单、各学期名次的统计量。图表直接读取这些结果，不必各自重新扫描整张表。加载新文件时应创建新的
+StudentSummary，旧的随旧数据一起丢弃。
+
+文件被修改后增量更新时 (见 roster_watch.py)，先 copy()，再 remove() 删除和修改前的行、
+update() 新增和修改后的行；图表任务可能仍在读取旧的汇总，所以不直接修改原对象。
+
+筛选出的部分学生的汇总由 filter_index.py 用预先编号的列直接统计 (update_counts)，
+不再逐块调用 update()。
+
+只统计、不保留数据时 (student_loader.scan_student_data) 可以传入 sketch_cols (如
+category_ranking.SKETCH_COLS)：这些列改用 CategorySketch 近似计数，内存固定，不随不同城市的个数增长；
+is_approximate(col) 指出哪些列是近似值。整张表留在内存中时近似计数几乎不省内存，应使用精确计数。
+"""
+from collections import Counter
+from copy import deepcopy
+
+from category_ranking import CategorySketch
+from startup_profile import lazy_module
+from student_loader import CATEGORY_COLS, CLASS_COL, RANK_COLS
+
+pd = lazy_module('pandas')
+np = lazy_module('numpy')
+
+
+class StudentSummary:
+    def __init__(self, sketch_cols=()):
+        self.rows = 0
+        self.sketch_cols = tuple(sketch_cols) # 这些列只做近似计数 (按班级的计数仍是精确的)
+        self._sketch = CategorySketch(self.sketch_cols) if self.sketch_cols else None
+        self._counters = {col: Counter() for col in CATEGORY_COLS if col not in self.sketch_cols}
+        self.classes = []                 # 班级名，按首次出现的顺序 (单个表时为空)
+        self._class_counters = {col: Counter() for col in CATEGORY_COLS}  # 列 -> {(班级, 取值): 人数}
+        self.dorm_members = {}            # 寝室号 -> [姓名, ...]，按寝室首次出现的顺序
+        self.students_with_ranks = 0      # 至少有一个学期名次的学生数
+        self._rank_acc = {}               # 学期列 -> [人数, 总和, 最小值, 最大值]
+        self._stale_rank_bounds = set()   # remove() 删掉了最小/最大值、需要 rebuild_rank_bounds() 的学期列
+
+    def copy(self):
+        other = StudentSummary()
+        other.rows = self.rows
+        other.sketch_cols = self.sketch_cols
+        other._sketch = deepcopy(self._sketch)
+        other._counters = {col: Counter(c) for col, c in self._counters.items()}
+        other.classes = list(self.classes)
+        other._class_counters = {col: Counter(c) for col, c in self._class_counters.items()}
+        other.dorm_members = {dorm: list(members) for dorm, members in self.dorm_members.items()}
+        other.students_with_ranks = self.students_with_ranks
+        other._rank_acc = {col: list(acc) for col, acc in self._rank_acc.items()}
+        other._stale_rank_bounds = set(self._stale_rank_bounds)
+        return other
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col, counter in self._counters.items():
+            if col in chunk.columns:
+                vc = chunk[col].value_counts()
+                counter.update(dict(zip(vc.index.tolist(), vc.values.tolist())))
+        if self._sketch is not None:
+            self._sketch.update(chunk)
+        if CLASS_COL in chunk.columns:
+            self._update_classes(chunk)
+        if '姓名' in chunk.columns and '寝室号' in chunk.columns:
+            self._update_dorms(chunk)
+        self.update_ranks(chunk)
+
+    def _update_classes(self, chunk):
+        known = set(self.classes)
+        self.classes.extend(c for c in chunk[CLASS_COL].dropna().astype(str).unique() if c not in known)
+        for col in CATEGORY_COLS:
+            if col in chunk.columns:
+                sizes = chunk.groupby([CLASS_COL, col], observed=True).size()
+                self._class_counters[col].update(dict(zip(sizes.index.tolist(), sizes.values.tolist())))
+
+    def _update_dorms(self, chunk):
+        for dorm, members in dorm_members_of(chunk).items():
+            self.dorm_members.setdefault(dorm, []).extend(members)
+
+    def update_ranks(self, chunk):
+        # 只累加名次统计；filter_index.py 统计筛选出的子集时也单独调用
+        cols = [col for col in RANK_COLS if col in chunk.columns]
+        if not cols:
+            return
+        values = chunk[cols].to_numpy(dtype='float64', na_value=np.nan)
+        present = ~np.isnan(values)
+        self.students_with_ranks += int(present.any(axis=1).sum())
+        for j, col in enumerate(cols):
+            column = values[present[:, j], j]
+            if column.size == 0:
+                continue
+            acc = self._rank_acc.setdefault(col, [0, 0.0, np.inf, -np.inf])
+            acc[0] += int(column.size)
+            acc[1] += float(column.sum())
+            acc[2] = min(acc[2], float(column.min()))
+            acc[3] = max(acc[3], float(column.max()))
+
+    def update_counts(self, col, counts, class_counts=None):
+        # 直接累加已经统计好的人数：counts 为 取值 -> 人数，class_counts 为 (班级, 取值) -> 人数
+        self._counters[col].update(counts)
+        if class_counts:
+            self._class_counters[col].update(class_counts)
+
+    def remove(self, chunk):
+        # update() 的逆操作：从汇总中扣除这些行 (它们必须是之前 update() 过的行)
+        self.rows -= len(chunk)
+        for col, counter in self._counters.items():
+            if col in chunk.columns:
+                vc = chunk[col].value_counts()
+                _subtract(counter, dict(zip(vc.index.tolist(), vc.values.tolist())))
+        if self._sketch is not None:
+            self._sketch.remove(chunk)
+        if CLASS_COL in chunk.columns:
+            for col in CATEGORY_COLS:
+                if col in chunk.columns:
+                    sizes = chunk.groupby([CLASS_COL, col], observed=True).size()
+                    _subtract(self._class_counters[col], dict(zip(sizes.index.tolist(), sizes.values.tolist())))
+        if '姓名' in chunk.columns and '寝室号' in chunk.columns:
+            for dorm, members in dorm_members_of(chunk).items():
+                remaining = self.dorm_members.get(dorm, [])
+                for name in members:
+                    if name in remaining:
+                        remaining.remove(name)
+                if not remaining:
+                    self.dorm_members.pop(dorm, None)
+        self._remove_ranks(chunk)
+
+    def _remove_ranks(self, chunk):
+        cols = [col for col in RANK_COLS if col in chunk.columns]
+        if not cols:
+            return
+        values = chunk[cols].to_numpy(dtype='float64', na_value=np.nan)
+        present = ~np.isnan(values)
+        self.students_with_ranks -= int(present.any(axis=1).sum())
+        for j, col in enumerate(cols):
+            column = values[present[:, j], j]
+            acc = self._rank_acc.get(col)
+            if column.size == 0 or acc is None:
+                continue
+            acc[0] -= int(column.size)
+            acc[1] -= float(column.sum())
+            if acc[0] <= 0:
+                del self._rank_acc[col]
+            elif column.min() <= acc[2] or column.max() >= acc[3]:
+                self._stale_rank_bounds.add(col) # 最小/最大值无法直接扣除
+
+    def rebuild_rank_bounds(self, df):
+        # remove() 之后用完整的新表重新计算受影响学期的最小/最大名次
+        for col in self._stale_rank_bounds:
+            if col in self._rank_acc and col in df.columns:
+                column = df[col].dropna()
+                self._rank_acc[col][2:] = [float(column.min()), float(column.max())]
+        self._stale_rank_bounds.clear()
+
+    def counts(self, col):
+        # 返回与 value_counts() 相同形式的 Series (降序，不含 0)；近似计数的列只含记录下来的取值
+        if col in self.sketch_cols:
+            return self._sketch.counts(col)
+        counter = self._counters.get(col)
+        if not counter:
+            return pd.Series(dtype='int64')
+        counts = pd.Series(counter, dtype='int64')
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def total(self, col):
+        # 该列非空的人数
+        if col in self.sketch_cols:
+            return self._sketch.total(col)
+        return sum(n for n in self._counters.get(col, {}).values() if n > 0)
+
+    def distinct(self, col):
+        # 不同取值的个数 (不含人数为 0 的)；近似计数的列为估计值
+        if col in self.sketch_cols:
+            return self._sketch.distinct(col)
+        return sum(1 for n in self._counters.get(col, {}).values() if n > 0)
+
+    def is_approximate(self, col):
+        return col in self.sketch_cols
+
+    def class_counts(self, col):
+        # 行 = 班级，列 = 取值 (按总人数降序)，与 charts.class_value_counts() 的结果形式相同
+        counter = self._class_counters.get(col)
+        if not counter:
+            return pd.DataFrame(dtype='int64')
+        table = pd.Series(counter, dtype='int64').unstack(fill_value=0)
+        table.index = table.index.astype(str)
+        table = table.reindex([c for c in self.classes if c in table.index])
+        return table[table.sum().sort_values(ascending=False, kind='stable').index]
+
+    def rank_stats(self):
+        # 各学期名次的 人数 / 平均 / 最好 / 最差
+        rows = {
+            col: {'人数': n, '平均名次': total / n, '最好名次': lo, '最差名次': hi}
+            for col, (n, total, lo, hi) in self._rank_acc.items()
+        }
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+
+def _subtract(counter, counts):
+    counter.subtract(counts)
+    for value in counts:
+        if counter[value] <= 0:
+            del counter[value]
+
+
+def dorm_members_of(df):
+    # 寝室号 -> [姓名, ...]：按寝室编号稳定排序后切分，不逐行循环
+    valid = df.dropna(subset=['姓名', '寝室号'])
+    if valid.empty:
+        return {}
+    names = valid['姓名'].astype(str).to_numpy()
+    dorm_codes, dorm_names = pd.factorize(valid['寝室号'].astype(str)) # 按首次出现的顺序编号
+    sizes = np.bincount(dorm_codes, minlength=len(dorm_names))
+    order = np.argsort(dorm_codes, kind='stable')
+    groups = np.split(names[order], np.cumsum(sizes)[:-1])
+    return {dorm: members.tolist() for dorm, members in zip(dorm_names.tolist(), groups)}
+
+
+def summarize(df):
+    summary = StudentSummary()
+    summary.update(df)
+    return summary
@@ -0,0 +1,37 @@
+import json
+import os
+
+import pandas as pd
+
+from batch_render import roster_output_dirs, run_batch
+
+
+def test_same_filename_in_different_folders(tmp_path):
+    paths = [str(tmp_path / 'x' / 'roster.xlsx'), str(tmp_path / 'y' / 'roster.xlsx'), str(tmp_path / '2班.csv')]
+    dirs = roster_output_dirs('out', paths)
+    assert [os.path.basename(d) for d in dirs.values()] == ['roster', 'roster(2)', '2班']
+
+
+def test_run_batch_keeps_outputs_apart(tmp_path):
+    roster = pd.DataFrame({
+        '姓名': ['甲', '乙', '丙', '丁'],
+        '性别': ['男', '女', '女', '男'],
+        '生源省份': ['山东', '江苏', '山东', '四川'],
+        '生源城市': ['青岛', '南京', '济南', '成都'],
+        '寝室号': ['1-101', '1-102', '1-102', '1-101'],
+    })
+    paths = []
+    for folder, n in (('x', 4), ('y', 3)):
+        os.makedirs(tmp_path / folder)
+        paths.append(str(tmp_path / folder / 'roster.csv'))
+        roster.head(n).to_csv(paths[-1], index=False)
+
+    out = tmp_path / 'out'
+    manifest = run_batch(paths + paths[:1], str(out), ['gender'], workers=1, use_cache=False)
+
+    assert len(manifest['loads']) == 2 # 重复给出的文件只处理一次
+    outputs = [r['output'] for r in manifest['outputs']]
+    assert len(set(outputs)) == len(outputs) == 2
+    assert {os.path.basename(os.path.dirname(o)) for o in outputs} == {'roster', 'roster(2)'}
+    with open(out / 'manifest.json', encoding='utf-8') as f:
+        assert json.load(f)['outputs'] == manifest['outputs']
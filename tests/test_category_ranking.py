@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from category_ranking import (OTHER_LABEL, CategorySketch, HyperLogLog, SpaceSaving, top_k_columns,
+                              top_k_counts, top_k_indices)
+from student_summary import StudentSummary
+
+
+def zipf_cities(n, distinct, seed=0):
+    # 人数按 Zipf 分布的城市列 (少数城市人数很多，大量城市只有几人)
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, distinct + 1) ** 1.1
+    picks = rng.choice(distinct, size=n, p=weights / weights.sum())
+    return pd.Series([f"城市{i}" for i in picks])
+
+
+@pytest.mark.parametrize('k', [0, 1, 3, 7, 20])
+def test_top_k_indices_matches_stable_argsort(k):
+    values = np.array([5, 1, 5, 3, 9, 3, 3, 0, 9, 2])
+    assert top_k_indices(values, k).tolist() == np.argsort(-values, kind='stable')[:k].tolist()
+
+
+def test_top_k_counts_merges_rest_into_other():
+    counts = pd.Series({'北京': 10, '上海': 5, '广州': 3, '深圳': 1})
+    assert top_k_counts(counts, 2).to_dict() == {'北京': 10, '上海': 5, OTHER_LABEL: 4}
+    assert list(top_k_counts(counts, 2, other_label=None).index) == ['北京', '上海']
+
+
+def test_existing_other_value_does_not_take_a_slot():
+    counts = pd.Series({'北京': 10, OTHER_LABEL: 8, '上海': 5, '广州': 3, '深圳': 1})
+    top = top_k_counts(counts, 2)
+    assert list(top.index) == ['北京', '上海', OTHER_LABEL]
+    assert top[OTHER_LABEL] == 8 + 3 + 1
+    assert top.sum() == counts.sum()
+
+
+def test_partial_counts_are_completed_by_total():
+    counts = pd.Series({'北京': 10, OTHER_LABEL: 2, '上海': 5})
+    top = top_k_counts(counts, None, total=30)
+    assert list(top.index) == ['北京', '上海', OTHER_LABEL]
+    assert top[OTHER_LABEL] == 30 - 15
+
+
+def test_top_k_columns_keeps_other_last():
+    table = pd.DataFrame({'北京': [5, 5], OTHER_LABEL: [4, 4], '上海': [2, 3], '广州': [1, 2]},
+                         index=['一班', '二班'])
+    top = top_k_columns(table, 2)
+    assert list(top.columns) == ['北京', '上海', OTHER_LABEL]
+    assert top[OTHER_LABEL].tolist() == [5, 6]
+
+
+@pytest.mark.parametrize('chunk_size', [1_000, 50_000])
+def test_space_saving_bounds(chunk_size):
+    cities = zipf_cities(50_000, 3_000)
+    exact = cities.value_counts()
+    heavy = SpaceSaving(capacity=64)
+    for start in range(0, len(cities), chunk_size):
+        vc = cities.iloc[start:start + chunk_size].value_counts()
+        heavy.update_counts(dict(zip(vc.index, vc.values.tolist())))
+
+    assert heavy.total == len(cities)
+    table = heavy.top()
+    true = exact.reindex(table.index).to_numpy()
+    # 记录的人数是上界，减去误差后是下界；误差不超过 已读人数 / capacity
+    assert (table['人数'].to_numpy() >= true).all()
+    assert (table['最少人数'].to_numpy() <= true).all()
+    assert table['误差'].max() <= len(cities) / heavy.capacity
+    # 未记录的取值不超过 floor，因此真实人数超过 floor 的取值都在其中
+    assert exact.drop(table.index).max() <= heavy.floor
+    assert set(exact.index[exact > heavy.floor]) <= set(table.index)
+
+
+def test_space_saving_merge_keeps_bounds():
+    cities = zipf_cities(40_000, 2_000, seed=1)
+    parts = [SpaceSaving(capacity=64) for _ in range(2)]
+    for part, half in zip(parts, (cities.iloc[:20_000], cities.iloc[20_000:])):
+        vc = half.value_counts()
+        part.update_counts(dict(zip(vc.index, vc.values.tolist())))
+    parts[0].merge(parts[1])
+
+    table = parts[0].top()
+    true = cities.value_counts().reindex(table.index, fill_value=0).to_numpy()
+    assert (table['人数'].to_numpy() >= true).all()
+    assert (table['最少人数'].to_numpy() <= true).all()
+    assert parts[0].total == len(cities)
+
+
+def test_space_saving_remove_keeps_bounds():
+    cities = zipf_cities(30_000, 2_000, seed=2)
+    heavy = SpaceSaving(capacity=64)
+    vc = cities.value_counts()
+    heavy.update_counts(dict(zip(vc.index, vc.values.tolist())))
+    removed = cities.iloc[:10_000].value_counts()
+    heavy.remove_counts(dict(zip(removed.index, removed.values.tolist())))
+
+    table = heavy.top()
+    true = cities.iloc[10_000:].value_counts().reindex(table.index, fill_value=0).to_numpy()
+    assert (table['人数'].to_numpy() >= true).all()
+    assert (table['最少人数'].to_numpy() <= true).all()
+    assert heavy.total == 20_000
+
+
+@pytest.mark.parametrize('distinct', [50, 2_000, 40_000])
+def test_hyperloglog_error(distinct):
+    hll = HyperLogLog(precision=12)
+    values = pd.Series([f"取值{i}" for i in range(distinct)])
+    hll.update(pd.concat([values, values.iloc[::3]])) # 重复的取值不影响估计
+    # 标准误差约 1.6%，允许 4 倍
+    assert abs(hll.estimate() - distinct) <= 0.065 * distinct
+
+
+def test_hyperloglog_merge_equals_union():
+    a, b = HyperLogLog(), HyperLogLog()
+    a.update(pd.Series([f"取值{i}" for i in range(0, 6_000)]))
+    b.update(pd.Series([f"取值{i}" for i in range(4_000, 10_000)]))
+    both = HyperLogLog()
+    both.update(pd.Series([f"取值{i}" for i in range(10_000)]))
+    a.merge(b)
+    assert (a.registers == both.registers).all()
+
+
+def test_sketched_summary_ranks_like_exact_summary():
+    df = pd.DataFrame({'生源城市': zipf_cities(60_000, 3_000, seed=3), '性别': ['男', '女'] * 30_000})
+    exact, sketched = StudentSummary(), StudentSummary(sketch_cols=['生源城市'])
+    for start in range(0, len(df), 10_000):
+        exact.update(df.iloc[start:start + 10_000])
+        sketched.update(df.iloc[start:start + 10_000])
+
+    assert sketched.is_approximate('生源城市') and not sketched.is_approximate('性别')
+    assert sketched.counts('性别').equals(exact.counts('性别'))
+    assert sketched.total('生源城市') == exact.total('生源城市')
+    assert abs(sketched.distinct('生源城市') - exact.distinct('生源城市')) <= 0.065 * exact.distinct('生源城市')
+    top = top_k_counts(sketched.counts('生源城市'), 10, total=sketched.total('生源城市'))
+    assert list(top.index[:10]) == list(exact.counts('生源城市').index[:10])
+    assert top.sum() == len(df)
+
+
+def test_sketched_summary_copy_and_remove():
+    df = pd.DataFrame({'生源城市': zipf_cities(20_000, 1_000, seed=4)})
+    summary = StudentSummary(sketch_cols=['生源城市'])
+    summary.update(df)
+    reloaded = summary.copy()
+    reloaded.remove(df.iloc[:5_000])
+
+    assert summary.total('生源城市') == 20_000 # 原对象不受影响
+    assert reloaded.total('生源城市') == 15_000
+    counts = reloaded.counts('生源城市')
+    true = df['生源城市'].iloc[5_000:].value_counts().reindex(counts.index, fill_value=0)
+    assert (counts >= true).all()
+
+
+def test_category_sketch_counts_category_columns():
+    cities = zipf_cities(5_000, 100, seed=5)
+    sketch = CategorySketch(['生源城市'])
+    sketch.update(pd.DataFrame({'生源城市': cities.astype('category')}))
+    assert sketch.total('生源城市') == len(cities)
+    assert sketch.counts('生源城市').to_dict() == cities.value_counts().to_dict()
+
+
+def test_approximate_summary_is_part_of_the_cache_key(tmp_path):
+    import charts
+    from artifact_cache import ArtifactCache
+    from dashboard_server import DashboardData
+
+    df = pd.DataFrame({'生源城市': zipf_cities(5_000, 400, seed=6), '性别': ['男', '女'] * 2_500})
+    exact, sketched = StudentSummary(), StudentSummary(sketch_cols=['生源城市'])
+    exact.update(df)
+    sketched.update(df)
+    cache = ArtifactCache(str(tmp_path / 'cache'))
+    output = str(tmp_path / 'city.html')
+
+    assert not charts.render_chart('city', df, output, cache=cache, summary=sketched).from_cache
+    assert not charts.render_chart('city', df, output, cache=cache, summary=exact).from_cache
+    # 精确的汇总与不传汇总时结果相同，共用缓存；不涉及近似列的图表也共用
+    assert charts.render_chart('city', df, output, cache=cache).from_cache
+    gender = str(tmp_path / 'gender.html')
+    charts.render_chart('gender', df, gender, cache=cache, summary=sketched)
+    assert charts.render_chart('gender', df, gender, cache=cache, summary=exact).from_cache
+
+    approx, precise = DashboardData(df, sketched), DashboardData(df, exact)
+    assert approx.chart_etag('city', False) != precise.chart_etag('city', False)
+    assert approx.chart_etag('gender', False) == precise.chart_etag('gender', False)
@@ -0,0 +1,25 @@
+import socket
+import threading
+
+import pandas as pd
+
+import dashboard_server
+
+
+def test_cli_reports_port_in_use(tmp_path, capsys):
+    roster = tmp_path / "roster.csv"
+    pd.DataFrame({'姓名': ['甲', '乙'], '性别': ['男', '女'], '生源省份': ['山东', '江苏'],
+                  '生源城市': ['青岛', '南京'], '寝室号': ['1-101', '1-102']}).to_csv(roster, index=False)
+    with socket.socket() as taken:
+        taken.bind(('127.0.0.1', 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        codes = []
+        thread = threading.Thread(target=lambda: codes.append(dashboard_server.main(
+            [str(roster), '--host', '127.0.0.1', '--port', str(port), '--no-cache'])), daemon=True)
+        thread.start()
+        thread.join(timeout=30)
+
+    assert not thread.is_alive(), "端口被占用时看板命令没有退出"
+    assert codes == [1]
+    assert "错误" in capsys.readouterr().err
@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+
+from filter_index import FilterIndex, dorm_building, parse_filter, parse_filters
+from student_summary import summarize
+
+
+def test_parse_filter_splits_values():
+    assert parse_filter("生源省份=山东,江苏") == ('生源省份', ['山东', '江苏'])
+    # 中文标点和多余的空格
+    assert parse_filter(" 生源城市 = 青岛市，济南市、 烟台市；") == ('生源城市', ['青岛市', '济南市', '烟台市'])
+
+
+def test_parse_filters_merges_repeated_columns():
+    filters = parse_filters(["性别=女", "生源省份=山东", "生源省份=江苏;浙江"])
+    assert filters == {'性别': ['女'], '生源省份': ['山东', '江苏', '浙江']}
+    assert parse_filters([]) == {}
+
+
+@pytest.mark.parametrize('text', [
+    "生源省份",          # 没有 =
+    "籍贯=山东",         # 不可筛选的列
+    "性别=",             # 没有取值
+    "性别= , ，",
+])
+def test_parse_filter_rejects(text):
+    with pytest.raises(ValueError):
+        parse_filter(text)
+
+
+@pytest.mark.parametrize('dorm, building', [
+    ('3-205', '3'),
+    ('5栋302', '5'),
+    ('A#101', 'A'),
+    ('1205', '1'),
+    ('12', '12'),
+])
+def test_dorm_building(dorm, building):
+    assert dorm_building(dorm) == building
+
+
+def roster():
+    n = 60
+    return pd.DataFrame({
+        '姓名': [f"学生{i}" for i in range(n)],
+        '性别': pd.Categorical(['男', '女', '女'] * (n // 3)),
+        '生源省份': pd.Categorical(['山东', '江苏', '浙江', '山东', '四川'] * (n // 5)),
+        '生源城市': ['青岛市', '南京市', '杭州市', '济南市', '成都市'] * (n // 5),
+        '寝室号': [f"{1 + i % 3}-{101 + i // 6}" for i in range(n)],
+        '大一上学期名次': pd.array(range(1, n + 1), dtype='Int32'),
+    })
+
+
+@pytest.mark.parametrize('filters', [
+    {'性别': ['女']},
+    {'生源省份': ['山东', '江苏'], '性别': ['男']},
+    {'楼栋': ['2'], '生源城市': ['青岛市', '成都市']},
+    {'生源省份': ['西藏']},
+])
+def test_subset_matches_boolean_mask(filters):
+    df = roster()
+    mask = pd.Series(True, index=df.index)
+    for col, values in filters.items():
+        column = df['寝室号'].map(dorm_building) if col == '楼栋' else df[col].astype(str)
+        mask &= column.isin(values)
+    expected = df[mask]
+
+    result = FilterIndex(df).subset(filters)
+    assert result.df['姓名'].tolist() == expected['姓名'].tolist()
+    exact = summarize(expected)
+    for col in ['性别', '生源省份', '生源城市', '寝室号']:
+        assert result.summary.counts(col).to_dict() == exact.counts(col).to_dict()
+    assert result.summary.dorm_members == exact.dorm_members
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from grade_analytics import _group_ranks, analyze, group_spearman
+
+
+def spearman(x, y):
+    # 参照实现：成对删除缺失值，平均排名后求 Pearson 系数
+    pairs = pd.DataFrame({'x': x, 'y': y}).dropna()
+    if len(pairs) < 3 or pairs['x'].nunique() < 2 or pairs['y'].nunique() < 2:
+        return np.nan
+    return np.corrcoef(pairs['x'].rank(), pairs['y'].rank())[0, 1]
+
+
+def ranks_with_gaps(n, seed, integer=True, missing=0.1):
+    rng = np.random.default_rng(seed)
+    x = rng.integers(1, n // 4, size=n).astype('float64') # 大量并列
+    if not integer:
+        x += rng.choice([0.0, 0.5], size=n)
+    x[rng.random(n) < missing] = np.nan
+    return x
+
+
+@pytest.mark.parametrize('integer', [True, False])
+def test_group_ranks_match_pandas(integer):
+    values = ranks_with_gaps(500, 0, integer, missing=0)
+    codes = np.random.default_rng(1).integers(0, 4, size=500)
+    expected = pd.Series(values).groupby(codes).rank(method='average').to_numpy()
+    np.testing.assert_allclose(_group_ranks(values, codes, 4), expected)
+
+
+def test_group_ranks_fallback_for_wide_ranges(monkeypatch):
+    # 名次范围过大时不用计数数组，改用 rank()
+    monkeypatch.setattr('grade_analytics.COUNTING_RANK_MAX_BINS', 10)
+    values = ranks_with_gaps(200, 2, missing=0)
+    codes = np.zeros(200, dtype=np.intp)
+    np.testing.assert_allclose(_group_ranks(values, codes, 1), pd.Series(values).rank().to_numpy())
+
+
+@pytest.mark.parametrize('integer', [True, False])
+def test_group_spearman_matches_reference(integer):
+    n, ngroups = 2_000, 5
+    x = ranks_with_gaps(n, 3, integer)
+    y = np.where(np.isnan(x), np.nan, x + np.random.default_rng(4).normal(0, 60, n).round())
+    y[np.random.default_rng(5).random(n) < 0.1] = np.nan
+    codes = np.random.default_rng(6).integers(0, ngroups, size=n)
+
+    r, pairs = group_spearman(x, y, codes, ngroups)
+    for g in range(ngroups):
+        mask = codes == g
+        assert r[g] == pytest.approx(spearman(x[mask], y[mask]), abs=1e-12)
+        assert pairs[g] == int((mask & ~np.isnan(x) & ~np.isnan(y)).sum())
+
+
+def test_group_spearman_undefined_groups():
+    x = np.array([1, 2, 3, 4, 5, 6, 7, 8, 1, 2], dtype='float64')
+    y = np.array([5, 5, 5, 5, 1, 2, 3, 4, 2, 1], dtype='float64')
+    codes = np.array([0, 0, 0, 0, 1, 1, 1, 1, 2, 2])
+    r, pairs = group_spearman(x, y, codes, 4)
+    assert np.isnan(r[0])        # y 全部相同
+    assert r[1] == pytest.approx(1.0)
+    assert np.isnan(r[2])        # 只有 2 对
+    assert np.isnan(r[3]) and pairs[3] == 0
+
+
+def test_correlation_matrix_and_movers():
+    grades = pd.DataFrame({
+        '大一上学期名次': [1.0, 2.0, 3.0, 4.0, 5.0],
+        '大一下学期名次': [5.0, 4.0, 3.0, 2.0, np.nan],
+        '大二上学期名次': [1.0, 3.0, 2.0, 5.0, 4.0],
+    }, index=pd.Index(['甲', '乙', '丙', '丁', '戊'], name='姓名'))
+    movement = analyze(grades)
+
+    matrix = movement.correlation().to_numpy()
+    np.testing.assert_allclose(np.diag(matrix), 1.0)
+    np.testing.assert_allclose(matrix, matrix.T)
+    cols = list(grades.columns)
+    for i in range(3):
+        for j in range(3):
+            if i != j:
+                assert matrix[i, j] == pytest.approx(spearman(grades[cols[i]], grades[cols[j]]))
+    # 总变化 = 第一个 - 最后一个有名次的学期 (戊 跳过缺失的学期: 5 -> 4)；并列时按原顺序
+    risers = movement.risers(2)
+    assert risers['姓名'].tolist() == ['丙', '戊']
+    assert risers['总变化'].tolist() == [1.0, 1.0]
+    assert movement.fallers(2)['姓名'].tolist() == ['乙', '丁']
@@ -0,0 +1,73 @@
+import pytest
+
+from job_scheduler import ChartError, JobScheduler
+
+
+class FakeRoot:
+    # 只记录 after() 的调用，由测试手动执行轮询
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, func):
+        self.scheduled.append(func)
+
+
+class FakeVar:
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    errors = []
+    monkeypatch.setattr('tkinter.messagebox.showerror', lambda title, message: errors.append(message))
+    root, status = FakeRoot(), FakeVar()
+    scheduler = JobScheduler(root, status, max_workers=1)
+    scheduler.errors = errors
+    yield scheduler
+    scheduler.shutdown()
+
+
+def run_all(scheduler):
+    # 等工作线程执行完，再像 Tk 主循环一样执行最近一次登记的轮询
+    scheduler.executor.submit(lambda: None).result()
+    poll = scheduler.root.scheduled[-1]
+    poll()
+
+
+def fail(_):
+    raise OSError("cannot open image")
+
+
+@pytest.mark.parametrize('func, on_success, on_error', [
+    (lambda **kw: 1, fail, lambda e: None),
+    (lambda **kw: (_ for _ in ()).throw(ChartError("提示", "没有数据")), lambda r: None, fail),
+])
+def test_failing_callback_keeps_polling(scheduler, func, on_success, on_error):
+    assert scheduler.submit('a', "图表", func, on_success, on_error)
+    polls = len(scheduler.root.scheduled)
+    run_all(scheduler)
+
+    assert len(scheduler.root.scheduled) == polls + 1 # 仍然登记了下一次轮询
+    assert not scheduler.is_running('a')
+    assert scheduler.errors and "cannot open image" in scheduler.errors[0]
+
+    results = []
+    assert scheduler.submit('a', "图表", lambda **kw: 2, results.append, fail)
+    run_all(scheduler)
+    assert results == [2]
+    assert scheduler.status_var.value == "图表：已完成"
+
+
+def test_status_is_updated_when_later_callback_succeeds(scheduler):
+    results = []
+    scheduler.submit('a', "甲", lambda **kw: 1, fail, fail)
+    scheduler.submit('b', "乙", lambda **kw: 2, results.append, fail)
+    run_all(scheduler)
+    assert results == [2]
+    assert scheduler.jobs == {}
+    assert len(scheduler.errors) == 1
+    assert scheduler.status_var.value == "乙：已完成"
@@ -0,0 +1,50 @@
+import pytest
+
+import motto_tokens
+from motto_tokens import MottoTokenizer
+
+
+@pytest.fixture
+def segmented(monkeypatch):
+    # 按 "/" "分词" 并记录分过的文本，不依赖 jieba 的词典
+    seen = []
+
+    def segment(texts):
+        seen.extend(texts)
+        return [tuple(text.split('/')) for text in texts]
+
+    monkeypatch.setattr(motto_tokens, '_segment_batch', segment)
+    return seen
+
+
+def test_frequencies_count_repeated_mottos(segmented):
+    tokenizer = MottoTokenizer(workers=1)
+    freq = tokenizer.term_frequencies(['学习/努力', '学习/努力', '时间/的/我', ''])
+    assert freq == {'学习': 2, '努力': 2, '时间': 1}
+    assert segmented == ['学习/努力', '时间/的/我'] # 相同的格言只分词一次
+
+
+def test_cache_is_bounded_and_keeps_recent_mottos(segmented):
+    tokenizer = MottoTokenizer(workers=1, cache_size=3)
+    tokenizer.term_frequencies(['一一/甲', '二二/乙', '三三/丙'])
+    tokenizer.term_frequencies(['一一/甲']) # 最近用过，不会被淘汰
+    tokenizer.term_frequencies(['四四/丁'])
+    assert tokenizer.cached_count() == 3
+
+    segmented.clear()
+    tokenizer.term_frequencies(['一一/甲', '三三/丙', '四四/丁'])
+    assert segmented == []
+    tokenizer.term_frequencies(['二二/乙'])
+    assert segmented == ['二二/乙']
+
+
+def test_more_mottos_than_cache_size(segmented):
+    mottos = [f"格言{i}/第{i}句" for i in range(50)]
+    small = MottoTokenizer(workers=1, cache_size=10)
+    large = MottoTokenizer(workers=1)
+    assert small.term_frequencies(mottos) == large.term_frequencies(mottos)
+    assert small.cached_count() == 10
+
+    segmented.clear()
+    assert small.term_frequencies(mottos) == large.term_frequencies(mottos)
+    assert len(segmented) == 40 # 缓存中的 10 条直接复用
@@ -0,0 +1,50 @@
+import pandas as pd
+import pytest
+
+import regions
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('山东', '山东'),
+    ('山东省', '山东'),
+    ('山东省青岛市', '山东'),
+    ('广西壮族自治区', '广西'),
+    ('内蒙', '内蒙古'),
+    ('香港特别行政区', '香港'),
+    ('吉林省长春市', '吉林'),
+    # 青海的海南藏族自治州，不是海南省
+    ('海南藏族自治州', '青海'),
+    ('海南州', '青海'),
+    ('海南三亚', '海南'),
+    ('火星', None),
+])
+def test_match_province(raw, expected):
+    assert regions.match_province(raw) == expected
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('青岛', '青岛市'),
+    ('青岛市市南区', '青岛市'),
+    ('山东青岛', '青岛市'),
+    ('山东省青岛市', '青岛市'),
+    # 省份名同时是城市名的前缀时，先去掉省份名
+    ('吉林省长春市', '长春市'),
+    ('吉林长春', '长春市'),
+    ('吉林市', '吉林市'),
+    ('吉林市船营区', '吉林市'),
+    ('北京市海淀区', '北京市'),
+    ('海南州', '海南藏族自治州'),
+    ('海南藏族自治州共和县', '海南藏族自治州'),
+    ('海南三亚', '三亚市'),
+    ('火星', None),
+])
+def test_match_city(raw, expected):
+    assert regions.match_city(raw) == expected
+
+
+def test_normalize_keeps_unmatched_values_as_categories():
+    cities = regions.normalize_cities(pd.Series(['吉林省长春市', '长春', None, '火星市', '火星市']))
+    assert cities.tolist()[:2] == ['长春市', '长春市']
+    assert pd.isna(cities.iloc[2])
+    assert list(cities.cat.categories[:len(regions.CITY_NAMES)]) == regions.CITY_NAMES
+    assert regions.unmatched_values(cities, regions.CITY_NAMES) == {'火星市': 2}
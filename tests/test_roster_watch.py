@@ -0,0 +1,109 @@
+import pandas as pd
+import pytest
+
+from roster_watch import RosterWatcher, load_baseline, reload_changes
+
+
+def roster(n=40):
+    return pd.DataFrame({
+        '学号': range(2020001, 2020001 + n),
+        '姓名': [f"学生{i}" for i in range(n)],
+        '性别': ['男', '女'] * (n // 2),
+        '生源省份': ['山东', '江苏', '浙江', '四川'] * (n // 4),
+        '生源城市': ['青岛', '南京', '杭州', '成都'] * (n // 4),
+        '寝室号': [f"1-{101 + i // 4}" for i in range(n)],
+        '人生格言': ['学而不思则罔'] * n,
+        '大一上学期名次': range(1, n + 1),
+        '大一下学期名次': [float(n - i) for i in range(n)],
+    })
+
+
+def assert_same_summary(a, b):
+    for col in ['性别', '生源省份', '生源城市', '寝室号']:
+        assert a.counts(col).sort_index().to_dict() == b.counts(col).sort_index().to_dict()
+    assert a.rows == b.rows
+    assert a.students_with_ranks == b.students_with_ranks
+    assert a.dorm_members == b.dorm_members
+    pd.testing.assert_frame_equal(a.rank_stats().sort_index(), b.rank_stats().sort_index())
+
+
+def watch(tmp_path, raw):
+    path = tmp_path / "roster.csv"
+    raw.to_csv(path, index=False)
+    watcher = RosterWatcher(str(path))
+    return path, watcher, watcher.start()
+
+
+def test_incremental_reload_matches_full_reload(tmp_path):
+    raw = roster()
+    path, watcher, base = watch(tmp_path, raw)
+
+    edited = raw.copy()
+    edited.loc[3, '寝室号'] = '2-201'                  # 修改
+    edited.loc[7, '大一上学期名次'] = 1                 # 修改名次 (最小值)
+    edited = edited.drop(index=[10, 11])               # 删除
+    edited = pd.concat([edited, roster(44).iloc[40:]]) # 新增
+    edited.to_csv(path, index=False)
+
+    result = watcher.reload(base.df, base.summary)
+    full = load_baseline(str(path))
+
+    pd.testing.assert_frame_equal(result.df, full.df)
+    assert_same_summary(result.summary, full.summary)
+    assert not result.diff.full_reload
+    assert (result.diff.added, result.diff.removed, result.diff.modified) == (4, 2, 2)
+    assert {'寝室号', '大一上学期名次'} <= result.diff.changed_columns
+
+
+def test_reload_does_not_modify_loaded_data(tmp_path):
+    raw = roster()
+    path, watcher, base = watch(tmp_path, raw)
+    before = base.df.copy()
+    cities = base.summary.counts('生源城市').to_dict()
+
+    edited = raw.copy()
+    edited.loc[0, '生源城市'] = '济南'
+    edited.to_csv(path, index=False)
+    watcher.reload(base.df, base.summary)
+
+    pd.testing.assert_frame_equal(base.df, before)
+    assert base.summary.counts('生源城市').to_dict() == cities
+
+
+def test_only_changed_columns_are_reported(tmp_path):
+    raw = roster()
+    path, watcher, base = watch(tmp_path, raw)
+
+    edited = raw.copy()
+    edited.loc[5, '性别'] = '女' if raw.loc[5, '性别'] == '男' else '男'
+    edited.to_csv(path, index=False)
+    result = watcher.reload(base.df, base.summary)
+
+    assert result.diff.changed_columns == {'性别'}
+    assert result.diff.modified == 1
+
+
+def test_unchanged_file_gives_empty_diff(tmp_path):
+    raw = roster()
+    path, watcher, base = watch(tmp_path, raw)
+    raw[list(reversed(raw.columns))].to_csv(path, index=False) # 只调整列的顺序
+    result = watcher.reload(base.df, base.summary)
+
+    assert result.diff.is_empty()
+    pd.testing.assert_frame_equal(result.df, base.df)
+
+
+@pytest.mark.parametrize('edit', [
+    lambda df: df.assign(学号=[2020001] * len(df)),  # 键重复
+    lambda df: df.drop(columns='学号'),               # 键列消失 (改按姓名对齐)
+])
+def test_falls_back_to_full_reload(tmp_path, edit):
+    raw = roster()
+    path, watcher, base = watch(tmp_path, raw)
+    edit(raw).to_csv(path, index=False)
+
+    result = reload_changes(str(path), base.df, base.summary, watcher.snapshot)
+    full = load_baseline(str(path))
+    assert result.diff.full_reload
+    pd.testing.assert_frame_equal(result.df, full.df)
+    assert_same_summary(result.summary, full.summary)
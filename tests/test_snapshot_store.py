@@ -0,0 +1,70 @@
+import threading
+
+import pandas as pd
+
+import snapshot_store
+from snapshot_store import SnapshotStore
+
+
+def write_roster(path, n=8, offset=0):
+    pd.DataFrame({
+        '学号': range(1 + offset, n + 1 + offset),
+        '姓名': [f"学生{i}" for i in range(offset, n + offset)],
+        '性别': ['男', '女'] * (n // 2),
+        '生源省份': ['山东', '江苏'] * (n // 2),
+        '生源城市': ['青岛', '南京'] * (n // 2),
+        '寝室号': ['1-101'] * n,
+        '大一上学期名次': range(1, n + 1),
+    }).to_csv(path, index=False)
+
+
+def test_reingesting_a_file_does_not_read_it(tmp_path, monkeypatch):
+    store = SnapshotStore(str(tmp_path / 'store'))
+    roster = tmp_path / '2024春.csv'
+    write_roster(roster)
+    snapshot, created = store.ingest_file(str(roster))
+    assert created and snapshot.label == '2024春' and snapshot.rows == 8
+
+    def fail(*args, **kwargs):
+        raise AssertionError("已导入的文件不应再次读取")
+
+    monkeypatch.setattr(snapshot_store, 'load_student_data', fail)
+    again, created = store.ingest_file(str(roster))
+    assert not created and again.id == snapshot.id
+    assert len(store.snapshots()) == 1
+
+
+def test_concurrent_ingest_of_same_content_appends_once(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'store'))
+    roster = tmp_path / 'roster.csv'
+    write_roster(roster)
+    df, _ = snapshot_store.load_student_data(str(roster))
+    results = []
+    start = threading.Barrier(4)
+
+    def ingest():
+        start.wait()
+        results.append(store.ingest(df, source=str(roster)))
+
+    threads = [threading.Thread(target=ingest) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(created for _, created in results) == [False, False, False, True]
+    assert len({s.id for s, _ in results}) == 1
+    with open(store.manifest_path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 1
+
+
+def test_history_across_snapshots(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'store'))
+    for i, name in enumerate(['2023秋', '2024春']):
+        roster = tmp_path / f'{name}.csv'
+        write_roster(roster, offset=i)
+        store.ingest_file(str(roster), taken_at=f'202{3 + i}-0{1 + i}-01T00:00:00')
+
+    assert [s.label for s in store.snapshots()] == ['2023秋', '2024春']
+    history = store.history('学生1', key='姓名')
+    assert len(history) == 2
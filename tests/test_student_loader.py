@@ -0,0 +1,66 @@
+import pandas as pd
+
+from student_loader import load_student_data, scan_student_data, stream_student_data
+from student_summary import StudentSummary
+
+
+def write_roster(path, n=120):
+    pd.DataFrame({
+        '姓名': [f"学生{i}" for i in range(n)],
+        '性别': ['男', '女', '女'] * (n // 3),
+        '生源省份': ['山东省', '江苏', '浙江', '四川省'] * (n // 4),
+        '生源城市': ['青岛市', '南京', '杭州', '成都'] * (n // 4),
+        '寝室号': [f"1-{101 + i // 4}" for i in range(n)],
+        '人生格言': ['学而不思则罔', None] * (n // 2),
+        '大一上学期名次': [str(i) if i % 7 else 'N/A' for i in range(n)],
+    }).to_csv(path, index=False)
+
+
+def test_streaming_matches_full_load(tmp_path):
+    path = tmp_path / "roster.csv"
+    write_roster(path)
+    full, _ = load_student_data(str(path))
+    streamed = stream_student_data(str(path), chunk_size=25)
+    pd.testing.assert_frame_equal(streamed, full)
+
+
+def test_scan_counts_without_keeping_rows(tmp_path):
+    path = tmp_path / "roster.csv"
+    write_roster(path)
+    full, streamed, chunks = StudentSummary(), StudentSummary(), []
+    load_student_data(str(path), on_chunk=full.update)
+
+    def on_chunk(chunk):
+        chunks.append(len(chunk))
+        streamed.update(chunk)
+
+    assert scan_student_data(str(path), on_chunk, chunk_size=25, warn=lambda msg: None) == 120
+    assert chunks == [25, 25, 25, 25, 20]
+    for col in ['性别', '生源省份', '生源城市', '寝室号']:
+        assert streamed.counts(col).to_dict() == full.counts(col).to_dict()
+    assert streamed.dorm_members == full.dorm_members
+    pd.testing.assert_frame_equal(streamed.rank_stats(), full.rank_stats())
+
+
+def test_region_codes_are_stable_across_rosters(tmp_path):
+    import regions
+    from student_loader import merge_rosters
+
+    frames = []
+    for name, provinces in (('a', ['山东', '江苏']), ('b', ['四川省', '山东省'])):
+        path = tmp_path / f"{name}.csv"
+        pd.DataFrame({'姓名': ['甲', '乙'], '性别': ['男', '女'], '生源省份': provinces,
+                      '生源城市': ['青岛', '火星'], '寝室号': ['1-101', '1-102']}).to_csv(path, index=False)
+        frames.append(load_student_data(str(path))[0])
+
+    for df in frames:
+        # 未出现的标准地名仍在类别表中，同一名称的编码在各表中相同
+        assert list(df['生源省份'].cat.categories[:len(regions.PROVINCE_NAMES)]) == list(regions.PROVINCE_NAMES)
+        assert list(df['生源城市'].cat.categories[:len(regions.CITY_NAMES)]) == list(regions.CITY_NAMES)
+    assert frames[0]['生源省份'].cat.codes[0] == frames[1]['生源省份'].cat.codes[1]
+    assert frames[0]['性别'].cat.categories.tolist() == ['女', '男'] # 其他列去掉未出现的类别
+
+    merged = merge_rosters(frames)
+    assert merged['生源省份'].tolist() == ['山东', '江苏', '四川', '山东']
+    assert list(merged['生源城市'].cat.categories[:len(regions.CITY_NAMES)]) == list(regions.CITY_NAMES)
+    assert '火星' in merged['生源城市'].cat.categories
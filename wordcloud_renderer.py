@@ -0,0 +1,212 @@
+"""长期复用的词云渲染器：先在限定时间内给出低分辨率预览，再在后台生成完整分辨率的 PNG。
+
+以前每次生成词云都新建 WordCloud(font_path=...)，在 800x400 上完整排布一遍后才显示。
+WordCloudRenderer 在多次调用之间保留：
+
+  * 读入内存的字体文件 (WordCloud 每换一个字号都要打开一次字体，改为从内存加载)；
+  * 按 (宽, 高, 放大倍数) 配置好的 WordCloud 实例；
+  * 最近排布的耗时 (每像素秒数)，用来选择预览画布的大小。
+
+WordCloud 的耗时几乎都在排布上 (与画布面积近似成正比)，按 scale 放大绘制很快。因此：
+
+  * 预览：在缩小的画布上排布 (按耗时估计选择不超过时间预算的最大尺寸)，再放大绘制到显示尺寸；
+  * 完整分辨率：在 LAYOUT_SIZE 上排布，按 OUTPUT_SCALE 放大绘制，由渲染器自己的后台线程完成；
+  * 批量导出 (每个班级一张) 时复用同一实例依次处理，不重复创建和加载字体。
+
+同一词频和配置的结果相同 (固定随机种子)，与图表缓存的按内容复用一致。
+
+也可以在命令行中批量导出 (每个班级一张 PNG，另加一张全体学生的)：
+
+    python wordcloud_renderer.py 计算机1班.xlsx 计算机2班.xlsx -o wordclouds --font-path simhei.ttf
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from startup_profile import timed_import
+
+LAYOUT_SIZE = (800, 400)           # 完整分辨率排布的画布 (宽, 高)，也是预览显示的尺寸
+OUTPUT_SCALE = 2                   # 完整分辨率图片按该倍数放大绘制 (1600x800)
+PREVIEW_BUDGET = 0.3               # 预览排布的时间预算 (秒)
+PREVIEW_FACTORS = (0.5, 0.35, 0.25) # 预览画布相对 LAYOUT_SIZE 的缩放候选 (从大到小)
+PREVIEW_DEFAULT_FACTOR = 0.35      # 还没有耗时记录时使用的缩放
+BACKGROUND = 'white'
+RANDOM_SEED = 42
+
+
+class LoadedFont:
+    # 读入内存的字体文件；PIL.ImageFont.truetype 接受带 read() 的对象，每次都从这份字节加载
+    def __init__(self, font_path):
+        self.path = font_path
+        with open(font_path, 'rb') as f:
+            self.data = f.read()
+
+    def read(self, *args):
+        return self.data
+
+
+class WordCloudRenderer:
+    def __init__(self, font_path, layout_size=LAYOUT_SIZE, scale=OUTPUT_SCALE, preview_budget=PREVIEW_BUDGET,
+                 background=BACKGROUND):
+        self.font = LoadedFont(font_path) # 字体不存在时抛出 OSError
+        self.layout_size = layout_size
+        self.scale = scale
+        self.preview_budget = preview_budget
+        self.background = background
+        self._clouds = {}   # (宽, 高, 放大倍数) -> [WordCloud, Lock]
+        self._lock = threading.Lock()
+        self._seconds_per_pixel = None # 最近排布耗时的指数平均
+        self._executor = None
+
+    @property
+    def font_path(self):
+        return self.font.path
+
+    def _cloud(self, width, height, scale):
+        key = (int(width), int(height), scale)
+        with self._lock:
+            entry = self._clouds.get(key)
+            if entry is None:
+                WordCloud = timed_import('wordcloud').WordCloud
+                cloud = WordCloud(font_path=self.font, width=key[0], height=key[1], scale=scale,
+                                  background_color=self.background, random_state=RANDOM_SEED)
+                entry = self._clouds[key] = [cloud, threading.Lock()]
+            return entry
+
+    def _record(self, seconds, pixels):
+        sample = seconds / max(pixels, 1)
+        with self._lock:
+            previous = self._seconds_per_pixel
+            self._seconds_per_pixel = sample if previous is None else 0.7 * previous + 0.3 * sample
+
+    def render_image(self, frequencies, size=None, scale=None):
+        # 排布并绘制，返回 PIL.Image；size 默认为 LAYOUT_SIZE，scale 默认为 OUTPUT_SCALE
+        width, height = size or self.layout_size
+        scale = self.scale if scale is None else scale
+        cloud, lock = self._cloud(width, height, scale)
+        with lock: # 实例保存着上次的排布结果，同一实例同时只处理一份词频
+            start = time.perf_counter()
+            cloud.generate_from_frequencies(frequencies)
+            self._record(time.perf_counter() - start, int(width) * int(height))
+            return cloud.to_image()
+
+    def preview_size(self, budget=None):
+        # 估计耗时不超过预算的最大预览画布；还没有耗时记录时用默认缩放
+        budget = self.preview_budget if budget is None else budget
+        width, height = self.layout_size
+        factor = PREVIEW_DEFAULT_FACTOR
+        if self._seconds_per_pixel is not None:
+            fitting = [f for f in PREVIEW_FACTORS
+                       if self._seconds_per_pixel * width * height * f * f <= budget]
+            factor = fitting[0] if fitting else PREVIEW_FACTORS[-1]
+        return max(int(width * factor), 1), max(int(height * factor), 1)
+
+    def preview(self, frequencies, budget=None):
+        # 在缩小的画布上排布，放大绘制到 LAYOUT_SIZE (用于立即显示)
+        width, height = self.preview_size(budget)
+        return self.render_image(frequencies, (width, height), scale=self.layout_size[0] / width)
+
+    def render_file(self, frequencies, output_file):
+        image = self.render_image(frequencies)
+        image.save(output_file)
+        return image
+
+    def submit(self, frequencies, output_file):
+        # 在后台线程中生成完整分辨率的图片并保存；返回 Future (结果为 output_file)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wordcloud")
+            executor = self._executor
+        frequencies = dict(frequencies) # 调用方之后修改词频不影响后台任务
+
+        def run():
+            self.render_file(frequencies, output_file)
+            return output_file
+
+        return executor.submit(run)
+
+    def export_many(self, frequencies_by_name, output_dir, size=None, scale=None, cancel=None):
+        # 批量导出：{名称: 词频} -> {名称: 文件路径}；同一实例依次排布，没有词频的名称跳过
+        os.makedirs(output_dir, exist_ok=True)
+        outputs = {}
+        for name, frequencies in frequencies_by_name.items():
+            if cancel is not None and cancel.is_set():
+                break
+            if not frequencies:
+                continue
+            output_file = os.path.join(output_dir, f"{safe_filename(name)}.png")
+            self.render_image(frequencies, size, scale).save(output_file)
+            outputs[name] = output_file
+        return outputs
+
+    def close(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def safe_filename(name):
+    return "".join('_' if c in '\\/:*?"<>|' else c for c in str(name)).strip() or "_"
+
+
+# 按字体路径共用渲染器 (GUI、看板和批处理的同一进程内只加载一次字体)
+_renderers = {}
+_renderers_lock = threading.Lock()
+
+
+def get_renderer(font_path):
+    key = os.path.abspath(font_path)
+    with _renderers_lock:
+        renderer = _renderers.get(key)
+        if renderer is None:
+            renderer = _renderers[key] = WordCloudRenderer(font_path)
+        return renderer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量导出人生格言词云 (每个班级一张，另加一张全体学生的)")
+    parser.add_argument('files', nargs='+', help="学生信息表 (.xlsx / .csv / .parquet，多个文件时按班级合并)")
+    parser.add_argument('-o', '--output-dir', required=True, help="输出目录")
+    parser.add_argument('--font-path', required=True, help="中文字体文件")
+    parser.add_argument('--scale', type=float, default=OUTPUT_SCALE, help=f"放大绘制的倍数 (默认 {OUTPUT_SCALE})")
+    args = parser.parse_args(argv)
+
+    from charts import ChartError, motto_frequencies
+    from class_rosters import load_class_rosters
+    from student_loader import CLASS_COL, load_student_data
+    try:
+        renderer = WordCloudRenderer(args.font_path, scale=args.scale)
+        if len(args.files) == 1:
+            df, _ = load_student_data(args.files[0])
+        else:
+            df, records = load_class_rosters(args.files)
+            for r in records:
+                if r['status'] == 'error':
+                    print(f"警告: 跳过 {r['roster']}: {r['message']}", file=sys.stderr)
+        if '人生格言' not in df.columns:
+            raise ChartError("错误", "数据中缺少 '人生格言' 列！")
+        frequencies_by_name = {'全体学生': motto_frequencies(df)}
+        if CLASS_COL in df.columns:
+            for class_name, group in df.groupby(CLASS_COL, observed=True, sort=False):
+                try:
+                    frequencies_by_name[str(class_name)] = motto_frequencies(group)
+                except ChartError: # 该班级没有足够的格言
+                    frequencies_by_name[str(class_name)] = None
+        outputs = renderer.export_many(frequencies_by_name, args.output_dir)
+    except ChartError as e:
+        print(f"错误: {e.message}", file=sys.stderr)
+        return 1
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    for name in frequencies_by_name:
+        print(f"{name}\t{outputs.get(name, '(没有足够的格言，已跳过)')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
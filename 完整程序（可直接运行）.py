@@ -1,17 +1,30 @@
+from startup_profile import mark, startup_report, timed_import # 最先导入，从这里开始计时
 import tkinter as tk
-from tkinter import filedialog, messagebox, font as tkFont # 导入 tkFont 用于检查字体
-import pandas as pd
+from tkinter import filedialog, messagebox, simpledialog, ttk
 import os
+import threading
+import time
 import webbrowser # 用于打开 html 文件
 
 # --- 数据处理和可视化库 ---
-import matplotlib.pyplot as plt
-from pyecharts import options as opts
-from pyecharts.charts import Pie, Map, Bar, Line, Graph # 导入 Graph 用于关系图
-from wordcloud import WordCloud
-import jieba
-import networkx as nx
-from itertools import combinations
+# pandas / pyecharts / wordcloud / jieba 等在第一次用到时才导入 (见 startup_profile.py)，
+# 窗口可以立即显示
+
+import charts
+import chart_output
+import perf_trace
+import regions
+from charts import ChartError
+from job_scheduler import JobScheduler
+from student_loader import load_student_data, find_missing_columns, memory_report, format_memory_report
+from class_rosters import load_class_rosters
+from student_summary import StudentSummary
+from roster_cache import RosterCache
+from artifact_cache import ArtifactCache
+from dashboard_server import DashboardServer
+from roster_watch import RosterWatcher, WATCH_INTERVAL_MS
+from filter_index import FilterIndex, describe_filters, VALUE_SEPARATORS
+from snapshot_store import SnapshotStore
 
 # --- 全局配置 ---
 # !!! 重要：请将 FONT_PATH 修改为你系统上有效的中文字体文件路径 !!!
@@ -19,439 +32,827 @@ from itertools import combinations
 # 或 '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc' (某些 Linux)
 FONT_PATH = 'C:/Windows/Fonts/simhei.ttf' # <--- 修改这里
 
-# 尝试设置 Matplotlib 全局字体
-try:
-    plt.rcParams['font.sans-serif'] = ['SimHei'] # 指定默认字体
-    plt.rcParams['axes.unicode_minus'] = False   # 解决保存图像是负号'-'显示为方块的问题
-    # 检查字体是否存在（可选，但有帮助）
-    available_fonts = tkFont.families()
-    if 'SimHei' not in available_fonts:
-         print("警告：系统中可能未找到 'SimHei' 字体，Matplotlib 图表中文可能显示异常。请在代码中修改为可用字体。")
-         # 可以在这里尝试备用字体，例如：
-         # plt.rcParams['font.sans-serif'] = ['Microsoft YaHei'] # 尝试微软雅黑
-except Exception as e:
-    print(f"设置 Matplotlib 字体时出错: {e}. 中文可能无法正常显示。")
-    print(f"请确保你安装了中文字体，并在代码中正确配置。尝试的字体: SimHei")
-
 # --- 全局变量 ---
 student_data = None # 用于存储加载的 DataFrame
-root = tk.Tk()    # 主窗口实例
-root.title("学生信息分析工具 v1.0")
-root.geometry("500x450") # 设置窗口大小
-
-file_path_label_var = tk.StringVar()
-file_path_label_var.set("尚未选择 Excel 文件")
+roster_cache = RosterCache() # 已清洗数据的磁盘缓存 (按文件内容哈希)
+artifact_cache = ArtifactCache() # 已生成图表文件的缓存 (按输入列内容和选项哈希)
+snapshot_store = SnapshotStore() # 历次导出的快照库 (见 snapshot_store.py)
+student_summary = None # 加载时一次性构建的统计汇总 (计数、寝室成员、名次统计)，各图表共用
+# 文件对话框中的类型 (读取时按扩展名选择后端，见 roster_readers.py)
+ROSTER_FILETYPES = [
+    ("学生信息表", "*.xlsx *.xlsm *.xls *.csv *.tsv *.parquet *.feather"),
+    ("Excel files", "*.xlsx *.xlsm *.xls"),
+    ("CSV files", "*.csv *.tsv"),
+    ("Parquet / Arrow files", "*.parquet *.pq *.feather *.arrow"),
+    ("All files", "*.*"),
+]
+STREAMING_AUTO_BYTES = 50 * 1024 * 1024 # 超过该大小的文件自动使用流式加载
+# 以下界面对象在 main() 中创建；导入本文件时不会创建窗口 (无界面批处理见 batch_render.py)
+root = None                # 主窗口实例
+file_path_label_var = None
+streaming_var = None       # 是否使用流式 (分块) 加载
+by_class_var = None        # 是否生成按班级对比的视图
+status_var = None
+offline_var = None         # 图表是否使用离线紧凑输出 (见 chart_output.py)
+trace_var = None           # 是否记录性能数据
+trace_status_var = None    # 状态栏中显示的最近一次性能记录
+scheduler = None           # 后台执行绘图任务
+dashboard = None           # 本地看板服务 (第一次打开看板时启动，见 dashboard_server.py)
+data_title = ""            # 看板中显示的数据名称
+loaded_path = None         # 通过 select_file 加载的单个文件 (可以监视其变化)
+watch_var = None           # 是否监视文件变化并增量更新
+roster_watcher = None      # 监视中的 RosterWatcher (见 roster_watch.py)
+opened_charts = {}         # 本次加载后已生成过的图表：任务键 -> (图表, 是否按班级, 名称, 生成选项)
+filter_index = None        # 当前数据的筛选索引 (第一次筛选时构建，见 filter_index.py)
+active_filters = {}        # 当前的筛选条件 {列: [取值, ...]}
+filtered_view = None       # 筛选出的学生 (FilteredData)；没有筛选条件时为 None
+filter_status_var = None
+filter_window = None       # 筛选面板 (Toplevel)
+FILTER_OPTION_LIMIT = 500  # 筛选面板下拉列表最多列出的取值数 (按人数降序)，其余取值可直接输入
+snapshot_window = None     # 历史快照面板 (Toplevel)
 
 # --- 文件选择和加载函数 ---
+def warn_data_issues(data):
+    missing_cols = find_missing_columns(data)
+    if missing_cols:
+        messagebox.showwarning("列缺失警告", f"学生信息表中缺少以下必需列: {', '.join(missing_cols)}\n部分功能可能无法正常工作。")
+    unmatched = regions.unmatched_report(data)
+    if unmatched:
+        details = "\n".join(
+            f"{col}: " + "、".join(f"{name} ({n}人)" for name, n in list(values.items())[:10])
+            for col, values in unmatched.items()
+        )
+        messagebox.showwarning("地名未识别", f"以下取值未能识别为标准省份/城市名称，将按原样统计:\n{details}")
+
 def select_file():
-    global student_data
+    global student_data, student_summary, data_title, loaded_path
     filepath = filedialog.askopenfilename(
-        title="请选择学生信息 Excel 文件",
-        filetypes=[("Excel files", "*.xlsx"), ("All files", "*.*")]
+        title="请选择学生信息表 (Excel / CSV / Parquet)",
+        filetypes=ROSTER_FILETYPES
     )
     if not filepath:
         return
 
     try:
-        student_data = pd.read_excel(filepath)
-        # --- 基本数据清洗 ---
-        if '人生格言' in student_data.columns:
-             student_data['人生格言'] = student_data['人生格言'].fillna('')
-        else:
-             print("警告: Excel 文件中缺少 '人生格言' 列，词云功能将无法使用。")
-             student_data['人生格言'] = '' # 创建空列避免后续错误
-
-        rank_cols = ['大一上学期名次', '大一下学期名次', '大二上学期名次', '大二下学期名次', '大三上学期名次']
-        for col in rank_cols:
-            if col in student_data.columns:
-                student_data[col] = pd.to_numeric(student_data[col], errors='coerce')
-            else:
-                print(f"警告: Excel 文件中缺少 '{col}' 列，成绩相关分析可能不完整。")
-
-        # 检查必要的列是否存在
-        required_cols = ['性别', '生源省份', '生源城市', '姓名', '寝室号']
-        missing_cols = [col for col in required_cols if col not in student_data.columns]
-        if missing_cols:
-            messagebox.showwarning("列缺失警告", f"Excel 文件中缺少以下必需列: {', '.join(missing_cols)}\n部分功能可能无法正常工作。")
-
+        streaming = streaming_var.get() or os.path.getsize(filepath) > STREAMING_AUTO_BYTES
+        summary = StudentSummary()
+        with perf_trace.span("加载文件", cat='load', input_bytes=os.path.getsize(filepath)) as trace:
+            student_data, from_cache = load_student_data(
+                filepath, cache=roster_cache, streaming=streaming, on_chunk=summary.update
+            )
+            trace.set(rows=len(student_data), from_cache=from_cache)
+        student_summary = summary
+        loaded_path = filepath
+        stop_watching()
+        opened_charts.clear()
+        data_changed()
+        by_class_var.set(False)
+        warn_data_issues(student_data)
 
         filename = os.path.basename(filepath)
-        file_path_label_var.set(f"已加载: {filename} (共 {len(student_data)} 条记录)")
+        data_title = filename
+        publish_to_dashboard()
+        cache_note = " [缓存]" if from_cache else ""
+        file_path_label_var.set(f"已加载: {filename} (共 {len(student_data)} 条记录){cache_note}")
         messagebox.showinfo("成功", f"文件 '{filename}' 加载成功！")
 
     except FileNotFoundError:
         student_data = None
+        student_summary = None
         file_path_label_var.set("加载失败：文件未找到")
         messagebox.showerror("错误", f"文件未找到:\n{filepath}")
     except Exception as e:
         student_data = None
+        student_summary = None
         file_path_label_var.set("加载失败，请检查文件格式或内容")
         messagebox.showerror("错误", f"加载或处理文件时发生错误:\n{e}")
 
+def select_class_files():
+    # 同时选择多个班级的表：在后台用进程池并行加载，每行标记来源班级 (见 class_rosters.py)
+    filepaths = filedialog.askopenfilenames(
+        title="请选择多个班级的学生信息表",
+        filetypes=ROSTER_FILETYPES
+    )
+    if not filepaths:
+        return
+    if scheduler.is_running("load"):
+        messagebox.showinfo("请稍候", "正在加载其他文件，请等待完成或先取消。")
+        return
+    summary = StudentSummary()
+    streaming = streaming_var.get()
+
+    def load(progress, cancel):
+        with perf_trace.span(f"加载 {len(filepaths)} 个班级", cat='load', files=len(filepaths)) as trace:
+            result = load_class_rosters(
+                list(filepaths), cache=roster_cache, streaming=streaming,
+                on_roster=summary.update, progress=trace.wrap_progress(progress), cancel=cancel,
+            )
+            trace.set(rows=len(result[0]))
+        return result
+
+    scheduler.submit(
+        "load", f"加载 {len(filepaths)} 个班级", load,
+        on_success=lambda result: class_rosters_loaded(result, summary),
+        on_error=lambda exc: messagebox.showerror("错误", f"加载或处理文件时发生错误:\n{exc}"),
+    )
+
+def class_rosters_loaded(result, summary):
+    global student_data, student_summary, data_title, loaded_path
+    data, records = result
+    student_data, student_summary = data, summary
+    loaded_path = None # 合并加载的多个表不支持监视
+    stop_watching()
+    opened_charts.clear()
+    data_changed()
+    failed = [r for r in records if r['status'] == 'error']
+    if failed:
+        details = "\n".join(f"{os.path.basename(r['roster'])}: {r['message']}" for r in failed)
+        messagebox.showwarning("部分文件加载失败", f"以下文件未能加载，已跳过:\n{details}")
+    warn_data_issues(data)
+    by_class_var.set(True)
+    loaded = len(records) - len(failed)
+    data_title = f"{loaded} 个班级"
+    publish_to_dashboard()
+    file_path_label_var.set(f"已加载: {loaded} 个班级 (共 {len(data)} 条记录)")
+    messagebox.showinfo("成功", f"{loaded} 个班级的数据已合并加载！\n已勾选“按班级对比”，各图表将按班级拆分显示。")
+
+# --- 历史快照 (见 snapshot_store.py) ---
+def save_snapshot():
+    # 把当前加载的 (未筛选的) 数据保存为一次导出的快照
+    if student_data is None:
+        messagebox.showerror("错误", "请先加载学生信息表！")
+        return
+    label = simpledialog.askstring("保存为历史快照", "快照名称 (如 2024春):",
+                                   initialvalue=os.path.splitext(data_title)[0], parent=root)
+    if not label:
+        return
+    try:
+        snapshot, created = snapshot_store.ingest(student_data, source=loaded_path, label=label.strip())
+    except (OSError, ValueError) as e:
+        messagebox.showerror("错误", f"保存快照失败:\n{e}")
+        return
+    if created:
+        messagebox.showinfo("完成", f"已保存快照: {snapshot.describe()}\n快照目录: {snapshot_store.root}")
+    else:
+        messagebox.showinfo("提示", f"相同内容的快照已存在: {snapshot.describe()}")
+
+def load_snapshot_data(refs, merged=False):
+    # 一个快照：直接作为当前数据；多个快照：合成一张表，班级 列为快照名称，按导出批次对比；
+    # merged=True：最新快照，缺失的名次用更早快照中的值补齐
+    global student_data, student_summary, data_title, loaded_path
+    if merged:
+        data = snapshot_store.merged_latest(refs)
+        title = f"{snapshot_store.resolve(refs)[-1].label} (合并 {len(refs)} 次导出的名次)"
+    elif len(refs) == 1:
+        data = snapshot_store.load(refs[0]).copy()
+        title = snapshot_store.get(refs[0]).label
+    else:
+        data = snapshot_store.combined(refs)
+        title = f"{len(refs)} 次导出"
+    summary = StudentSummary()
+    summary.update(data)
+    student_data, student_summary = data, summary
+    loaded_path = None # 快照不可修改，不需要监视
+    stop_watching()
+    opened_charts.clear()
+    data_changed()
+    by_class_var.set(len(refs) > 1 and not merged)
+    data_title = title
+    publish_to_dashboard()
+    file_path_label_var.set(f"已加载快照: {title} (共 {len(data)} 条记录)")
+
+def open_snapshot_panel():
+    global snapshot_window
+    if snapshot_window is not None and snapshot_window.winfo_exists():
+        snapshot_window.lift()
+        return
+    window = tk.Toplevel(root)
+    window.title("历史快照")
+    snapshot_window = window
+    listbox = tk.Listbox(window, selectmode=tk.EXTENDED, width=60, height=12)
+    listbox.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
+    tk.Label(window, text="选中一个快照时直接载入；选中多个时按导出批次对比 (已勾选“按班级对比”)。\n"
+                          "“补齐名次”载入所选中最新的一次，其中缺失的名次用更早快照中的值补齐。",
+             justify=tk.LEFT, fg="gray").pack(padx=5, anchor='w')
+    shown = []
+
+    def refresh():
+        shown[:] = snapshot_store.snapshots()
+        listbox.delete(0, tk.END)
+        for snapshot in shown:
+            listbox.insert(tk.END, snapshot.describe())
+
+    def selected_refs():
+        refs = [shown[i].id for i in listbox.curselection()]
+        if not refs:
+            messagebox.showinfo("提示", "请先选择至少一个快照。", parent=window)
+        return refs
+
+    def load(merged=False):
+        refs = selected_refs()
+        if not refs:
+            return
+        try:
+            load_snapshot_data(refs, merged)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", f"载入快照失败:\n{e}", parent=window)
+            return
+        window.destroy()
+
+    button_frame = tk.Frame(window)
+    button_frame.pack(pady=8)
+    tk.Button(button_frame, text="载入所选", command=load, width=12).pack(side=tk.LEFT, padx=5)
+    tk.Button(button_frame, text="补齐名次后载入", command=lambda: load(merged=True), width=14).pack(side=tk.LEFT, padx=5)
+    tk.Button(button_frame, text="刷新", command=refresh, width=8).pack(side=tk.LEFT, padx=5)
+    tk.Button(button_frame, text="关闭", command=window.destroy, width=8).pack(side=tk.LEFT, padx=5)
+    refresh()
+
+def clear_roster_cache():
+    stats = artifact_cache.stats()
+    count, freed = roster_cache.clear()
+    chart_count, chart_freed = artifact_cache.clear()
+    messagebox.showinfo(
+        "缓存",
+        f"已清除 {count + chart_count} 个缓存文件，释放 {(freed + chart_freed) / 1024 / 1024:.1f} MB。\n"
+        f"本次运行图表缓存命中 {stats['hits']} 次，未命中 {stats['misses']} 次。\n"
+        f"缓存目录: {os.path.dirname(roster_cache.cache_dir)}"
+    )
+
 # --- 检查数据是否加载的辅助函数 ---
 def check_data_loaded():
     if student_data is None:
-        messagebox.showerror("错误", "请先加载学生信息 Excel 文件！")
+        messagebox.showerror("错误", "请先加载学生信息表！")
         return False
     if student_data.empty:
          messagebox.showerror("错误", "加载的数据为空，无法进行分析！")
          return False
+    if filtered_view is not None and filtered_view.df.empty:
+        messagebox.showerror("错误", "当前筛选条件下没有学生，请修改或清除筛选条件。")
+        return False
     return True
 
-# --- 可视化功能函数 ---
+# --- 筛选学生 (见 filter_index.py) ---
+# 筛选条件对之后生成的所有图表生效；索引在第一次筛选时构建，之后每次筛选只查索引，不扫描整张表
+
+def chart_data():
+    # 图表使用的数据和汇总：设置了筛选条件时为筛选出的学生
+    if filtered_view is not None:
+        return filtered_view.df, filtered_view.summary
+    return student_data, student_summary
+
+def data_changed(keep_filters=False):
+    # 加载了新数据：旧索引作废；keep_filters=True 时 (监视的文件被修改) 在新数据上重新筛选
+    global filter_index, filtered_view, active_filters
+    filter_index = None
+    filtered_view = None
+    if keep_filters and active_filters:
+        apply_filters(active_filters)
+        return
+    active_filters = {}
+    if filter_window is not None and filter_window.winfo_exists():
+        filter_window.destroy()
+    update_filter_status()
+
+def get_filter_index():
+    global filter_index
+    if filter_index is None:
+        with perf_trace.span("构建筛选索引", cat='filter', rows=len(student_data)):
+            filter_index = FilterIndex(student_data)
+    return filter_index
+
+def apply_filters(filters):
+    # 返回筛选耗时 (秒)
+    global filtered_view, active_filters
+    active_filters = {col: values for col, values in filters.items() if values}
+    start = time.perf_counter()
+    if active_filters:
+        with perf_trace.span("筛选学生", cat='filter', rows=len(student_data)) as trace:
+            filtered_view = get_filter_index().subset(active_filters)
+            trace.set(selected=len(filtered_view.df))
+    else:
+        filtered_view = None
+    update_filter_status()
+    return time.perf_counter() - start
+
+def update_filter_status():
+    if filter_status_var is None:
+        return
+    if filtered_view is None:
+        filter_status_var.set("筛选: 全部学生")
+    else:
+        filter_status_var.set(f"筛选: {filtered_view.describe()} (共 {len(filtered_view.df)} 人)")
 
-def plot_gender():
-    if not check_data_loaded(): return
-    if '性别' not in student_data.columns:
-         messagebox.showerror("错误", "数据中缺少 '性别' 列！")
-         return
+def _parse_filter_text(text):
+    return [value.strip() for value in VALUE_SEPARATORS.split(text) if value.strip()]
 
-    try:
-        gender_counts = student_data['性别'].value_counts()
-        gender_data_pair = [list(z) for z in zip(gender_counts.index, gender_counts.values.astype(float))] # pyecharts 需要 float
-
-        pie_chart = (
-            Pie(init_opts=opts.InitOpts(width="600px", height="400px")) # 设置图表大小
-            .add(
-                "", # 系列名称，留空
-                gender_data_pair,
-                radius=["40%", "75%"], # 设置饼图内外半径，做成环状图
-            )
-            .set_global_opts(
-                title_opts=opts.TitleOpts(title="同学性别分布"),
-                legend_opts=opts.LegendOpts(orient="vertical", pos_top="15%", pos_left="2%"), # 图例设置
-            )
-            .set_series_opts(label_opts=opts.LabelOpts(formatter="{b}: {c} ({d}%)")) # 标签格式
-        )
-        output_file = "gender_distribution_pie.html"
-        pie_chart.render(output_file)
-        messagebox.showinfo("完成", f"性别分布饼图已生成：\n{output_file}\n将尝试在浏览器中打开。")
-        webbrowser.open(output_file)
-    except Exception as e:
-        messagebox.showerror("绘图错误", f"生成性别饼图时出错:\n{e}")
+def open_filter_panel():
+    global filter_window
+    if student_data is None:
+        messagebox.showerror("错误", "请先加载学生信息表！")
+        return
+    if filter_window is not None and filter_window.winfo_exists():
+        filter_window.lift()
+        return
+    index = get_filter_index()
+    window = tk.Toplevel(root)
+    window.title("筛选学生")
+    window.resizable(False, False)
+    filter_window = window
+    boxes = {}
+
+    def current_filters(exclude=None):
+        return {col: _parse_filter_text(box.get()) for col, box in boxes.items() if col != exclude}
+
+    def refresh_options(col):
+        # 打开下拉列表时只列出在其他条件下仍有学生的取值 (例如选了省份后只列该省的城市)
+        rows = index.select(current_filters(exclude=col))
+        options = index.options(col, rows if len(rows) < len(index) else None)
+        boxes[col]['values'] = [value for value, _ in options[:FILTER_OPTION_LIMIT]]
+
+    for i, col in enumerate(index.available_columns()):
+        tk.Label(window, text=col).grid(row=i, column=0, sticky='e', padx=5, pady=3)
+        box = ttk.Combobox(window, width=32, postcommand=lambda col=col: refresh_options(col))
+        box.set("、".join(active_filters.get(col, [])))
+        box.grid(row=i, column=1, padx=5, pady=3)
+        boxes[col] = box
+
+    row = len(boxes)
+    tk.Label(window, text="同一项的多个取值用逗号或顿号分隔 (满足其一即可)；各项之间需同时满足。\n"
+                          "楼栋取寝室号的前缀 (如 3-205 属于 3 号楼)。", justify=tk.LEFT, fg="gray") \
+        .grid(row=row, column=0, columnspan=2, padx=5, pady=5, sticky='w')
+    result_var = tk.StringVar(value=filter_status_var.get())
+    tk.Label(window, textvariable=result_var).grid(row=row + 1, column=0, columnspan=2, padx=5, sticky='w')
+
+    def apply():
+        try:
+            elapsed = apply_filters(current_filters())
+        except ValueError as e:
+            messagebox.showerror("错误", str(e), parent=window)
+            return
+        selected = len(filtered_view.df) if filtered_view is not None else len(student_data)
+        result_var.set(f"{filter_status_var.get()}，用时 {elapsed * 1000:.1f} ms\n之后生成的图表只统计这 {selected} 人")
 
-def plot_province():
-    if not check_data_loaded(): return
-    if '生源省份' not in student_data.columns:
-         messagebox.showerror("错误", "数据中缺少 '生源省份' 列！")
-         return
+    def clear():
+        for box in boxes.values():
+            box.set("")
+        apply()
 
-    try:
-        province_counts = student_data['生源省份'].value_counts()
-        # 清理省份名称 (例如去掉 "省", "市", "自治区", "维吾尔", "壮族" 等后缀)
-        province_counts.index = province_counts.index.str.replace(
-            r'(省|市|自治区|维吾尔|壮族|回族)', '', regex=True
-        )
-        # 对于特殊名称的处理 (例如 '内蒙古' -> '内蒙古', '黑龙江' -> '黑龙江') - pyecharts 通常能识别短名称
-        province_data_pair = [list(z) for z in zip(province_counts.index, province_counts.values.astype(float))]
-
-        max_value = float(province_counts.max()) if not province_counts.empty else 1.0 # 避免空数据出错
-
-        map_chart = (
-            Map(init_opts=opts.InitOpts(width="800px", height="600px"))
-            .add("生源地人数", province_data_pair, "china")
-            .set_global_opts(
-                title_opts=opts.TitleOpts(title="同学省份分布地图"),
-                visualmap_opts=opts.VisualMapOpts(max_=max_value, is_piecewise=False),
-                tooltip_opts=opts.TooltipOpts(formatter="{b}: {c}人") # 鼠标悬停提示
-            )
-        )
-        output_file = "province_distribution_map.html"
-        map_chart.render(output_file)
-        messagebox.showinfo("完成", f"省份分布地图已生成：\n{output_file}\n将尝试在浏览器中打开。")
-        webbrowser.open(output_file)
-    except Exception as e:
-        messagebox.showerror("绘图错误", f"生成省份地图时出错:\n{e}")
+    button_frame = tk.Frame(window)
+    button_frame.grid(row=row + 2, column=0, columnspan=2, pady=8)
+    tk.Button(button_frame, text="应用筛选", command=apply, width=12).pack(side=tk.LEFT, padx=5)
+    tk.Button(button_frame, text="清除筛选", command=clear, width=12).pack(side=tk.LEFT, padx=5)
+    tk.Button(button_frame, text="关闭", command=window.destroy, width=12).pack(side=tk.LEFT, padx=5)
 
 
-def plot_city():
+# --- 可视化功能函数 ---
+# 图表在后台线程中生成 (见 charts.py / job_scheduler.py)，窗口在此期间保持响应；
+# 下面的函数只负责在主线程中检查数据、提交任务和展示结果。
+
+MESSAGEBOX_BY_LEVEL = {
+    'error': messagebox.showerror,
+    'warning': messagebox.showwarning,
+    'info': messagebox.showinfo,
+}
+
+def show_chart_result(result, open_in_browser=True):
+    for level, title, message in result.notices:
+        MESSAGEBOX_BY_LEVEL[level](title, message)
+    if open_in_browser:
+        messagebox.showinfo("完成", f"{result.message}\n将尝试在浏览器中打开。")
+        webbrowser.open(result.output_file)
+    else:
+        messagebox.showinfo("完成", result.message)
+
+def show_chart_error(exc, error_title):
+    if isinstance(exc, ChartError):
+        MESSAGEBOX_BY_LEVEL[exc.level](exc.title, exc.message)
+    else:
+        messagebox.showerror("绘图错误", f"{error_title}:\n{exc}")
+
+def submit_chart(key, label, error_title, func, on_success=show_chart_result):
     if not check_data_loaded(): return
-    if '生源城市' not in student_data.columns:
-         messagebox.showerror("错误", "数据中缺少 '生源城市' 列！")
-         return
+    if scheduler.is_running(key):
+        messagebox.showinfo("请稍候", f"{label}正在生成中，请等待完成或先取消。")
+        return
+    scheduler.submit(
+        key, label, func,
+        on_success=on_success,
+        on_error=lambda exc: show_chart_error(exc, error_title),
+    )
 
-    try:
-        city_counts = student_data['生源城市'].value_counts()
-        city_data_pair = [list(z) for z in zip(city_counts.index, city_counts.values.astype(float))]
-
-        bar_chart = (
-            Bar(init_opts=opts.InitOpts(width="900px", height="500px"))
-            .add_xaxis(city_counts.index.tolist())
-            .add_yaxis("人数", city_counts.values.tolist())
-            .set_global_opts(
-                title_opts=opts.TitleOpts(title="同学城市分布"),
-                xaxis_opts=opts.AxisOpts(axislabel_opts=opts.LabelOpts(rotate=-30)), # X轴标签旋转
-                datazoom_opts=[opts.DataZoomOpts(), opts.DataZoomOpts(type_="inside")], # 添加缩放
-                tooltip_opts=opts.TooltipOpts(trigger="axis", axis_pointer_type="shadow") # 悬停提示
-            )
-        )
-        output_file = "city_distribution_bar.html"
-        bar_chart.render(output_file)
-        messagebox.showinfo("完成", f"城市分布柱状图已生成：\n{output_file}\n将尝试在浏览器中打开。")
-        webbrowser.open(output_file)
-    except Exception as e:
-        messagebox.showerror("绘图错误", f"生成城市柱状图时出错:\n{e}")
+def submit_render(key, label, error_title, on_success=show_chart_result, **options):
+    # 勾选 "按班级对比" 时生成按班级拆分/对比的视图 (charts.CLASS_CHARTS)，两种视图可以同时生成
+    # 设置了筛选条件时只统计筛选出的学生
+    (data, summary), by_class = chart_data(), by_class_var.get()
+    filter_note = f"\n(已筛选: {filtered_view.describe()}，共 {len(data)} 人)" if filtered_view is not None else ""
+    job_key = key
+    if by_class:
+        job_key, label = f"{key}:by_class", charts.CLASS_CHARTS[key][2]
+
+    def rendered(result):
+        opened_charts[job_key] = (key, by_class, label, options) # 监视的文件变化后自动更新
+        result.message += filter_note
+        on_success(result)
+
+    submit_chart(job_key, label, error_title,
+                 lambda **kw: charts.render_chart(key, data, cache=artifact_cache, summary=summary,
+                                                  by_class=by_class, **options, **kw),
+                 on_success=rendered)
 
-def plot_wordcloud():
-    if not check_data_loaded(): return
-    if '人生格言' not in student_data.columns:
-         messagebox.showerror("错误", "数据中缺少 '人生格言' 列！")
-         return
+def plot_gender():
+    submit_render("gender", "性别分布饼图", "生成性别饼图时出错")
 
-    try:
-        mottos = student_data['人生格言'].dropna().astype(str)
-        if mottos.empty:
-            messagebox.showinfo("提示", "没有有效的 '人生格言' 数据可供生成词云。")
-            return
+def plot_province():
+    submit_render("province", "省份分布地图", "生成省份地图时出错")
 
-        text = " ".join(mottos)
-        # 过滤掉太短或无意义的词语，以及特定标点符号
-        text = text.replace(' ', '').replace('，', '').replace('。', '').replace('！', '').replace('？', '').replace('.', '').replace(',', '').replace('!', '').replace('?', '')
-        if not text:
-             messagebox.showinfo("提示", "过滤后没有足够的文本内容生成词云。")
-             return
-
-        # 使用 jieba 分词
-        seg_list = jieba.cut(text, cut_all=False)
-        # 定义一些停用词 (可以根据需要添加更多)
-        stopwords = {' ', '的', '是', '了', '我', '你', '他', '她', '它', '都', '就', '也', '不', '在', '有', '人', '个', ' ', '\n', '\t'}
-        processed_text = " ".join(word for word in seg_list if word not in stopwords and len(word) > 1) # 过滤单字和停用词
-
-        if not processed_text:
-             messagebox.showinfo("提示", "分词和过滤后没有足够的词语生成词云。")
-             return
-
-        # 检查字体文件是否存在
-        if not os.path.exists(FONT_PATH):
-             messagebox.showerror("字体错误", f"指定的字体文件未找到:\n{FONT_PATH}\n请在代码顶部修改 FONT_PATH 为有效的字体路径。")
-             return
-
-        wordcloud_img = WordCloud(
-            font_path=FONT_PATH, # 必须指定中文字体路径
-            width=800,
-            height=400,
-            background_color='white',
-            # stopwords=stopwords # WordCloud 内部也有停用词，但我们前面处理过了
-        ).generate(processed_text)
-
-        # 使用 Matplotlib 显示词云
-        plt.figure(figsize=(10, 5))
-        plt.imshow(wordcloud_img, interpolation='bilinear')
-        plt.axis("off")
-        plt.title("人生格言词云图")
-        # 保存图片 (可选)
-        output_image = "motto_wordcloud.png"
-        try:
-            wordcloud_img.to_file(output_image)
-            messagebox.showinfo("完成", f"词云图已生成并显示。\n图片已保存为: {output_image}")
-        except Exception as save_err:
-             messagebox.showwarning("保存失败", f"词云图已显示，但保存到文件失败:\n{save_err}")
-        plt.show() # 显示图像
-
-    except RuntimeError as e:
-         messagebox.showerror("字体错误", f"生成词云时可能字体路径配置错误:\n{e}\n请检查代码中的 FONT_PATH 设置。")
-    except ImportError:
-         messagebox.showerror("库缺失", "请确保已安装 'jieba' 和 'wordcloud' 库:\n pip install jieba wordcloud")
+def plot_city():
+    submit_render("city", "城市分布柱状图", "生成城市柱状图时出错")
+
+WORDCLOUD_POLL_MS = 200           # 检查后台完整分辨率词云是否完成的间隔
+WORDCLOUD_DISPLAY_SIZE = (800, 400) # 词云窗口中图片的最大尺寸
+WORDCLOUD_PREVIEW_BUDGET = 0.3    # 预览排布的时间预算 (秒)
+
+def set_wordcloud_image(label, image):
+    ImageTk = timed_import('PIL.ImageTk')
+    image = image.copy()
+    image.thumbnail(WORDCLOUD_DISPLAY_SIZE) # 完整分辨率的图片缩小到窗口大小显示
+    label.photo = ImageTk.PhotoImage(image) # 保留引用，否则图片会被回收
+    label.configure(image=label.photo)
+
+def show_wordcloud(result):
+    for level, title, message in result.notices:
+        MESSAGEBOX_BY_LEVEL[level](title, message)
+
+    # 在 Tk 窗口中显示词云，不阻塞主循环 (命中图表缓存时从保存的图片读取)
+    Image = timed_import('PIL.Image')
+    image = Image.fromarray(result.image) if result.image is not None else Image.open(result.output_file)
+    window = tk.Toplevel(root)
+    window.title("人生格言词云图")
+    label = tk.Label(window, background='white')
+    label.pack(padx=5, pady=5)
+    set_wordcloud_image(label, image)
+    if result.pending is not None:
+        # 先显示预览，完整分辨率的图片在后台生成完成后替换
+        window.title("人生格言词云图 (预览，正在生成完整分辨率图片)")
+        root.after(WORDCLOUD_POLL_MS, lambda: poll_wordcloud(window, label, result))
+    elif result.output_file is not None:
+        messagebox.showinfo("完成", result.message)
+
+def poll_wordcloud(window, label, result):
+    if not window.winfo_exists():
+        return # 窗口已关闭；后台任务照常完成并保存文件
+    if not result.pending.done():
+        root.after(WORDCLOUD_POLL_MS, lambda: poll_wordcloud(window, label, result))
+        return
+    try:
+        output_file = result.pending.result()
     except Exception as e:
-        messagebox.showerror("绘图错误", f"生成词云时出错:\n{e}")
+        window.title("人生格言词云图 (预览)")
+        messagebox.showwarning("保存失败", f"词云预览已显示，但生成或保存完整分辨率的图片失败:\n{e}")
+        return
+    set_wordcloud_image(label, timed_import('PIL.Image').open(output_file))
+    window.title("人生格言词云图")
+    messagebox.showinfo("完成", f"词云图已生成并显示。\n图片已保存为: {output_file}")
 
+def plot_wordcloud():
+    submit_render("wordcloud", "格言词云", "生成词云时出错", on_success=show_wordcloud, font_path=FONT_PATH,
+                  preview_budget=WORDCLOUD_PREVIEW_BUDGET)
 
 def plot_grades():
-    if not check_data_loaded(): return
-
-    rank_cols = ['大一上学期名次', '大一下学期名次', '大二上学期名次', '大二下学期名次', '大三上学期名次']
-    # 找出数据中实际存在的成绩列
-    valid_rank_cols = [col for col in rank_cols if col in student_data.columns]
+    submit_render("grades", "成绩趋势折线图", "生成成绩趋势图时出错")
 
-    if not valid_rank_cols:
-        messagebox.showerror("错误", "数据中没有找到任何有效的成绩排名列！")
-        return
-    if '姓名' not in student_data.columns:
-        messagebox.showerror("错误", "数据中缺少 '姓名' 列！")
-        return
-
-    try:
-        # 准备数据，将姓名设为索引
-        df_grades = student_data[['姓名'] + valid_rank_cols].copy()
-        df_grades = df_grades.set_index('姓名')
-        # 筛选掉所有成绩都为空的学生
-        df_grades = df_grades.dropna(how='all')
-
-        if df_grades.empty:
-             messagebox.showinfo("提示", "没有找到有效的学生成绩数据来绘制趋势图。")
-             return
-
-        line_chart = (
-             Line(init_opts=opts.InitOpts(width="1000px", height="600px"))
-             .set_global_opts(
-                title_opts=opts.TitleOpts(title="同学成绩名次变化趋势 (名次越低越靠前)"),
-                tooltip_opts=opts.TooltipOpts(trigger="axis"),
-                xaxis_opts=opts.AxisOpts(type_="category", name="学期"),
-                yaxis_opts=opts.AxisOpts(
-                    type_="value",
-                    name="名次",
-                    is_inverse=True, # Y轴反转，数字小的在上面
-                    splitline_opts=opts.SplitLineOpts(is_show=True),
-                ),
-                legend_opts=opts.LegendOpts(type_="scroll", pos_left="10%", orient="horizontal", top="5%"),
-                datazoom_opts=[opts.DataZoomOpts(orient="horizontal"), opts.DataZoomOpts(type_="inside", orient="horizontal")],
-             )
-             .add_xaxis(valid_rank_cols) # X轴是学期名称
-        )
+def plot_dorm_network():
+    submit_render("dorm", "寝室关系图", "生成寝室关系图时出错")
 
-        # 为每个学生添加一条线
-        for student_name, ranks in df_grades.iterrows():
-            # Pyecharts 需要处理 NaN 为 None
-            ranks_list = [r if pd.notna(r) else None for r in ranks.values]
-            line_chart.add_yaxis(
-                student_name,
-                ranks_list,
-                is_smooth=False, # 不使用平滑曲线
-                symbol="circle",
-                label_opts=opts.LabelOpts(is_show=False), # 不显示线上标签，太多会乱
-                # 设置鼠标悬停时高亮相关项
-                emphasis_opts=opts.EmphasisOpts(focus='series')
-                )
-
-        output_file = "grade_trends_line.html"
-        line_chart.render(output_file)
-        messagebox.showinfo("完成", f"成绩趋势折线图已生成：\n{output_file}\n将尝试在浏览器中打开。")
-        webbrowser.open(output_file)
+def plot_grade_movers():
+    submit_render("movers", "名次进退步排行", "生成名次进退步排行时出错")
 
-    except Exception as e:
-        messagebox.showerror("绘图错误", f"生成成绩趋势图时出错:\n{e}")
+def plot_rank_correlation():
+    submit_render("rank_corr", "学期名次相关性热力图", "生成名次相关性图时出错")
 
-def plot_dorm_network():
+def export_grade_analysis():
+    # 名次变化、进退步排行、学期相关性、波动程度等表格 (见 grade_analytics.py)
     if not check_data_loaded(): return
-    if '姓名' not in student_data.columns or '寝室号' not in student_data.columns:
-        messagebox.showerror("错误", "数据中缺少 '姓名' 或 '寝室号' 列！")
+    path = filedialog.asksaveasfilename(
+        title="导出成绩分析表",
+        defaultextension=".xlsx",
+        filetypes=[("Excel 工作簿 (全部表格)", "*.xlsx"), ("CSV (学生明细)", "*.csv")],
+    )
+    if not path:
         return
+    data = chart_data()[0]
+
+    def export(progress=None, cancel=None):
+        progress(0.1, "分析名次变化")
+        movement = charts.grade_movement(data, with_classes=charts.CLASS_COL in data.columns)
+        progress(0.5, "写入表格")
+        return movement.export(path)
+
+    submit_chart("grade_analysis", "成绩分析表", "导出成绩分析表时出错", export,
+                 on_success=lambda path: messagebox.showinfo("完成", f"成绩分析表已导出:\n{path}"))
+
+
+# --- 监视文件变化 (见 roster_watch.py) ---
+def stop_watching():
+    global roster_watcher
+    roster_watcher = None
+    if watch_var is not None:
+        watch_var.set(False)
+
+def toggle_watch():
+    # 打开时先完整读取一次并记录每行的哈希，之后文件被修改时只处理变化的行
+    global roster_watcher
+    if not watch_var.get():
+        roster_watcher = None
+        return
+    if loaded_path is None:
+        watch_var.set(False)
+        messagebox.showinfo("提示", "请先用“选择学生信息表”加载一个表。\n合并加载的多个班级不支持监视。")
+        return
+    watcher = RosterWatcher(loaded_path)
+    submitted = scheduler.submit(
+        "load", "开始监视文件", lambda **kw: watcher.start(),
+        on_success=lambda result: watch_started(watcher, result),
+        on_error=lambda exc: (watch_var.set(False), messagebox.showerror("错误", f"读取文件失败，无法监视:\n{exc}")),
+    )
+    if not submitted:
+        watch_var.set(False)
+        messagebox.showinfo("请稍候", "正在加载文件，请等待完成后再打开监视。")
 
-    try:
-        G = nx.Graph()
-        # 添加节点 (学生)，包含寝室信息
-        valid_students = student_data.dropna(subset=['姓名', '寝室号'])
-        if valid_students.empty:
-             messagebox.showinfo("提示", "没有有效的学生姓名和寝室号数据来构建关系图。")
-             return
-
-        nodes_data = []
-        dorm_map = {} # 用于给不同宿舍分配不同类别/颜色
-        dorm_category_index = 0
-
-        for index, row in valid_students.iterrows():
-            student_name = str(row['姓名'])
-            dorm_number = str(row['寝室号'])
-            if dorm_number not in dorm_map:
-                dorm_map[dorm_number] = dorm_category_index
-                dorm_category_index += 1
-
-            G.add_node(student_name, dorm=dorm_number) # NetworkX 图节点
-
-            # 为 Pyecharts 准备节点数据
-            nodes_data.append(
-                opts.GraphNode(
-                    name=student_name,
-                    symbol_size=10, # 节点大小
-                    category=dorm_map[dorm_number] # 节点类别，用于区分颜色
-                )
-            )
-
-        # 添加边 (同一寝室的学生连接)
-        links_data = []
-        dorm_groups = valid_students.groupby('寝室号')['姓名'].apply(list)
-        for dorm, students in dorm_groups.items():
-            # 确保学生名字是字符串
-            students = [str(s) for s in students]
-            if len(students) > 1:
-                for u, v in combinations(students, 2):
-                    if G.has_node(u) and G.has_node(v): # 再次确认节点存在
-                        G.add_edge(u, v, dorm=str(dorm)) # NetworkX 图边
-                        # 为 Pyecharts 准备边数据
-                        links_data.append(opts.GraphLink(source=u, target=v))
-
-        if not links_data:
-             messagebox.showinfo("提示", "没有找到同一寝室超过一人的情况，无法生成关系连线。")
-             # 可以选择只显示节点
-             # return
-
-
-        # 生成 Pyecharts 关系图
-        categories = [opts.GraphCategory(name=str(dorm)) for dorm in dorm_map.keys()]
-
-        graph_chart = (
-            Graph(init_opts=opts.InitOpts(width="1000px", height="700px"))
-            .add(
-                "", # 系列名称
-                nodes=nodes_data,
-                links=links_data,
-                categories=categories, # 定义节点类别（用于颜色区分）
-                layout="force", # 使用力引导布局
-                is_rotate_label=True, # 标签是否旋转
-                linestyle_opts=opts.LineStyleOpts(color="source", curve=0.3), # 边样式
-                label_opts=opts.LabelOpts(is_show=True, position="right"), # 显示标签
-                repulsion=80, # 节点间斥力因子
-                gravity=0.1, # 引力因子
-                edge_symbol=['', 'arrow'] # 边两端形状
-            )
-            .set_global_opts(
-                title_opts=opts.TitleOpts(title="寝室关系图 (同寝室相连)"),
-                legend_opts=opts.LegendOpts(orient='vertical', pos_left='2%', pos_top='20%'), # 显示图例（寝室号）
-            )
+def watch_started(watcher, result):
+    global roster_watcher
+    if not watch_var.get(): # 读取期间已取消勾选
+        return
+    roster_watcher = watcher
+    apply_reload(result)
+    root.after(WATCH_INTERVAL_MS, poll_roster_file)
+
+def poll_roster_file():
+    # 主线程定时检查文件状态 (只调用 stat)；有变化时在后台读取并对比
+    watcher = roster_watcher
+    if watcher is None:
+        return
+    if watcher.changed() and not scheduler.is_running("load"):
+        data, summary = student_data, student_summary
+        scheduler.submit(
+            "load", "读取修改后的文件", lambda **kw: watcher.reload(data, summary),
+            on_success=lambda result: roster_file_changed(watcher, result),
+            # 文件可能还没保存完：不接受这次结果，下次检查时重试
+            on_error=lambda exc: status_var.set(f"读取修改后的文件失败，稍后重试: {exc}"),
         )
+    root.after(WATCH_INTERVAL_MS, poll_roster_file)
 
-        output_file = "dorm_relationship_graph.html"
-        graph_chart.render(output_file)
-        messagebox.showinfo("完成", f"寝室关系图已生成：\n{output_file}\n将尝试在浏览器中打开。")
-        webbrowser.open(output_file)
-
-
-    except ImportError:
-         messagebox.showerror("库缺失", "请确保已安装 'networkx' 库:\n pip install networkx")
-    except Exception as e:
-        messagebox.showerror("绘图错误", f"生成寝室关系图时出错:\n{e}")
-
-
-# --- Tkinter GUI 布局 ---
-
-# 顶部框架：文件选择
-top_frame = tk.Frame(root)
-top_frame.pack(pady=10)
-
-select_button = tk.Button(top_frame, text="选择学生信息 Excel 文件", command=select_file, width=25)
-select_button.pack(side=tk.LEFT, padx=10)
-
-file_label = tk.Label(top_frame, textvariable=file_path_label_var, width=40, anchor='w')
-file_label.pack(side=tk.LEFT)
+def roster_file_changed(watcher, result):
+    if watcher is not roster_watcher: # 期间已停止监视或加载了其他文件
+        return
+    watcher.accept(result)
+    diff = result.diff
+    status_var.set(f"文件已更新: {diff.describe()}")
+    if diff.is_empty():
+        return
+    apply_reload(result)
+    rerender_charts(diff.changed_columns)
+
+def apply_reload(result):
+    global student_data, student_summary
+    student_data, student_summary = result.df, result.summary
+    data_changed(keep_filters=True)
+    file_path_label_var.set(f"已加载: {data_title} (共 {len(student_data)} 条记录) [监视中]")
+    publish_to_dashboard(result.diff.changed_columns)
+
+def rerender_charts(changed_columns):
+    # 只重新生成已打开过、且输入列发生变化的图表；写回原文件，刷新浏览器页面即可看到
+    data, summary = chart_data()
+    for job_key, (key, by_class, label, options) in list(opened_charts.items()):
+        if key not in charts.charts_affected_by(changed_columns, by_class) or scheduler.is_running(job_key):
+            continue
+        scheduler.submit(
+            job_key, f"更新{label}",
+            lambda key=key, by_class=by_class, options=options, **kw: charts.render_chart(
+                key, data, cache=artifact_cache, summary=summary, by_class=by_class, **options, **kw),
+            on_success=lambda result: None,
+            on_error=lambda exc, label=label: status_var.set(f"更新{label}失败: {exc}"),
+        )
 
-# 中部框架：功能按钮
-button_frame = tk.Frame(root)
-button_frame.pack(pady=20, padx=20)
+# --- 本地看板 ---
+def publish_to_dashboard(changed_columns=None):
+    # 看板已打开时，重新加载数据后同步更新 (已打开的页面会自动刷新)
+    if dashboard is not None and student_data is not None:
+        dashboard.publish(student_data, student_summary, data_title, FONT_PATH, changed_columns)
 
-button_width = 18 # 统一按钮宽度
-button_pady = 5    # 统一按钮垂直间距
+def open_dashboard():
+    # 在一个页面中查看全部图表：按需生成、不写文件，同一台机器上的其他用户也可以打开同一地址
+    global dashboard
+    if not check_data_loaded(): return
+    if dashboard is None:
+        try:
+            server = DashboardServer()
+            server.start_in_thread()
+        except OSError: # 默认端口被占用 (例如另一个用户已经开了看板)，改用系统分配的端口
+            try:
+                server = DashboardServer(port=0)
+                server.start_in_thread()
+            except OSError as e:
+                messagebox.showerror("错误", f"启动本地看板失败:\n{e}")
+                return
+        dashboard = server
+    publish_to_dashboard()
+    webbrowser.open(dashboard.url)
+    status_var.set(f"本地看板: {dashboard.url}")
+
+# --- 启动优化 ---
+def preload_jieba():
+    def load():
+        try:
+            timed_import('jieba').initialize() # 加载分词词典
+            mark("jieba 词典加载完成")
+        except Exception as e:
+            print(f"提示: 后台加载 jieba 词典失败，将在生成词云时重试: {e}")
+    threading.Thread(target=load, name="jieba-preload", daemon=True).start()
 
-# 功能按钮定义
-buttons_info = [
-    ("性别分布饼图", plot_gender),
-    ("省份分布地图", plot_province),
-    ("城市分布柱状图", plot_city),
-    ("格言词云", plot_wordcloud),
-    ("成绩趋势折线图", plot_grades),
-    ("寝室关系图", plot_dorm_network),
-]
+def show_startup_report():
+    messagebox.showinfo("启动耗时报告", startup_report())
 
-# 使用 grid 布局按钮
-num_cols = 2
-for i, (text, command) in enumerate(buttons_info):
-    row = i // num_cols
-    col = i % num_cols
-    button = tk.Button(button_frame, text=text, width=button_width, command=command)
-    button.grid(row=row, column=col, padx=10, pady=button_pady, sticky="ew") # sticky='ew' 使按钮在网格单元中水平填充
+def show_memory_report():
+    if not check_data_loaded():
+        return
+    messagebox.showinfo("内存占用报告", format_memory_report(memory_report(student_data)))
+
+# --- 性能记录 (默认关闭，见 perf_trace.py) ---
+TRACE_REFRESH_MS = 500
+
+def toggle_trace():
+    if trace_var.get():
+        perf_trace.enable(track_memory=True)
+        refresh_trace_status()
+    else:
+        perf_trace.disable()
+        trace_status_var.set("")
+
+def refresh_trace_status():
+    # 状态栏第二行显示最近结束的阶段；只在打开记录时轮询
+    if not perf_trace.is_enabled():
+        return
+    event = perf_trace.last_event()
+    if event is not None:
+        trace_status_var.set(f"性能记录: {perf_trace.format_event(event)}")
+    root.after(TRACE_REFRESH_MS, refresh_trace_status)
+
+def export_trace():
+    if not perf_trace.events():
+        messagebox.showinfo("性能记录", "还没有性能记录。请先勾选“记录性能数据”，再加载文件或生成图表。")
+        return
+    file_type = tk.StringVar(value="Chrome trace")
+    path = filedialog.asksaveasfilename(
+        title="导出性能记录",
+        defaultextension=".json",
+        filetypes=[("Chrome trace", "*.json"), ("JSON 记录", "*.json")],
+        typevariable=file_type,
+    )
+    if not path:
+        return
+    try:
+        if file_type.get() == "JSON 记录":
+            perf_trace.export_json(path)
+        else:
+            perf_trace.export_chrome_trace(path)
+    except OSError as e:
+        messagebox.showerror("错误", f"导出性能记录失败:\n{e}")
+        return
+    messagebox.showinfo("性能记录", f"已导出 {len(perf_trace.events())} 条记录:\n{path}\n"
+                        "Chrome trace 可在 chrome://tracing 或 https://ui.perfetto.dev 中打开。")
 
-# 底部状态栏 (可选)
-# status_label = tk.Label(root, text="准备就绪", bd=1, relief=tk.SUNKEN, anchor=tk.W)
-# status_label.pack(side=tk.BOTTOM, fill=tk.X)
+# --- 图表输出方式 ---
+def toggle_offline_output():
+    # 之后生成的图表生效；已生成的图表缓存按输出方式区分，不会混用
+    chart_output.configure('offline' if offline_var.get() else 'cdn')
 
-# --- 启动主事件循环 ---
-root.mainloop()
+# --- Tkinter GUI 布局 ---
+def main():
+    global root, file_path_label_var, streaming_var, by_class_var, status_var, scheduler
+    global trace_var, trace_status_var, offline_var, watch_var, filter_status_var
+    root = tk.Tk()
+    root.title("学生信息分析工具 v1.0")
+    root.geometry("500x940") # 设置窗口大小
+
+    file_path_label_var = tk.StringVar()
+    file_path_label_var.set("尚未选择学生信息表")
+    streaming_var = tk.BooleanVar(value=False)
+    by_class_var = tk.BooleanVar(value=False)
+    watch_var = tk.BooleanVar(value=False)
+    filter_status_var = tk.StringVar(value="筛选: 全部学生")
+    offline_var = tk.BooleanVar(value=chart_output.current().mode == 'offline')
+    status_var = tk.StringVar(value="准备就绪")
+    trace_var = tk.BooleanVar(value=perf_trace.is_enabled())
+    trace_status_var = tk.StringVar()
+    scheduler = JobScheduler(root, status_var)
+
+    # 顶部框架：文件选择
+    top_frame = tk.Frame(root)
+    top_frame.pack(pady=10)
+
+    select_button = tk.Button(top_frame, text="选择学生信息表", command=select_file, width=25)
+    select_button.pack(side=tk.LEFT, padx=10)
+
+    file_label = tk.Label(top_frame, textvariable=file_path_label_var, width=40, anchor='w')
+    file_label.pack(side=tk.LEFT)
+
+    class_button = tk.Button(root, text="选择多个班级的学生信息表 (合并对比)", command=select_class_files, width=32)
+    class_button.pack()
+
+    snapshot_frame = tk.Frame(root)
+    snapshot_frame.pack()
+    tk.Button(snapshot_frame, text="保存为历史快照", command=save_snapshot).pack(side=tk.LEFT, padx=5)
+    tk.Button(snapshot_frame, text="历史快照...", command=open_snapshot_panel).pack(side=tk.LEFT, padx=5)
+
+    streaming_check = tk.Checkbutton(root, text="流式加载 (适用于超大文件，分块读取以限制内存)", variable=streaming_var)
+    streaming_check.pack()
+
+    by_class_check = tk.Checkbutton(root, text="按班级对比 (需要同时加载多个班级)", variable=by_class_var)
+    by_class_check.pack()
+
+    offline_check = tk.Checkbutton(root, text="离线紧凑输出 (ECharts 脚本保存在图表旁的 echarts_assets/)",
+                                   variable=offline_var, command=toggle_offline_output)
+    offline_check.pack()
+
+    watch_check = tk.Checkbutton(root, text="监视文件变化 (表格被修改后只更新变化的行和图表)",
+                                 variable=watch_var, command=toggle_watch)
+    watch_check.pack()
+
+    filter_frame = tk.Frame(root)
+    filter_frame.pack(pady=5)
+    filter_button = tk.Button(filter_frame, text="筛选学生...", command=open_filter_panel)
+    filter_button.pack(side=tk.LEFT, padx=5)
+    filter_label = tk.Label(filter_frame, textvariable=filter_status_var, width=40, anchor='w')
+    filter_label.pack(side=tk.LEFT)
+
+    # 中部框架：功能按钮
+    button_frame = tk.Frame(root)
+    button_frame.pack(pady=20, padx=20)
+
+    button_width = 18 # 统一按钮宽度
+    button_pady = 5    # 统一按钮垂直间距
+
+    # 功能按钮定义
+    buttons_info = [
+        ("性别分布饼图", plot_gender),
+        ("省份分布地图", plot_province),
+        ("城市分布柱状图", plot_city),
+        ("格言词云", plot_wordcloud),
+        ("成绩趋势折线图", plot_grades),
+        ("寝室关系图", plot_dorm_network),
+        ("名次进退步排行", plot_grade_movers),
+        ("学期名次相关性", plot_rank_correlation),
+        ("导出成绩分析表", export_grade_analysis),
+    ]
+
+    # 使用 grid 布局按钮
+    num_cols = 2
+    for i, (text, command) in enumerate(buttons_info):
+        row = i // num_cols
+        col = i % num_cols
+        button = tk.Button(button_frame, text=text, width=button_width, command=command)
+        button.grid(row=row, column=col, padx=10, pady=button_pady, sticky="ew") # sticky='ew' 使按钮在网格单元中水平填充
+
+    dashboard_button = tk.Button(root, text="打开本地看板", command=open_dashboard, width=button_width)
+    dashboard_button.pack(pady=5)
+
+    # 缓存管理
+    clear_cache_button = tk.Button(root, text="清除数据缓存", command=clear_roster_cache, width=button_width)
+    clear_cache_button.pack(pady=5)
+
+    cancel_button = tk.Button(root, text="取消正在进行的任务", command=lambda: scheduler.cancel_all(), width=button_width)
+    cancel_button.pack(pady=5)
+
+    report_frame = tk.Frame(root)
+    report_frame.pack(pady=5)
+    report_button = tk.Button(report_frame, text="启动耗时报告", command=show_startup_report)
+    report_button.pack(side=tk.LEFT, padx=5)
+    memory_button = tk.Button(report_frame, text="内存占用报告", command=show_memory_report)
+    memory_button.pack(side=tk.LEFT, padx=5)
+
+    trace_frame = tk.Frame(root)
+    trace_frame.pack(pady=5)
+    trace_check = tk.Checkbutton(trace_frame, text="记录性能数据 (计时/内存)", variable=trace_var, command=toggle_trace)
+    trace_check.pack(side=tk.LEFT, padx=5)
+    export_trace_button = tk.Button(trace_frame, text="导出性能记录", command=export_trace)
+    export_trace_button.pack(side=tk.LEFT, padx=5)
+
+    # 底部状态栏：显示后台任务的进度
+    status_label = tk.Label(root, textvariable=status_var, bd=1, relief=tk.SUNKEN, anchor=tk.W)
+    status_label.pack(side=tk.BOTTOM, fill=tk.X)
+    trace_status_label = tk.Label(root, textvariable=trace_status_var, anchor=tk.W, fg="gray30")
+    trace_status_label.pack(side=tk.BOTTOM, fill=tk.X)
+
+    # 窗口显示后再在后台加载 jieba 词典，首次生成词云时无需等待
+    root.after_idle(lambda: mark("窗口显示"))
+    root.after(200, preload_jieba)
+    if perf_trace.is_enabled(): # 通过环境变量 STUDENT_INFO_TRACE 打开时
+        refresh_trace_status()
+
+    # --- 启动主事件循环 ---
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()